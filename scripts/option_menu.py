@@ -14,15 +14,24 @@ def reload_ui(*args):
 
 def call_skinCluster(*args):
     """
-    Call the skinClusterManager module and execute its main function.
+    Show the SkinCluster Manager window. The tool is only imported on the first call, the window is
+    kept and shown again on the next ones.
     """
-    import skinClusterManager 
-    reload(skinClusterManager)
+    from skinClusterManager import launcher
+    launcher.show()
+
+def toggle_dev_mode(enabled, *args):
+    """
+    Reload the skinClusterManager modules on every open of its window, to try code edits without restarting Maya.
+    """
+    from skinClusterManager import launcher
+    launcher.set_dev_mode(enabled)
 
 def option_menu_ui():
     """
     Create the option menu UI in Maya.
     """
+    from skinClusterManager import launcher
 
     if cmds.menu("ToolKit", exists=True):
         cmds.deleteUI("ToolKit")
@@ -30,6 +39,7 @@ def option_menu_ui():
 
     cmds.menuItem(label="   Settings", subMenu=True, tearOff=True, boldFont=True)
     cmds.menuItem(label="   Reload UI", command=reload_ui)
+    cmds.menuItem(label="   Dev Mode", checkBox=launcher.dev_mode(), command=toggle_dev_mode)
 
     cmds.setParent("..", menu=True)
     cmds.menuItem(dividerLabel="\n ", divider=True)
@@ -1,13 +1,15 @@
-from importlib import reload
-import skinClusterManager.ui as ui
-reload(ui)
+"""
+SkinCluster Manager. Importing the package opens nothing and imports nothing heavy, so worker
+processes, batch sessions and the benchmarks can import it too. In Maya the window is opened with
+skinClusterManager.show(), see launcher.
+"""
 
-# In case the UI is already open, close it first
-try:
-    skinClusterManagerInstance.close()
-except:
-    pass
 
-# Create a new instance of the SkinClusterManager UI
-skinClusterManagerInstance = ui.SkinClusterManager()
-skinClusterManagerInstance.show()
\ No newline at end of file
+def show():
+    """
+    Show the SkinCluster Manager window, see launcher.show.
+    Returns:
+        ui.SkinClusterManager: The window.
+    """
+    from skinClusterManager import launcher
+    return launcher.show()
@@ -0,0 +1,296 @@
+import atexit
+import base64
+import hashlib
+import json
+import os
+import tempfile
+
+
+"""
+Cached UI assets: the stylesheet and the SVG icons.
+Both JSON files are parsed once per session and every icon is rasterized once. The cache follows the
+file modification times, and a compiled bundle is kept on the local disk so a new session does not
+have to parse anything from a network mounted module path. Icons rasterized during a session are
+written to it once, by flush after the UI is built or at exit, not one rewrite per icon.
+"""
+
+
+STYLESHEET_PATH = os.path.join(os.path.dirname(__file__), "styleSheet.json")
+IMAGES_PATH = os.path.join(os.path.dirname(__file__), "images.json")
+BUNDLE_VERSION = 1
+# Icons are rasterized at this size, QIcon scales them to the button icon size.
+ICON_SIZE = 48
+
+
+class AssetBundle(object):
+    """
+    Compiled stylesheet and icon data, with the stamps of the files they come from.
+    """
+
+    def __init__(self, stamps, stylesheet, svgs, rasters=None):
+        """
+        Initialize the AssetBundle.
+        Args:
+            stamps (dict): Source path to its [modification time in ns, size].
+            stylesheet (str): The compiled stylesheet, None if it could not be loaded.
+            svgs (dict): Icon name to its SVG source.
+            rasters (dict): Icon name to its rasterized PNG bytes.
+        """
+
+        self.stamps = stamps
+        self.stylesheet = stylesheet
+        self.svgs = svgs
+        self.rasters = rasters or {}
+        self.icons = {}
+        # Rasters added since the bundle was last saved.
+        self.unsaved = False
+
+    def to_json(self):
+        return {
+            "version": BUNDLE_VERSION,
+            "stamps": self.stamps,
+            "stylesheet": self.stylesheet,
+            "svgs": self.svgs,
+            "rasters": {name: base64.b64encode(data).decode("ascii") for name, data in self.rasters.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Build an AssetBundle from its JSON form.
+        Args:
+            data (dict): The loaded bundle.
+        Returns:
+            AssetBundle: The bundle, None if it was written by another bundle version.
+        """
+
+        if data.get("version") != BUNDLE_VERSION:
+            return None
+        rasters = {name: base64.b64decode(text) for name, text in data.get("rasters", {}).items()}
+        return cls(data["stamps"], data["stylesheet"], data["svgs"], rasters)
+
+
+_bundle = None
+
+
+def _stamp(path):
+    """
+    Get the modification stamp of a file.
+    Args:
+        path (str): The file path.
+    Returns:
+        list: [modification time in ns, size], None if the file does not exist.
+    """
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def bundle_path(stylesheet_path=STYLESHEET_PATH, images_path=IMAGES_PATH):
+    """
+    Get where the compiled bundle of a pair of asset files is kept, on the local disk.
+    Args:
+        stylesheet_path (str): The stylesheet JSON file.
+        images_path (str): The SVG icons JSON file.
+    Returns:
+        str: The bundle file path.
+    """
+
+    root = os.environ.get("SKIN_CLUSTER_MANAGER_CACHE") or os.environ.get("MAYA_APP_DIR") or tempfile.gettempdir()
+    key = hashlib.blake2b(f"{os.path.abspath(stylesheet_path)}|{os.path.abspath(images_path)}".encode(), digest_size=8).hexdigest()
+    return os.path.join(root, "skinClusterManager", f"assets_{key}.json")
+
+
+def compile_stylesheet(style_dict):
+    """
+    Build a Qt stylesheet from its JSON form.
+    Args:
+        style_dict (dict): Selector to its {property: value} dictionary.
+    Returns:
+        str: The stylesheet.
+    """
+
+    blocks = []
+    for selector, props in style_dict.items():
+        lines = "".join(f"    {prop}: {val};\n" for prop, val in props.items())
+        blocks.append(f"{selector} {{\n{lines}}}\n")
+    return "".join(blocks)
+
+
+def _read_json(path, label):
+    if not os.path.exists(path):
+        print(f"{label} not found: {path}")
+        return None
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except Exception as e:
+        print(f"Failed to load {label.lower()}: {e}")
+        return None
+
+
+def _compile(stylesheet_path, images_path, stamps):
+    """
+    Parse the asset files into a new bundle.
+    Args:
+        stylesheet_path (str): The stylesheet JSON file.
+        images_path (str): The SVG icons JSON file.
+        stamps (dict): The current stamps of both files.
+    Returns:
+        AssetBundle: The compiled bundle.
+    """
+
+    style_dict = _read_json(stylesheet_path, "Stylesheet")
+    svgs = _read_json(images_path, "SVG path")
+    return AssetBundle(stamps, compile_stylesheet(style_dict) if style_dict is not None else None, svgs or {})
+
+
+def _load_persisted(path, stamps):
+    try:
+        with open(path, "r") as file:
+            bundle = AssetBundle.from_json(json.load(file))
+    except (OSError, ValueError, KeyError):
+        return None
+    if bundle is None or bundle.stamps != stamps:
+        return None
+    return bundle
+
+
+def save(bundle, path):
+    """
+    Persist a bundle, replacing the file atomically. Failures are ignored, the bundle is only a cache.
+    Args:
+        bundle (AssetBundle): The bundle to save.
+        path (str): The bundle file path.
+    """
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, "w") as file:
+            json.dump(bundle.to_json(), file)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def load(stylesheet_path=STYLESHEET_PATH, images_path=IMAGES_PATH, persist=True):
+    """
+    Get the asset bundle, compiled only when one of the asset files changed since it was built.
+    Args:
+        stylesheet_path (str): The stylesheet JSON file.
+        images_path (str): The SVG icons JSON file.
+        persist (bool): Reuse and update the compiled bundle on the local disk.
+    Returns:
+        AssetBundle: The current bundle.
+    """
+
+    global _bundle
+    stamps = {stylesheet_path: _stamp(stylesheet_path), images_path: _stamp(images_path)}
+    if _bundle is not None and _bundle.stamps == stamps:
+        return _bundle
+
+    path = bundle_path(stylesheet_path, images_path) if persist else None
+    bundle = _load_persisted(path, stamps) if persist else None
+    if bundle is None:
+        bundle = _compile(stylesheet_path, images_path, stamps)
+        if persist:
+            save(bundle, path)
+    flush()
+    _bundle = bundle
+    return bundle
+
+
+def flush():
+    """
+    Save the in-memory bundle when icons were rasterized into it since it was last saved.
+    """
+
+    if _bundle is not None and _bundle.unsaved:
+        _bundle.unsaved = False
+        save(_bundle, bundle_path(*_bundle.stamps))
+
+
+def _flush_at_exit():
+    # Looked up at exit, so it calls the flush of the last reload of the module.
+    flush()
+
+
+# A reload runs the module again in the same namespace, where the flag survives: one handler per session.
+if not globals().get("_flush_registered"):
+    atexit.register(_flush_at_exit)
+    _flush_registered = True
+
+
+def invalidate():
+    """
+    Drop the in-memory bundle, the next load checks the files again.
+    """
+
+    global _bundle
+    _bundle = None
+
+
+def stylesheet(stylesheet_path=STYLESHEET_PATH, images_path=IMAGES_PATH):
+    """
+    Get the compiled stylesheet.
+    Returns:
+        str: The stylesheet, None if it could not be loaded.
+    """
+
+    return load(stylesheet_path, images_path).stylesheet
+
+
+def _rasterize(svg_data, size):
+    """
+    Render an SVG icon to PNG bytes.
+    Args:
+        svg_data (str): The SVG source.
+        size (int): Width and height of the image.
+    Returns:
+        bytes: The PNG data.
+    """
+
+    from PySide2 import QtCore, QtGui
+
+    pixmap = QtGui.QPixmap()
+    pixmap.loadFromData(QtCore.QByteArray(svg_data.encode()), "SVG")
+    pixmap = pixmap.scaled(size, size, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+    data = QtCore.QByteArray()
+    buffer = QtCore.QBuffer(data)
+    buffer.open(QtCore.QIODevice.WriteOnly)
+    pixmap.save(buffer, "PNG")
+    buffer.close()
+    return bytes(data)
+
+
+def icon(name, stylesheet_path=STYLESHEET_PATH, images_path=IMAGES_PATH, persist=True):
+    """
+    Get an icon, rasterized once and reused by every later call.
+    Args:
+        name (str): The icon name in the SVG icons file.
+        persist (bool): Store newly rasterized icons in the compiled bundle, on the next flush.
+    Returns:
+        QIcon: The icon, empty if the name is unknown.
+    """
+
+    from PySide2 import QtGui
+
+    bundle = load(stylesheet_path, images_path, persist)
+    if name in bundle.icons:
+        return bundle.icons[name]
+    if name not in bundle.svgs:
+        print(f"SVG with name '{name}' not found in the SVG dictionary.")
+        return QtGui.QIcon()
+
+    if name not in bundle.rasters:
+        bundle.rasters[name] = _rasterize(bundle.svgs[name], ICON_SIZE)
+        bundle.unsaved = bundle.unsaved or persist
+    pixmap = QtGui.QPixmap()
+    pixmap.loadFromData(bundle.rasters[name], "PNG")
+    bundle.icons[name] = QtGui.QIcon(pixmap)
+    return bundle.icons[name]
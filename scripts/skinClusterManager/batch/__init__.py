@@ -0,0 +1,6 @@
+"""
+Headless batch processing of scene files with the skinClusterManager logics. A manifest lists the
+files and the operations to run on them, worker processes run every file through a scene backend,
+Maya standalone or the fake scene, and a journal lets an interrupted batch resume. Run it with
+python -m skinClusterManager.batch manifest.json from the scripts folder.
+"""
@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+
+from skinClusterManager.batch import jobs
+from skinClusterManager.batch import scheduler
+
+
+"""
+Command line entry point, e.g. from the scripts folder with mayapy:
+    mayapy -m skinClusterManager.batch assets.json --workers 8 --timeout 1800
+"""
+
+
+def _print_event(entry):
+    details = ""
+    if entry["event"] in ("done", "failed", "timeout"):
+        details = f" in {entry['duration']:.1f}s"
+    if entry["event"] in ("failed", "timeout"):
+        details += f"\n{entry['error'].rstrip()}"
+    print(f"[{entry['job']}] {entry['event']} {entry['path']} attempt {entry.get('attempt', 1)}{details}", flush=True)
+
+
+def main(argv=None):
+    """
+    Run the jobs of a manifest and print their progress.
+    Args:
+        argv (list): Command line arguments, sys.argv when not given.
+    Returns:
+        int: The exit code, 1 when a job failed or timed out.
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m skinClusterManager.batch", description="Run skinClusterManager operations on many scene files.")
+    parser.add_argument("manifest", help="JSON manifest of the files and operations.")
+    parser.add_argument("--workers", type=int, help="Jobs run at once, the manifest value or the CPU count by default.")
+    parser.add_argument("--retries", type=int, help="Attempts made after a failed one, overrides the manifest.")
+    parser.add_argument("--timeout", type=float, help="Seconds a job attempt may run, overrides the manifest.")
+    parser.add_argument("--backend", help="Scene backend: maya, fake or module:Class, overrides the manifest.")
+    parser.add_argument("--journal", help="Journal file, next to the manifest by default.")
+    parser.add_argument("--fresh", action="store_true", help="Start over instead of resuming from the journal.")
+    parser.add_argument("--python", help="Interpreter of the workers, e.g. mayapy, the current one by default.")
+    args = parser.parse_args(argv)
+
+    settings, found = jobs.load_manifest(args.manifest)
+    for job in found:
+        if args.retries is not None:
+            job.retries = args.retries
+        if args.timeout is not None:
+            job.timeout = args.timeout
+    journal = jobs.Journal(args.journal or os.path.splitext(os.path.abspath(args.manifest))[0] + ".journal")
+    if args.fresh:
+        journal.clear()
+
+    batch = scheduler.Scheduler(
+        found,
+        args.backend or settings.get("backend", "maya"),
+        journal,
+        args.workers or settings.get("workers"),
+        args.python or settings.get("python"),
+        _print_event,
+    )
+    summary = batch.run()
+    print(", ".join(f"{count} {status}" for status, count in summary.items()))
+    return 1 if summary["failed"] or summary["timeout"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import abc
+import importlib
+import json
+import time
+
+
+"""
+Scene backends of the batch workers. A backend opens a scene file, hands the logics a DCC adapter
+bound to it and saves the result, so the scheduler does not care whether Maya or a fake scene runs
+the operations. Backends are created inside the worker processes, never in the scheduler.
+"""
+
+
+class Backend(abc.ABC):
+    """
+    Opens and saves the scenes of a worker process. A backend missing open or save cannot be created.
+    """
+
+    @abc.abstractmethod
+    def open(self, path):
+        """
+        Open a scene file.
+        Args:
+            path (str): The scene file.
+        Returns:
+            dcc.MayaAdapter: An adapter bound to the opened scene.
+        """
+
+    @abc.abstractmethod
+    def save(self, path):
+        """
+        Save the opened scene.
+        Args:
+            path (str): The file to save to.
+        """
+
+    def close(self):
+        """
+        Release the backend before the worker process exits.
+        """
+
+
+class MayaBackend(Backend):
+    """
+    Runs the scenes in Maya standalone, the workers must run mayapy.
+    """
+
+    def __init__(self):
+        import maya.standalone
+        maya.standalone.initialize(name="python")
+        import maya.cmds as cmds
+        self.cmds = cmds
+
+    def open(self, path):
+        from skinClusterManager import dcc
+        self.cmds.file(path, open=True, force=True, prompt=False)
+        return dcc.MayaAdapter(cmds=self.cmds)
+
+    def save(self, path):
+        if path != self.cmds.file(query=True, sceneName=True):
+            self.cmds.file(rename=path)
+        self.cmds.file(save=True, force=True, type="mayaBinary" if path.lower().endswith(".mb") else "mayaAscii")
+
+    def close(self):
+        import maya.standalone
+        maya.standalone.uninitialize()
+
+
+class FakeBackend(Backend):
+    """
+    Runs the scenes in a fakes.FakeScene. A scene file is a JSON benchmarks.rigs.RigSpec, it can also
+    hold "delay", seconds slept when it is opened, and "fail", an error raised when it is opened,
+    to exercise the scheduler timeouts and retries.
+    """
+
+    def __init__(self):
+        from skinClusterManager import fakes
+        fakes.install()
+        self.fakes = fakes
+        self.rig = None
+
+    def open(self, path):
+        from skinClusterManager.benchmarks import rigs
+        with open(path) as file:
+            data = json.load(file)
+        time.sleep(data.pop("delay", 0.0))
+        if "fail" in data:
+            raise RuntimeError(data["fail"])
+        self.rig = rigs.build_rig(rigs.RigSpec(**data))
+        self.fakes.FakeGlobal.scene = self.rig.scene
+        return self.rig.adapter
+
+    def save(self, path):
+        scene = self.rig.scene
+        with open(path, "w") as file:
+            json.dump({"skin_clusters": sorted(name for name, node_type in scene.nodes.items() if node_type == "skinCluster"), "messages": scene.messages}, file, indent=1)
+
+
+BACKENDS = {
+    "maya": MayaBackend,
+    "fake": FakeBackend,
+}
+
+
+def load_backend(name):
+    """
+    Create a backend.
+    Args:
+        name (str): A BACKENDS name, or "package.module:Class" for a Backend defined elsewhere.
+    Returns:
+        Backend: The backend.
+    """
+
+    if name in BACKENDS:
+        return BACKENDS[name]()
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown backend {name}, expected one of {sorted(BACKENDS)} or module:Class.")
+    return getattr(importlib.import_module(module_name), class_name)()
@@ -0,0 +1,202 @@
+import glob
+import hashlib
+import json
+import os
+import time
+
+from skinClusterManager.batch import operations
+
+
+"""
+Batch manifests and the journal of their progress.
+
+A manifest is a JSON file crossing scene files with operations:
+    {
+        "backend": "maya",
+        "workers": 4,
+        "retries": 1,
+        "timeout": 900,
+        "output_dir": "batch_output",
+        "save": true,
+        "operations": ["combine", {"name": "export"}],
+        "files": ["assets/*.ma", {"path": "hero.mb", "operations": ["export"], "timeout": 3600}]
+    }
+Files are paths or glob patterns, or objects overriding the manifest operations, timeout, retries
+or save. Relative paths are resolved from the manifest folder. Every file gets its own output
+folder, named after the file, the weight exports and the saved scene are written there.
+
+The journal is an append only file of JSON lines, one per job event. A batch run again with the
+same journal skips the jobs whose last event is done, so an interrupted batch resumes where it was.
+"""
+
+
+class Job(object):
+    """
+    The operations to run on one scene file.
+    """
+
+    __slots__ = ("id", "path", "operations", "output_dir", "save", "timeout", "retries")
+
+    def __init__(self, path, operations, output_dir, save=False, timeout=None, retries=0):
+        """
+        Initialize the Job.
+        Args:
+            path (str): The scene file.
+            operations (list): (operation name, options) pairs, run in order.
+            output_dir (str): The folder the job writes to.
+            save (bool): Save the scene in output_dir once every operation ran.
+            timeout (float): Seconds an attempt may run before it is stopped, None for no limit.
+            retries (int): Attempts made after a failed one.
+        """
+
+        self.path = path
+        self.operations = operations
+        self.output_dir = output_dir
+        self.save = save
+        self.timeout = timeout
+        self.retries = retries
+        key = json.dumps([os.path.normcase(path), operations, output_dir, save], sort_keys=True)
+        self.id = hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.path}, operations={[name for name, _ in self.operations]})"
+
+    @property
+    def saved_path(self):
+        return os.path.join(self.output_dir, os.path.basename(self.path))
+
+
+def _operations(entries):
+    """
+    Read the operations of a manifest.
+    Args:
+        entries (list): Operation names or {"name": name, **options} objects.
+    Returns:
+        list: (operation name, options) pairs.
+    """
+
+    result = []
+    for entry in entries:
+        options = dict(entry) if isinstance(entry, dict) else {"name": entry}
+        name = options.pop("name", None)
+        if name not in operations.OPERATIONS:
+            raise ValueError(f"Unknown operation {name}, expected one of {sorted(operations.OPERATIONS)}.")
+        result.append((name, options))
+    return result
+
+
+def load_manifest(path):
+    """
+    Read a manifest and expand its files into jobs.
+    Args:
+        path (str): The manifest file.
+    Returns:
+        tuple: The manifest settings without its files and operations, and the list of Job.
+    """
+
+    with open(path) as file:
+        manifest = json.load(file)
+    root = os.path.dirname(os.path.abspath(path))
+    output_dir = os.path.join(root, manifest.get("output_dir", "batch_output"))
+    default_operations = _operations(manifest.get("operations", []))
+
+    jobs = []
+    seen = set()
+    names = set()
+    for entry in manifest.get("files", []):
+        entry = dict(entry) if isinstance(entry, dict) else {"path": entry}
+        pattern = os.path.join(root, entry.pop("path"))
+        paths = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        job_operations = _operations(entry["operations"]) if "operations" in entry else default_operations
+        if not job_operations:
+            raise ValueError(f"No operations given for {pattern}.")
+        for scene_path in paths:
+            scene_path = os.path.normpath(scene_path)
+            if scene_path in seen:
+                continue
+            seen.add(scene_path)
+            name = os.path.splitext(os.path.basename(scene_path))[0]
+            if name in names:
+                name = f"{name}_{len(jobs)}"
+            names.add(name)
+            jobs.append(Job(
+                scene_path,
+                job_operations,
+                os.path.join(output_dir, name),
+                entry.get("save", manifest.get("save", False)),
+                entry.get("timeout", manifest.get("timeout")),
+                entry.get("retries", manifest.get("retries", 0)),
+            ))
+
+    settings = {key: value for key, value in manifest.items() if key not in ("files", "operations")}
+    settings["output_dir"] = output_dir
+    return settings, jobs
+
+
+class Journal(object):
+    """
+    Append only record of the job events of a batch.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize the Journal.
+        Args:
+            path (str): The JSON lines file, created on the first event.
+        """
+
+        self.path = path
+
+    def events(self):
+        """
+        Read the recorded events, a line cut short by an interrupted write is ignored.
+        Returns:
+            list: The event dictionaries, oldest first.
+        """
+
+        if not os.path.exists(self.path):
+            return []
+        found = []
+        with open(self.path) as file:
+            for line in file:
+                try:
+                    found.append(json.loads(line))
+                except ValueError:
+                    continue
+        return found
+
+    def completed(self):
+        """
+        Get the jobs whose last event is done.
+        Returns:
+            set: The job ids.
+        """
+
+        last = {}
+        for event in self.events():
+            last[event.get("job")] = event.get("event")
+        return {job_id for job_id, event in last.items() if event == "done"}
+
+    def record(self, job, event, **data):
+        """
+        Append an event, written through to disk so it survives the batch being killed.
+        Args:
+            job (Job): The job.
+            event (str): start, retry, done, failed or timeout.
+            data: JSON serializable details, e.g. the attempt, duration, result or error.
+        Returns:
+            dict: The recorded event.
+        """
+
+        entry = dict(job=job.id, path=job.path, event=event, time=time.time(), **data)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a") as file:
+            file.write(json.dumps(entry, default=str) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        return entry
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,95 @@
+import os
+import re
+
+
+"""
+Operations a batch job can run on an opened scene. Every operation takes the job output directory
+and its manifest options as keywords, runs the logics on the current adapter and returns a JSON
+serializable result for the journal. The logics are imported when an operation runs, after the
+backend has made maya importable.
+"""
+
+
+def _file_name(node):
+    return re.sub(r"[:|]", "_", node.strip("|"))
+
+
+def combine(output_dir, skin_clusters=None, max_influences=None, smooth_iterations=0):
+    """
+    Combine the stacked skinClusters of the scene, every chain into its first skinCluster.
+    Args:
+        output_dir (str): The job output directory.
+        skin_clusters (list): Only the chains holding these skinClusters, every chain when not given.
+        max_influences (int): Cap on the influences per vertex of the merged weights.
+        smooth_iterations (int): Smooth the merge seams with this many iterations, 0 to not smooth.
+    Returns:
+        list: The combined skinClusters.
+    """
+
+    from skinClusterManager import logics
+    groups = [(chain[0], chain[1:]) for chain in logics.skin_chains(skin_clusters)]
+    if not groups:
+        return []
+    return list(logics.combine_skin_clusters(groups, max_influences=max_influences, workers=1, smooth_iterations=smooth_iterations) or [])
+
+
+def rebuild(output_dir, skin_clusters=None):
+    """
+    Rebuild skinClusters on duplicates of their deformed meshes.
+    Args:
+        output_dir (str): The job output directory.
+        skin_clusters (list): The skinClusters to rebuild, every one fed by another skinCluster when not given.
+    Returns:
+        list: The created meshes.
+    """
+
+    from skinClusterManager import logics
+    deformer_graph = logics.get_graph()
+    if skin_clusters is None:
+        skin_clusters = [skin_cluster for skin_cluster in deformer_graph.skin_clusters() if deformer_graph.upstream(skin_cluster)]
+    if not skin_clusters:
+        return []
+    return list(logics.rebuild_skin_clusters(skin_clusters) or [])
+
+
+def export(output_dir, skin_clusters=None):
+    """
+    Export the weights of skinClusters, one weight file each named after its skinCluster.
+    Args:
+        output_dir (str): The directory the files are written to.
+        skin_clusters (list): The skinClusters to export, all of them when not given.
+    Returns:
+        list: The written files.
+    """
+
+    from skinClusterManager import logics
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for skin_cluster in skin_clusters or logics.get_graph().skin_clusters():
+        path = logics.export_weights(skin_cluster, os.path.join(output_dir, f"{_file_name(skin_cluster)}.skw"))
+        if path:
+            written.append(path)
+    return written
+
+
+def smooth(output_dir, skin_clusters=None, **options):
+    """
+    Smooth the influence seams of skinClusters.
+    Args:
+        output_dir (str): The job output directory.
+        skin_clusters (list): The skinClusters to smooth, all of them when not given.
+        options: iterations, strength, seam_rings or max_influences, see logics.smooth_skin_cluster.
+    Returns:
+        dict: The number of vertices written per skinCluster.
+    """
+
+    from skinClusterManager import logics
+    return {skin_cluster: logics.smooth_skin_cluster(skin_cluster, **options) for skin_cluster in skin_clusters or logics.get_graph().skin_clusters()}
+
+
+OPERATIONS = {
+    "combine": combine,
+    "rebuild": rebuild,
+    "export": export,
+    "smooth": smooth,
+}
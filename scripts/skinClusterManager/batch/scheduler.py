@@ -0,0 +1,190 @@
+import collections
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+import traceback
+
+from skinClusterManager import profiling
+from skinClusterManager.batch import backends
+from skinClusterManager.batch import operations
+
+
+"""
+Runs batch jobs in worker processes. Every attempt of a job gets a fresh spawned process, so a
+scene left in a bad state never leaks into the next job, and an attempt running past its timeout
+is terminated instead of blocking a pool slot forever. The scheduler only waits on the result pipes
+of its workers, it never imports maya itself.
+"""
+
+
+def run_job(job, backend_name):
+    """
+    Open a scene, run the operations of a job on it and save it if asked.
+    Args:
+        job (jobs.Job): The job.
+        backend_name (str): The backend, see backends.load_backend.
+    Returns:
+        dict: The result of every operation and the saved file, JSON serializable.
+    """
+
+    backend = backends.load_backend(backend_name)
+    try:
+        adapter = backend.open(job.path)
+        from skinClusterManager import logics
+        logics.set_adapter(adapter)
+        results = collections.OrderedDict()
+        for name, options in job.operations:
+            with profiling.span(f"batch_{name}", path=job.path):
+                results[name] = operations.OPERATIONS[name](job.output_dir, **options)
+        saved = None
+        if job.save:
+            os.makedirs(job.output_dir, exist_ok=True)
+            saved = job.saved_path
+            backend.save(saved)
+        return {"operations": results, "saved": saved}
+    finally:
+        backend.close()
+
+
+def _worker(connection, job, backend_name):
+    """
+    Entry point of a worker process, sends ("done", result) or ("failed", traceback) back.
+    """
+
+    try:
+        message = ("done", run_job(job, backend_name))
+    except BaseException:
+        message = ("failed", traceback.format_exc())
+    try:
+        connection.send(message)
+    except Exception:
+        connection.send(("failed", traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+class _Attempt(object):
+    """
+    A running attempt of a job.
+    """
+
+    __slots__ = ("job", "number", "process", "connection", "started")
+
+    def __init__(self, job, number, process, connection):
+        self.job = job
+        self.number = number
+        self.process = process
+        self.connection = connection
+        self.started = time.monotonic()
+
+    @property
+    def deadline(self):
+        return self.started + self.job.timeout if self.job.timeout else None
+
+
+class Scheduler(object):
+    """
+    Runs jobs on a pool of worker processes with retries, timeouts and a journal.
+    """
+
+    def __init__(self, jobs, backend_name, journal, workers=None, executable=None, on_event=None):
+        """
+        Initialize the Scheduler.
+        Args:
+            jobs (list): The jobs.Job to run.
+            backend_name (str): The backend of the workers, see backends.load_backend.
+            journal (jobs.Journal): The journal events are recorded in and resumed from.
+            workers (int): Number of jobs run at once, defaults to the CPU count.
+            executable (str): The interpreter of the workers, e.g. mayapy, the current one when not given.
+            on_event (callable): Called with every recorded event, e.g. to print the progress.
+        """
+
+        self.jobs = list(jobs)
+        self.backend_name = backend_name
+        self.journal = journal
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.context = multiprocessing.get_context("spawn")
+        if executable:
+            self.context.set_executable(executable)
+        self.on_event = on_event
+
+    def _record(self, job, event, **data):
+        entry = self.journal.record(job, event, **data)
+        if self.on_event is not None:
+            self.on_event(entry)
+
+    def _start(self, job, number):
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=_worker, args=(sender, job, self.backend_name), name=f"batch-{job.id}", daemon=True)
+        process.start()
+        sender.close()
+        self._record(job, "start", attempt=number, pid=process.pid)
+        return _Attempt(job, number, process, receiver)
+
+    def _finish(self, attempt, status, detail, queue, summary):
+        """
+        Record the end of an attempt and queue the job again while it has retries left.
+        """
+
+        attempt.connection.close()
+        attempt.process.join(5)
+        duration = time.monotonic() - attempt.started
+        if status == "done":
+            self._record(attempt.job, "done", attempt=attempt.number, duration=duration, result=detail)
+            summary["done"] += 1
+            return
+        self._record(attempt.job, status, attempt=attempt.number, duration=duration, error=detail)
+        if attempt.number <= attempt.job.retries:
+            self._record(attempt.job, "retry", attempt=attempt.number + 1)
+            queue.append((attempt.job, attempt.number + 1))
+        else:
+            summary[status] += 1
+
+    def run(self, resume=True):
+        """
+        Run every job, waiting for all of them.
+        Args:
+            resume (bool): Skip the jobs the journal already records as done.
+        Returns:
+            dict: The number of jobs done, failed, timed out and skipped.
+        """
+
+        summary = collections.Counter(done=0, failed=0, timeout=0, skipped=0)
+        completed = self.journal.completed() if resume else set()
+        queue = collections.deque()
+        for job in self.jobs:
+            if job.id in completed:
+                summary["skipped"] += 1
+            else:
+                queue.append((job, 1))
+
+        running = []
+        try:
+            while queue or running:
+                while queue and len(running) < self.workers:
+                    running.append(self._start(*queue.popleft()))
+
+                deadlines = [attempt.deadline for attempt in running if attempt.deadline is not None]
+                wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                ready = multiprocessing.connection.wait([attempt.connection for attempt in running], wait_for)
+
+                for attempt in list(running):
+                    if attempt.connection in ready:
+                        try:
+                            status, detail = attempt.connection.recv()
+                        except EOFError:
+                            attempt.process.join(5)
+                            status, detail = "failed", f"The worker exited with code {attempt.process.exitcode} without a result."
+                    elif attempt.deadline is not None and time.monotonic() >= attempt.deadline:
+                        attempt.process.terminate()
+                        status, detail = "timeout", f"Stopped after {attempt.job.timeout} seconds."
+                    else:
+                        continue
+                    running.remove(attempt)
+                    self._finish(attempt, status, detail, queue, summary)
+        finally:
+            for attempt in running:
+                attempt.process.terminate()
+                attempt.connection.close()
+        return dict(summary)
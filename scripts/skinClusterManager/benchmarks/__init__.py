@@ -0,0 +1,4 @@
+"""
+Benchmarks of the skinClusterManager logics, running on synthetic rigs in a fake scene so they need
+neither Maya nor Qt. Run them with python -m skinClusterManager.benchmarks from the scripts folder.
+"""
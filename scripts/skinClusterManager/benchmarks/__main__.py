@@ -0,0 +1,55 @@
+import argparse
+import sys
+
+from skinClusterManager.benchmarks import rigs
+from skinClusterManager.benchmarks import runner
+from skinClusterManager.benchmarks import scenarios
+
+
+"""
+Command line entry point, e.g. from the scripts folder:
+    python -m skinClusterManager.benchmarks --vertices 100000 --depth 3 --fail-on-regression
+"""
+
+
+def main(argv=None):
+    """
+    Run the benchmarks, print the results and append them to the history.
+    Args:
+        argv (list): Command line arguments, sys.argv when not given.
+    Returns:
+        int: The exit code, 1 when a regression was found and --fail-on-regression is set.
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m skinClusterManager.benchmarks", description="Time the skinClusterManager logics on synthetic rigs.")
+    parser.add_argument("--scenario", action="append", choices=sorted(scenarios.SCENARIOS), help="Scenario to run, repeat for several. All of them by default.")
+    parser.add_argument("--vertices", type=int, default=10000, help="Vertices per mesh.")
+    parser.add_argument("--influences", type=int, default=32, help="Influences per skinCluster.")
+    parser.add_argument("--depth", type=int, default=2, help="skinClusters stacked on every mesh.")
+    parser.add_argument("--clusters", type=int, default=1, help="Number of meshes, each with its own chain.")
+    parser.add_argument("--max-influences", type=int, default=4, help="Non-zero weights per vertex.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario.")
+    parser.add_argument("--history", default=runner.HISTORY_PATH, help="JSON history file.")
+    parser.add_argument("--no-save", action="store_true", help="Do not append this run to the history.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative slowdown reported as a regression.")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with code 1 on a regression.")
+    args = parser.parse_args(argv)
+
+    spec = rigs.RigSpec(args.vertices, args.influences, args.depth, args.clusters, args.max_influences)
+    history = runner.load_history(args.history)
+    run = runner.run_benchmarks(spec, args.scenario, args.repeat)
+    comparison = runner.compare(run, history, args.tolerance)
+    print(spec)
+    print(runner.format_table(run, comparison))
+
+    if not args.no_save:
+        runner.save_history(history + [run], args.history)
+    regressed = [row[0] for row in comparison if row[4]]
+    if regressed and args.fail_on_regression:
+        print(f"Regressions: {regressed}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
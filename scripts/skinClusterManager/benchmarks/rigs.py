@@ -0,0 +1,149 @@
+import numpy as np
+
+from skinClusterManager import fakes
+
+
+"""
+Synthetic rigs built on a fakes.FakeScene.
+Every rig is a set of grid meshes, each one deformed by a chain of stacked skinClusters whose
+weights fall off smoothly from a row of joints, so the sparsity and overlap look like a real rig.
+"""
+
+
+class RigSpec(object):
+    """
+    Size parameters of a synthetic rig.
+    """
+
+    __slots__ = ("vertex_count", "influence_count", "chain_depth", "cluster_count", "max_influences", "seed")
+
+    def __init__(self, vertex_count=10000, influence_count=32, chain_depth=2, cluster_count=1, max_influences=4, seed=0):
+        """
+        Initialize the RigSpec.
+        Args:
+            vertex_count (int): Vertices per mesh, rounded to a square grid.
+            influence_count (int): Influences per skinCluster.
+            chain_depth (int): skinClusters stacked on every mesh.
+            cluster_count (int): Number of meshes, each with its own chain.
+            max_influences (int): Non-zero weights per vertex.
+            seed (int): Random seed of the weights.
+        """
+
+        self.vertex_count = vertex_count
+        self.influence_count = influence_count
+        self.chain_depth = chain_depth
+        self.cluster_count = cluster_count
+        self.max_influences = max_influences
+        self.seed = seed
+
+    def to_json(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return "RigSpec({})".format(", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__))
+
+
+class Rig(object):
+    """
+    A synthetic rig and the names of what it holds.
+    """
+
+    def __init__(self, adapter, spec):
+        """
+        Initialize the Rig.
+        Args:
+            adapter (fakes.FakeAdapter): The adapter of the scene holding the rig.
+            spec (RigSpec): The parameters it was built with.
+        """
+
+        self.adapter = adapter
+        self.spec = spec
+        self.meshes = []
+        self.chains = []
+
+    @property
+    def scene(self):
+        return self.adapter.scene
+
+    @property
+    def skin_clusters(self):
+        return [name for chain in self.chains for name in chain]
+
+
+def grid_mesh(vertex_count):
+    """
+    Build a triangulated square grid.
+    Args:
+        vertex_count (int): Approximate vertex count, rounded to a square.
+    Returns:
+        tuple: Points of shape (vertices, 3) and triangles of shape (triangles, 3).
+    """
+
+    side = max(int(round(np.sqrt(vertex_count))), 2)
+    x, z = np.meshgrid(np.linspace(0.0, 1.0, side), np.linspace(0.0, 1.0, side))
+    points = np.stack([x.ravel(), np.zeros(side * side), z.ravel()], axis=1)
+    corners = (np.arange(side - 1)[:, None] * side + np.arange(side - 1)[None, :]).ravel()
+    triangles = np.concatenate([
+        np.stack([corners, corners + side, corners + 1], axis=1),
+        np.stack([corners + 1, corners + side, corners + side + 1], axis=1),
+    ])
+    return points, triangles
+
+
+def falloff_weights(points, joint_positions, max_influences):
+    """
+    Weight points to their closest joints with an inverse distance falloff.
+    Args:
+        points (np.ndarray): Positions of shape (vertices, 3).
+        joint_positions (np.ndarray): Positions of shape (influences, 3).
+        max_influences (int): Non-zero weights per vertex.
+    Returns:
+        np.ndarray: Normalized dense weights of shape (vertices, influences).
+    """
+
+    distances = np.linalg.norm(points[:, None, :] - joint_positions[None, :, :], axis=2)
+    k = min(max_influences, len(joint_positions))
+    closest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    rows = np.arange(len(points))[:, None]
+    dense = np.zeros(distances.shape)
+    dense[rows, closest] = 1.0 / (distances[rows, closest] + 1e-3) ** 2
+    return dense / dense.sum(axis=1, keepdims=True)
+
+
+def build_rig(spec, adapter=None):
+    """
+    Build a synthetic rig in a fake scene.
+    Every layer of a chain shares half of its influences with the layer below it, so merges have
+    both passthrough and new influences to deal with.
+    Args:
+        spec (RigSpec): The rig parameters.
+        adapter (fakes.FakeAdapter): The adapter of the scene to build in, a new scene when not given.
+    Returns:
+        Rig: The built rig.
+    """
+
+    adapter = adapter or fakes.FakeAdapter(fakes.FakeScene())
+    scene = adapter.scene
+    random = np.random.default_rng(spec.seed)
+    points, triangles = grid_mesh(spec.vertex_count)
+    rig = Rig(adapter, spec)
+
+    for mesh_index in range(spec.cluster_count):
+        name = f"mesh{mesh_index}"
+        shape = scene.add_mesh(f"{name}Shape", points, triangles, parent=name)
+        previous = scene.add_mesh(f"{name}ShapeOrig", points, triangles)
+        chain = []
+        for layer in range(spec.chain_depth):
+            first = layer * spec.influence_count // 2
+            influences = [f"{name}_joint{index}" for index in range(first, first + spec.influence_count)]
+            joint_positions = np.stack([
+                np.linspace(0.0, 1.0, spec.influence_count),
+                random.uniform(-0.1, 0.1, spec.influence_count),
+                random.uniform(0.0, 1.0, spec.influence_count),
+            ], axis=1)
+            dense = falloff_weights(points, joint_positions, spec.max_influences)
+            previous = scene.add_skin_cluster(f"{name}_skinCluster{layer}", previous, shape, influences, dense)
+            chain.append(previous)
+        rig.meshes.append(shape)
+        rig.chains.append(chain)
+    return rig
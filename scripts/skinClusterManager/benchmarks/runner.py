@@ -0,0 +1,164 @@
+import json
+import os
+import platform
+import statistics
+import time
+
+import numpy as np
+
+from skinClusterManager.benchmarks import scenarios
+
+
+"""
+Times the scenarios and keeps a JSON history of the runs, so a slower run shows up as a regression.
+"""
+
+
+HISTORY_PATH = "skin_cluster_benchmarks.json"
+# Runs compared against, per scenario and rig size.
+BASELINE_RUNS = 5
+
+
+def time_scenario(scenario, spec, repeat=3):
+    """
+    Time a scenario, building a fresh rig for every repeat.
+    Args:
+        scenario (scenarios.Scenario): The scenario to time.
+        spec (rigs.RigSpec): The rig parameters.
+        repeat (int): Number of timed runs.
+    Returns:
+        dict: The scenario name, rig spec, run times in seconds and scene counters of the last run.
+    """
+
+    times = []
+    for _ in range(repeat):
+        state = scenario.setup(spec)
+        scene = state.scene
+        commands, write_calls, written = scene.command_count, scene.write_calls, scene.written_vertices
+        try:
+            start = time.perf_counter()
+            scenario.run(state)
+            times.append(time.perf_counter() - start)
+        finally:
+            if scenario.teardown is not None:
+                scenario.teardown(state)
+    return {
+        "scenario": scenario.name,
+        "spec": spec.to_json(),
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "commands": scene.command_count - commands,
+        "write_calls": scene.write_calls - write_calls,
+        "written_vertices": scene.written_vertices - written,
+    }
+
+
+def run_benchmarks(spec, names=None, repeat=3):
+    """
+    Time several scenarios on the same rig size. Scenarios missing a dependency, or needing a
+    deeper chain than the rig has, are skipped.
+    Args:
+        spec (rigs.RigSpec): The rig parameters.
+        names (list): The scenario names, every scenario when not given.
+        repeat (int): Number of timed runs per scenario.
+    Returns:
+        dict: The run, with its timestamp, environment and the result of every scenario.
+    """
+
+    results = []
+    for name in names or list(scenarios.SCENARIOS):
+        scenario = scenarios.SCENARIOS[name]
+        if not scenario.available or spec.chain_depth < scenario.min_depth:
+            results.append({"scenario": name, "spec": spec.to_json(), "skipped": True})
+            continue
+        results.append(time_scenario(scenario, spec, repeat))
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def load_history(path=HISTORY_PATH):
+    """
+    Load the run history.
+    Args:
+        path (str): The history file.
+    Returns:
+        list: The runs, oldest first, empty if the file does not exist.
+    """
+
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def save_history(history, path=HISTORY_PATH):
+    """
+    Save the run history, replacing the file atomically.
+    Args:
+        history (list): The runs, oldest first.
+        path (str): The history file.
+    """
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(history, file, indent=1)
+    os.replace(temp_path, path)
+
+
+def compare(run, history, tolerance=0.25, baseline_runs=BASELINE_RUNS):
+    """
+    Compare a run with the best median of the previous runs of the same scenarios and rig sizes.
+    Args:
+        run (dict): The new run, from run_benchmarks.
+        history (list): The previous runs, oldest first.
+        tolerance (float): Relative slowdown allowed before a result counts as a regression.
+        baseline_runs (int): Number of previous runs looked at.
+    Returns:
+        list: (scenario name, median, baseline median or None, ratio or None, regressed) per timed result.
+    """
+
+    rows = []
+    for result in run["results"]:
+        if result.get("skipped"):
+            continue
+        previous = [
+            old["median"]
+            for old_run in history
+            for old in old_run["results"]
+            if old["scenario"] == result["scenario"] and old["spec"] == result["spec"] and not old.get("skipped")
+        ][-baseline_runs:]
+        baseline = min(previous) if previous else None
+        ratio = result["median"] / baseline if baseline else None
+        rows.append((result["scenario"], result["median"], baseline, ratio, ratio is not None and ratio > 1.0 + tolerance))
+    return rows
+
+
+def format_table(run, comparison):
+    """
+    Format a run as a text table.
+    Args:
+        run (dict): The run, from run_benchmarks.
+        comparison (list): Its comparison, from compare.
+    Returns:
+        str: The table.
+    """
+
+    compared = {row[0]: row for row in comparison}
+    lines = [f"{'scenario':<16}{'median ms':>12}{'min ms':>12}{'baseline ms':>14}{'ratio':>8}{'cmds':>8}{'written':>10}"]
+    for result in run["results"]:
+        if result.get("skipped"):
+            lines.append(f"{result['scenario']:<16}{'skipped':>12}")
+            continue
+        _, _, baseline, ratio, regressed = compared[result["scenario"]]
+        lines.append(
+            f"{result['scenario']:<16}{result['median'] * 1000.0:>12.2f}{result['min'] * 1000.0:>12.2f}"
+            f"{'-' if baseline is None else format(baseline * 1000.0, '.2f'):>14}{'-' if ratio is None else format(ratio, '.2f'):>8}"
+            f"{result['commands']:>8}{result['written_vertices']:>10}{'  REGRESSION' if regressed else ''}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,163 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+
+from skinClusterManager import dcc
+from skinClusterManager import fakes
+
+if importlib.util.find_spec("maya") is None:
+    fakes.install()
+
+from skinClusterManager import logics
+from skinClusterManager.benchmarks import rigs
+
+try:
+    from skinClusterManager import models
+except ImportError:
+    models = None
+
+
+"""
+Benchmark scenarios.
+Every scenario builds its own synthetic rig in setup, only run is timed, so each repeat starts from
+the same untouched scene.
+"""
+
+
+class Scenario(object):
+    """
+    A timed operation on a synthetic rig.
+    """
+
+    def __init__(self, name, setup, run, teardown=None, available=True, min_depth=1):
+        """
+        Initialize the Scenario.
+        Args:
+            name (str): The scenario name.
+            setup (callable): Takes a rigs.RigSpec and returns the state passed to run.
+            run (callable): The timed operation, takes the state.
+            teardown (callable): Cleans the state up after the timing, optional.
+            available (bool): False when a dependency of the scenario is missing.
+            min_depth (int): Smallest chain depth the scenario makes sense for.
+        """
+
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.teardown = teardown
+        self.available = available
+        self.min_depth = min_depth
+
+
+def activate(rig):
+    """
+    Point the logics at the scene of a rig.
+    Args:
+        rig (rigs.Rig): The rig to operate on.
+    """
+
+    fakes.FakeGlobal.scene = rig.scene
+    logics.set_adapter(rig.adapter)
+
+
+def _setup_rig(spec):
+    rig = rigs.build_rig(spec)
+    activate(rig)
+    return rig
+
+
+def _run_scan(rig):
+    for _ in logics.scan_skin_clusters():
+        pass
+
+
+def _run_merge(rig):
+    logics.combine_skin_clusters([(chain[0], chain[1:]) for chain in rig.chains], workers=1)
+
+
+def _run_rebuild(rig):
+    logics.rebuild_skin_clusters([chain[-1] for chain in rig.chains], mesh="new")
+
+
+def _setup_transfer(spec):
+    rig = _setup_rig(spec)
+    # A denser target grid, so no target vertex sits exactly on a source vertex.
+    points, triangles = rigs.grid_mesh(int(spec.vertex_count * 1.3))
+    rig.targets = [rig.scene.add_mesh(f"transfer{index}Shape", points, triangles, parent=f"transfer{index}") for index in range(len(rig.chains))]
+    return rig
+
+
+def _run_transfer(rig):
+    for chain, target in zip(rig.chains, rig.targets):
+        logics.transfer_skin_cluster(chain[0], [target], rig.spec.max_influences)
+
+
+def _setup_export_import(spec):
+    rig = _setup_rig(spec)
+    rig.directory = tempfile.mkdtemp(prefix="skinClusterManager_bench_")
+    return rig
+
+
+def _run_export_import(rig):
+    for chain in rig.chains:
+        path = os.path.join(rig.directory, f"{chain[0]}.skw")
+        logics.export_weights(chain[0], path)
+        logics.import_weights(chain[0], path)
+
+
+def _teardown_export_import(rig):
+    shutil.rmtree(rig.directory, ignore_errors=True)
+
+
+def _setup_weight_io(spec):
+    # Go through the MayaAdapter OpenMaya code, on the fakes.api_modules stand-ins.
+    rig = rigs.build_rig(spec, fakes.FakeApiAdapter(fakes.FakeScene()))
+    activate(rig)
+    return rig
+
+
+def _weight_io(rig, chunk_size):
+    for skin_cluster in rig.skin_clusters:
+        rig.adapter.forget_weights(skin_cluster)
+        sparse_weights = rig.adapter.read_weights(skin_cluster, chunk_size=chunk_size)
+        rig.adapter.forget_weights(skin_cluster)
+        rig.adapter.write_weights(skin_cluster, sparse_weights, chunk_size=chunk_size)
+
+
+def _run_weight_io(rig):
+    _weight_io(rig, None)
+
+
+def _run_weight_io_chunked(rig):
+    # The chunked transfers the bulk one replaced, for comparison.
+    _weight_io(rig, dcc.CHUNK_SIZE // 64)
+
+
+def _setup_populate(spec):
+    rig = _setup_rig(spec)
+    rig.rows = [row for _, _, chunk in logics.scan_skin_clusters() for row in chunk]
+    return rig
+
+
+def _run_populate(rig):
+    source = models.SkinClusterListModel()
+    target = models.SkinClusterListModel()
+    source.append(models.SkinClusterEntry(*row) for row in rig.rows)
+    target.append(source.take_rows(range(0, len(rig.rows), 2)))
+    source.append(target.take_rows(range(target.rowCount())))
+    source.move_rows(range(0, source.rowCount(), 3), 0)
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in [
+        Scenario("scan", _setup_rig, _run_scan),
+        Scenario("merge", _setup_rig, _run_merge, min_depth=2),
+        Scenario("rebuild", _setup_rig, _run_rebuild, min_depth=2),
+        Scenario("transfer", _setup_transfer, _run_transfer),
+        Scenario("export_import", _setup_export_import, _run_export_import, _teardown_export_import),
+        Scenario("weight_io", _setup_weight_io, _run_weight_io),
+        Scenario("weight_io_chunked", _setup_weight_io, _run_weight_io_chunked),
+        Scenario("populate", _setup_populate, _run_populate, available=models is not None),
+    ]
+}
@@ -0,0 +1,225 @@
+import collections
+import functools
+import hashlib
+
+import numpy as np
+
+from skinClusterManager import profiling
+from skinClusterManager import smoothing
+from skinClusterManager import transfer
+from skinClusterManager import weight_file
+
+
+"""
+Session cache of the data derived from meshes and skinClusters.
+A mesh is fingerprinted once from its bulk face and point arrays, the adjacency and spatial index
+built from it are then stored under that fingerprint, so every operation on the same mesh, or on
+an identical duplicate, reuses them. Node callbacks mark meshes and skinClusters dirty, which only
+drops what was read from them, the derived data ages out of a least recently used byte budget.
+"""
+
+
+# Bytes of derived data kept by default.
+BUDGET = 512 * 1024 * 1024
+
+
+def _nbytes(value):
+    """
+    Estimate the memory held by a cached value from the arrays it references.
+    Args:
+        value (object): The cached value.
+    Returns:
+        int: The estimated bytes.
+    """
+
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item) for item in value) + 8 * len(value)
+    if isinstance(value, str):
+        return len(value)
+    names = list(getattr(value, "__dict__", {})) + list(getattr(type(value), "__slots__", ()))
+    return sum(_nbytes(getattr(value, name, None)) for name in names) or 64
+
+
+class DerivedCache(object):
+    """
+    Byte budgeted, least recently used cache of mesh adjacencies, spatial indices, influence lists
+    and skinCluster weights.
+    """
+
+    def __init__(self, adapter, budget=BUDGET):
+        """
+        Initialize the DerivedCache.
+        Args:
+            adapter (dcc.MayaAdapter): The adapter used to read the scene.
+            budget (int): Bytes of derived data kept.
+        """
+
+        self.adapter = adapter
+        self.budget = budget
+        self.entries = collections.OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.fingerprints = {}
+        self.versions = collections.Counter()
+        self.read_versions = {}
+        self._callback_ids = {}
+
+    def _watch(self, node):
+        if node not in self._callback_ids:
+            self._callback_ids[node] = self.adapter.add_node_callbacks(node, functools.partial(self.invalidate, node))
+
+    def invalidate(self, node, *args):
+        """
+        Mark a node dirty, what was read from it is read again on the next lookup. Accepts any
+        callback arguments. Weight writes made through the adapter do not count as changes.
+        Args:
+            node (str): The changed node.
+        """
+
+        if node in self.adapter.writing:
+            return
+        self.versions[node] += 1
+        self.fingerprints.pop(node, None)
+        self.read_versions.pop(node, None)
+        for key in [key for key in self.entries if key[1] == node]:
+            self._discard(key)
+
+    def unwatch(self):
+        """
+        Remove the node callbacks registered by the cache.
+        """
+
+        for callback_ids in self._callback_ids.values():
+            self.adapter.remove_callbacks(callback_ids)
+        self._callback_ids = {}
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+        self.fingerprints.clear()
+        self.read_versions.clear()
+
+    def _discard(self, key):
+        _, size = self.entries.pop(key)
+        self.nbytes -= size
+
+    def _get(self, key, build):
+        """
+        Get a cached value, building and storing it when missing.
+        Args:
+            key (tuple): The (kind, owner, ...) key.
+            build (callable): Builds the value.
+        Returns:
+            object: The value.
+        """
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            profiling.count("cache_hits")
+            return entry[0]
+        self.misses += 1
+        profiling.count("cache_misses")
+        value = build()
+        size = _nbytes(value)
+        self.entries[key] = (value, size)
+        self.nbytes += size
+        for old_key in list(self.entries):
+            if self.nbytes <= self.budget or old_key == key:
+                break
+            self._discard(old_key)
+        return value
+
+    def fingerprint(self, shape):
+        """
+        Get the topology and point hashes of a mesh, computed once until the mesh is dirtied.
+        Args:
+            shape (str): The mesh shape name.
+        Returns:
+            tuple: The topology hash and the point hash.
+        """
+
+        fingerprint = self.fingerprints.get(shape)
+        if fingerprint is None:
+            with profiling.span("fingerprint", shape=shape):
+                self._watch(shape)
+                points = np.ascontiguousarray(self.adapter.mesh_points(shape), dtype="<f8")
+                fingerprint = (weight_file.topology_hash(*self.adapter.mesh_topology(shape)), hashlib.blake2b(points.tobytes(), digest_size=16).hexdigest())
+            self.fingerprints[shape] = fingerprint
+        return fingerprint
+
+    def adjacency(self, shapes):
+        """
+        Get the vertex adjacency of meshes, shared by every mesh with the same topology.
+        Args:
+            shapes (list): The mesh shape names, or a single name. The adjacencies of several meshes
+                are joined in that order, see smoothing.Adjacency.stack.
+        Returns:
+            smoothing.Adjacency: The adjacency.
+        """
+
+        shapes = [shapes] if isinstance(shapes, str) else list(shapes)
+        adjacencies = []
+        for shape in shapes:
+            topology, _ = self.fingerprint(shape)
+            adjacencies.append(self._get(("adjacency", topology), lambda: smoothing.Adjacency.from_faces(*self.adapter.mesh_topology(shape))))
+        return smoothing.Adjacency.stack(adjacencies)
+
+    def mesh_index(self, shapes):
+        """
+        Get the triangle spatial index of meshes, shared by every set of meshes with the same
+        topologies and points.
+        Args:
+            shapes (list): The mesh shape names, or a single name. Several meshes are indexed as one,
+                their vertices following each other in that order.
+        Returns:
+            transfer.MeshIndex: The index.
+        """
+
+        shapes = [shapes] if isinstance(shapes, str) else list(shapes)
+        fingerprints = tuple(self.fingerprint(shape) for shape in shapes)
+
+        def build():
+            points = [self.adapter.mesh_points(shape) for shape in shapes]
+            offsets = np.cumsum([0] + [len(block) for block in points[:-1]])
+            triangles = [self.adapter.mesh_triangles(shape) + offset for shape, offset in zip(shapes, offsets)]
+            return transfer.MeshIndex(np.concatenate(points), np.concatenate(triangles))
+        return self._get(("mesh_index",) + fingerprints, build)
+
+    def influences(self, skin_cluster):
+        """
+        Get the influence list of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            list: The influence names, do not modify it.
+        """
+
+        self._watch(skin_cluster)
+        return self._get(("influences", skin_cluster), lambda: self.adapter.influences(skin_cluster))
+
+    def weights(self, skin_cluster):
+        """
+        Get the weights of a skinCluster. The weights the adapter last read or wrote are reused while
+        the skinCluster was not changed by anything else since.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            weights.SparseWeights: The weights, do not modify them.
+        """
+
+        self._watch(skin_cluster)
+        known = self.adapter.weight_cache.get(skin_cluster)
+        if known is not None and self.read_versions.get(skin_cluster) == self.versions[skin_cluster]:
+            self.hits += 1
+            profiling.count("cache_hits")
+            return known
+        self.misses += 1
+        profiling.count("cache_misses")
+        result = self.adapter.read_weights(skin_cluster)
+        self.read_versions[skin_cluster] = self.versions[skin_cluster]
+        return result
@@ -0,0 +1,720 @@
+import contextlib
+import itertools
+import os
+
+import numpy as np
+
+from skinClusterManager import profiling
+from skinClusterManager import weights
+
+
+"""
+Thin adapter between the skinCluster logics and the DCC.
+The logics only talk to Maya through these methods, so a fake adapter can stand in for it.
+Weights and points cross the API in few calls: one getWeights/setWeights call per geometry with a
+complete component, or per chunk of vertices when a chunk size is given. The OpenMaya arrays expose
+no buffer, so every transfer copies its values element by element, both ways, without an
+intermediate Python list.
+"""
+
+
+# Command of the undo_plugin Maya plug-in, it puts the API edits of the adapter in the undo queue.
+UNDO_COMMAND = "skinClusterManagerEdit"
+UNDO_PLUGIN = os.path.join(os.path.dirname(__file__), "undo_plugin.py")
+# (do, undo) edits waiting for the undoable command to run them, see MayaAdapter.run_undoable.
+_pending_edits = []
+
+
+def take_pending_edit():
+    """
+    Hand the next edit to the undoable command of undo_plugin.
+    Returns:
+        tuple: The do and undo callables.
+    """
+
+    return _pending_edits.pop()
+
+
+# Vertices per getWeights/setWeights call suggested when chunking, bounds the dense temporary to
+# chunk x influences for meshes too big to hold densely.
+CHUNK_SIZE = 65536
+
+
+def to_numpy(array, dtype=np.float64, width=1):
+    """
+    Copy an OpenMaya array into a new NumPy array. The OpenMaya arrays expose no buffer, so their
+    elements are iterated one by one, but straight into the result without building a list.
+    Args:
+        array (MDoubleArray): An OpenMaya array, e.g. MDoubleArray, MIntArray or MPointArray.
+        dtype (np.dtype): Value type of the result.
+        width (int): Values per element, e.g. 4 for the MPoint of an MPointArray.
+    Returns:
+        np.ndarray: The values, of shape (elements, width) when width is above one.
+    """
+
+    count = len(array)
+    values = itertools.chain.from_iterable(array) if width > 1 else array
+    result = np.fromiter(values, dtype=dtype, count=count * width)
+    return result.reshape(count, width) if width > 1 else result
+
+
+def to_maya(array_type, values, dtype=np.float64):
+    """
+    Build an OpenMaya array from a NumPy array. The constructor iterates the memoryview, copying
+    the values one by one.
+    Args:
+        array_type (type): The OpenMaya array type, e.g. om.MDoubleArray or om.MIntArray.
+        values (np.ndarray): The values, flattened.
+        dtype (np.dtype): Value type the array type expects, float64 or int32.
+    Returns:
+        MDoubleArray: The OpenMaya array.
+    """
+
+    return array_type(memoryview(np.ascontiguousarray(values, dtype=dtype).ravel()))
+
+
+class MayaAdapter(object):
+    """
+    Adapter that exposes the handful of Maya operations the logics need.
+    """
+
+    def __init__(self, cmds=None, om=None, oma=None):
+        """
+        Initialize the MayaAdapter.
+        Args:
+            cmds (module): The maya.cmds module, imported when not given.
+            om (module): The maya.api.OpenMaya module, imported when not given.
+            oma (module): The maya.api.OpenMayaAnim module, imported when not given.
+        """
+
+        if cmds is None:
+            import maya.cmds as cmds
+        if om is None:
+            import maya.api.OpenMaya as om
+        if oma is None:
+            import maya.api.OpenMayaAnim as oma
+        self.cmds = cmds
+        self.om = om
+        self.oma = oma
+        self.weight_cache = {}
+        self.graph_edits = []
+        # skinClusters being written by write_weights, so node callbacks can tell our own edits apart.
+        self.writing = set()
+
+    def exists(self, node):
+        """
+        Check if a node exists.
+        Args:
+            node (str): The node name.
+        Returns:
+            bool: True if the node exists.
+        """
+
+        return bool(self.cmds.objExists(node))
+
+    def node_type(self, node):
+        """
+        Get the type of a node.
+        Args:
+            node (str): The node name.
+        Returns:
+            str: The node type.
+        """
+
+        return self.cmds.objectType(node)
+
+    def list_nodes(self, node_type):
+        """
+        List every node of a type.
+        Args:
+            node_type (str): The node type.
+        Returns:
+            list: The node names.
+        """
+
+        return self.cmds.ls(type=node_type) or []
+
+    def selection(self):
+        """
+        Get the selected nodes.
+        Returns:
+            list: The node names.
+        """
+
+        return self.cmds.ls(sl=True) or []
+
+    def shapes_under(self, nodes):
+        """
+        Get the shapes among nodes and below them, in one query.
+        Args:
+            nodes (list): The node names.
+        Returns:
+            list: The shape names, without duplicates.
+        """
+
+        if not nodes:
+            return []
+        shapes = [node for node in nodes if self.node_type(node) == "mesh"]
+        shapes.extend(self.cmds.listRelatives(nodes, ad=True, shapes=True) or [])
+        return list(dict.fromkeys(shapes))
+
+    def list_connections(self, node, source=True, destination=True, plugs=False):
+        """
+        List the connections of a node as a flat list of [own plug, other node, ...] pairs.
+        Args:
+            node (str or list): The node name, or several nodes queried in one call.
+            source (bool): Include incoming connections.
+            destination (bool): Include outgoing connections.
+            plugs (bool): Return the other plug instead of the other node.
+        Returns:
+            list: The flat connection list, empty if there are none.
+        """
+
+        return self.cmds.listConnections(node, connections=True, source=source, destination=destination, shapes=True, plugs=plugs) or []
+
+    def connect(self, source_plug, destination_plug):
+        """
+        Force connect two plugs.
+        Args:
+            source_plug (str): The source plug.
+            destination_plug (str): The destination plug.
+        """
+
+        self.cmds.connectAttr(source_plug, destination_plug, force=True)
+
+    def _plug(self, plug):
+        selection = self.om.MSelectionList()
+        selection.add(plug)
+        return selection.getPlug(0)
+
+    def _node(self, node):
+        selection = self.om.MSelectionList()
+        selection.add(node)
+        return selection.getDependNode(0)
+
+    def run_undoable(self, do, undo):
+        """
+        Run an API edit through the undoable command of undo_plugin, loaded on first use, so Maya
+        undoes and redoes it like any command, inside the open undo chunk if there is one.
+        Args:
+            do (callable): Applies the edit, called again on redo.
+            undo (callable): Reverts it.
+        """
+
+        if not self.cmds.pluginInfo(UNDO_PLUGIN, query=True, loaded=True):
+            self.cmds.loadPlugin(UNDO_PLUGIN, quiet=True)
+        _pending_edits.append((do, undo))
+        try:
+            getattr(self.cmds, UNDO_COMMAND)()
+        finally:
+            # The command did not run if it failed to load.
+            if _pending_edits and _pending_edits[-1][0] is do:
+                _pending_edits.pop()
+
+    def apply_graph_edits(self, connections, deletions=()):
+        """
+        Force connect plugs and delete nodes in one MDGModifier, so the graph is edited and
+        re-evaluated once for the whole batch. The modifier runs as one undoable step, see
+        run_undoable, and is kept for undo_graph_edits.
+        Args:
+            connections (list): (source plug, destination plug) pairs, existing inputs are replaced.
+            deletions (list): Nodes deleted after the connections.
+        """
+
+        modifier = self.om.MDGModifier()
+        for source_plug, destination_plug in connections:
+            destination = self._plug(destination_plug)
+            if destination.isDestination:
+                modifier.disconnect(destination.source(), destination)
+            modifier.connect(self._plug(source_plug), destination)
+        for node in deletions:
+            modifier.deleteNode(self._node(node))
+        self.run_undoable(modifier.doIt, modifier.undoIt)
+        self.graph_edits.append(modifier)
+        for node in deletions:
+            self.weight_cache.pop(node, None)
+
+    def undo_graph_edits(self):
+        """
+        Revert the last batch applied by apply_graph_edits, outside of the Maya undo queue. Prefer
+        Maya's undo, which also reverts the weight writes made along with it.
+        Returns:
+            bool: False if there was nothing to revert.
+        """
+
+        if not self.graph_edits:
+            return False
+        self.graph_edits.pop().undoIt()
+        self.weight_cache.clear()
+        return True
+
+    @contextlib.contextmanager
+    def undo_chunk(self, name):
+        """
+        Group the undoable commands run inside the block into one undo step.
+        Args:
+            name (str): The undo chunk name.
+        """
+
+        self.cmds.undoInfo(openChunk=True, chunkName=name)
+        try:
+            yield
+        finally:
+            self.cmds.undoInfo(closeChunk=True)
+
+    def duplicate(self, node, name):
+        """
+        Duplicate a node.
+        Args:
+            node (str): The node to duplicate.
+            name (str): The name of the duplicate.
+        Returns:
+            str: The duplicate name.
+        """
+
+        return self.cmds.duplicate(node, name=name)[0]
+
+    def add_graph_callbacks(self, callback):
+        """
+        Call a function whenever the deformer graph may have changed: skinClusters created or
+        deleted, nodes renamed, connections made or broken, scenes opened or cleared.
+        Args:
+            callback (callable): Called with the raw callback arguments.
+        Returns:
+            list: The callback ids.
+        """
+
+        scene_message = self.om.MSceneMessage
+        return [
+            self.om.MDGMessage.addNodeAddedCallback(callback, "skinCluster"),
+            self.om.MDGMessage.addNodeRemovedCallback(callback, "skinCluster"),
+            # A null node watches the renames of every node.
+            self.om.MNodeMessage.addNameChangedCallback(self.om.MObject.kNullObj, callback),
+            self.om.MDGMessage.addConnectionCallback(callback),
+            scene_message.addCallback(scene_message.kAfterOpen, callback),
+            scene_message.addCallback(scene_message.kAfterNew, callback),
+        ]
+
+    def add_node_callbacks(self, node, callback):
+        """
+        Call a function whenever a node may have changed: attributes set, connected or disconnected,
+        meshes dirtied, or the node removed.
+        Args:
+            node (str): The node name.
+            callback (callable): Called with the raw callback arguments.
+        Returns:
+            list: The callback ids.
+        """
+
+        node_object = self._node(node)
+        node_message = self.om.MNodeMessage
+        callback_ids = [
+            node_message.addAttributeChangedCallback(node_object, callback),
+            node_message.addNodePreRemovalCallback(node_object, callback),
+        ]
+        if node_object.hasFn(self.om.MFn.kMesh):
+            callback_ids.append(node_message.addNodeDirtyCallback(node_object, callback))
+        return callback_ids
+
+    def remove_callbacks(self, callback_ids):
+        """
+        Remove callbacks registered through the adapter.
+        Args:
+            callback_ids (list): The callback ids.
+        """
+
+        self.om.MMessage.removeCallbacks(callback_ids)
+
+    def delete(self, nodes):
+        """
+        Delete nodes from the scene.
+        Args:
+            nodes (list): The nodes to delete.
+        """
+
+        self.cmds.delete(nodes)
+        for node in nodes:
+            self.weight_cache.pop(node, None)
+
+    def influences(self, skin_cluster):
+        """
+        Get the influence list of a skinCluster, in weight column order.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            list: The influence names.
+        """
+
+        return self.cmds.skinCluster(skin_cluster, query=True, influence=True) or []
+
+    def add_influences(self, skin_cluster, influences, bind_pre_matrices=None):
+        """
+        Add influences to a skinCluster with zero weight.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            influences (list): The influence names to add.
+            bind_pre_matrices (dict): Influence name to the bind pre matrix it gets, e.g. the one of
+                the skinCluster its weights come from. The others are bound at their current pose.
+        """
+
+        for influence in influences:
+            self.cmds.skinCluster(skin_cluster, edit=True, addInfluence=influence, weight=0.0, lockWeights=False)
+        for influence in influences:
+            if bind_pre_matrices and influence in bind_pre_matrices:
+                self.set_bind_pre_matrix(skin_cluster, influence, bind_pre_matrices[influence])
+
+    def world_matrices(self, influences, time=None):
+        """
+        Get the world matrices of influences.
+        Args:
+            influences (list): The influence names.
+            time (float): Evaluate them at this frame instead of the current one.
+        Returns:
+            np.ndarray: Row vector matrices of shape (influences, 4, 4).
+        """
+
+        flags = {} if time is None else {"time": time}
+        return np.array([self.cmds.getAttr(f"{name}.worldMatrix[0]", **flags) for name in influences], dtype=np.float64).reshape(-1, 4, 4)
+
+    def _influence_plugs(self, skin_cluster):
+        """
+        Get the matrix plug index of every influence of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            dict: Influence name to its logical matrix index.
+        """
+
+        connections = self.list_connections(skin_cluster, source=True, destination=False, plugs=True)
+        indices = {}
+        for own, other in zip(connections[::2], connections[1::2]):
+            attribute = own.partition(".")[2]
+            if attribute.startswith("matrix[") and other.endswith(".worldMatrix[0]"):
+                indices[other.partition(".")[0]] = int(attribute[7:-1])
+        return indices
+
+    def bind_pre_matrices(self, skin_cluster):
+        """
+        Get the bind pre matrix of every influence of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            dict: Influence name to its row vector 4x4 matrix.
+        """
+
+        return {
+            name: np.array(self.cmds.getAttr(f"{skin_cluster}.bindPreMatrix[{index}]"), dtype=np.float64).reshape(4, 4)
+            for name, index in self._influence_plugs(skin_cluster).items()
+        }
+
+    def set_bind_pre_matrix(self, skin_cluster, influence, matrix):
+        """
+        Set the bind pre matrix of an influence of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            influence (str): The influence name.
+            matrix (np.ndarray): The row vector 4x4 matrix.
+        """
+
+        index = self._influence_plugs(skin_cluster)[influence]
+        self.cmds.setAttr(f"{skin_cluster}.bindPreMatrix[{index}]", *np.asarray(matrix, dtype=np.float64).ravel().tolist(), type="matrix")
+
+    def vertex_count(self, skin_cluster):
+        """
+        Get the number of vertices a skinCluster deforms, over all its geometries.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            int: The vertex count.
+        """
+
+        return sum(geometry[2] for geometry in self._skin_fn(skin_cluster)[1])
+
+    def geometry_ranges(self, skin_cluster):
+        """
+        Get the geometries a skinCluster deforms and where their vertices sit in its weights.
+        The weights of every geometry follow each other in geometry index order.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            list: (geometry index, deformed shape, first row, row after the last) per geometry.
+        """
+
+        ranges = []
+        start = 0
+        for index, dag_path, count, _ in self._skin_fn(skin_cluster)[1]:
+            ranges.append((index, dag_path.partialPathName(), start, start + count))
+            start += count
+        return ranges
+
+    def mesh_topology(self, shape):
+        """
+        Get the face connectivity of a mesh.
+        Args:
+            shape (str): The mesh shape name.
+        Returns:
+            tuple: The vertex count, the vertex count of every face and the concatenated face vertices.
+        """
+
+        mesh_fn = self._mesh_fn(shape)
+        face_counts, face_vertices = mesh_fn.getVertices()
+        return mesh_fn.numVertices, to_numpy(face_counts, np.int32), to_numpy(face_vertices, np.int32)
+
+    def _mesh_fn(self, shape):
+        selection = self.om.MSelectionList()
+        selection.add(shape)
+        return self.om.MFnMesh(selection.getDagPath(0))
+
+    def mesh_points(self, shape):
+        """
+        Get the world space vertex positions of a mesh.
+        Args:
+            shape (str): The mesh shape name.
+        Returns:
+            np.ndarray: Positions of shape (vertices, 3).
+        """
+
+        points = self._mesh_fn(shape).getPoints(self.om.MSpace.kWorld)
+        return to_numpy(points, np.float64, width=4)[:, :3]
+
+    def mesh_triangles(self, shape):
+        """
+        Get the triangulation of a mesh.
+        Args:
+            shape (str): The mesh shape name.
+        Returns:
+            np.ndarray: Triangle vertex indices of shape (triangles, 3).
+        """
+
+        _, triangle_vertices = self._mesh_fn(shape).getTriangles()
+        return to_numpy(triangle_vertices, np.int64).reshape(-1, 3)
+
+    def create_skin_cluster(self, shape, influences, name):
+        """
+        Bind a mesh to influences with a new skinCluster.
+        Args:
+            shape (str): The mesh shape name.
+            influences (list): The influence names.
+            name (str): The skinCluster name.
+        Returns:
+            str: The created skinCluster name.
+        """
+
+        return self.cmds.skinCluster(list(influences) + [shape], toSelectedBones=True, normalizeWeights=1, name=name)[0]
+
+    def _skin_fn(self, skin_cluster):
+        """
+        Get the function set and the deformed geometries of a skinCluster, in one query of its
+        output connections.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            tuple: The MFnSkinCluster and (geometry index, MDagPath, point count, point layout) per
+                deformed geometry, in geometry index order, see _point_layout.
+        """
+
+        selection = self.om.MSelectionList()
+        selection.add(skin_cluster)
+        skin_fn = self.oma.MFnSkinCluster(selection.getDependNode(0))
+        indices = sorted(skin_fn.indexForOutputConnection(connection) for connection in range(skin_fn.numOutputConnections()))
+        geometries = []
+        for index in indices:
+            dag_path = skin_fn.getPathAtIndex(index)
+            layout = self._point_layout(dag_path)
+            geometries.append((index, dag_path, int(np.prod(layout[1])), layout))
+        return skin_fn, geometries
+
+    def _point_layout(self, dag_path):
+        """
+        Get how the weighted points of a deformed geometry are addressed.
+        Args:
+            dag_path (MDagPath): The deformed shape, a mesh, NURBS curve, NURBS surface or lattice.
+        Returns:
+            tuple: The component type and the point counts along each of its indices, e.g.
+                (kMeshVertComponent, (vertices,)) or (kSurfaceCVComponent, (CVs in U, CVs in V)).
+        """
+
+        fn = self.om.MFn
+        api_type = dag_path.apiType()
+        if api_type == fn.kMesh:
+            return fn.kMeshVertComponent, (self.om.MFnMesh(dag_path).numVertices,)
+        if api_type == fn.kNurbsCurve:
+            return fn.kCurveCVComponent, (self.om.MFnNurbsCurve(dag_path).numCVs,)
+        if api_type == fn.kNurbsSurface:
+            surface_fn = self.om.MFnNurbsSurface(dag_path)
+            return fn.kSurfaceCVComponent, (surface_fn.numCVsInU, surface_fn.numCVsInV)
+        if api_type == fn.kLattice:
+            return fn.kLatticeComponent, tuple(self.oma.MFnLattice(dag_path).getDivisions())
+        raise ValueError(f"Cannot address the points of {dag_path.partialPathName()}, not a mesh, NURBS or lattice shape.")
+
+    def _vertex_component(self, vertices, layout):
+        """
+        Build a point component, a complete one when every point of the geometry is asked for,
+        which Maya handles without any index list. The points of NURBS surfaces and lattices are
+        only ever asked for completely.
+        Args:
+            vertices (np.ndarray): The sorted point indices.
+            layout (tuple): The component type and point counts of the geometry, see _point_layout.
+        Returns:
+            MObject: The point component.
+        """
+
+        component_type, counts = layout
+        if len(counts) > 1:
+            component_fn = (self.om.MFnDoubleIndexedComponent if len(counts) == 2 else self.om.MFnTripleIndexedComponent)()
+            component = component_fn.create(component_type)
+            component_fn.setCompleteData(*counts)
+            return component
+        component_fn = self.om.MFnSingleIndexedComponent()
+        component = component_fn.create(component_type)
+        if len(vertices) == counts[0]:
+            component_fn.setCompleteData(counts[0])
+        else:
+            component_fn.addElements(to_maya(self.om.MIntArray, vertices, np.int32))
+        return component
+
+    def _read_weights(self, skin_cluster, chunk_size):
+        """
+        Read all the weights of a skinCluster from Maya. The blocks of every geometry are stacked
+        into one contiguous set of weights, see geometry_ranges.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            chunk_size (int): Number of vertices read per call, None to read every geometry at once.
+                NURBS surfaces and lattices are always read at once.
+        Returns:
+            weights.SparseWeights: The float64 skinCluster weights.
+        """
+
+        skin_fn, geometries = self._skin_fn(skin_cluster)
+        influences = self.influences(skin_cluster)
+        blocks = []
+        for _, dag_path, vertex_count, layout in geometries:
+            step = chunk_size if chunk_size and len(layout[1]) == 1 else max(vertex_count, 1)
+            for start in range(0, vertex_count, step):
+                stop = min(start + step, vertex_count)
+                flat, influence_count = skin_fn.getWeights(dag_path, self._vertex_component(np.arange(start, stop), layout))
+                dense = to_numpy(flat, np.float64).reshape(stop - start, influence_count)
+                blocks.append(weights.SparseWeights.from_dense(dense, influences))
+        if not blocks:
+            return weights.SparseWeights(np.zeros(1, dtype=np.int64), [], [], influences)
+        return weights.SparseWeights.vstack(blocks)
+
+    def _write_rows(self, skin_cluster, sparse_weights, rows, chunk_size):
+        """
+        Write the weights of some vertices to Maya, one setWeights call per geometry holding
+        written vertices, or per chunk of them when a chunk size is given. The writes run as one
+        undoable step, see run_undoable, undone by writing back the weights setWeights returns.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            sparse_weights (weights.SparseWeights): The weights of every vertex.
+            rows (np.ndarray): The vertices to write, sorted.
+            chunk_size (int): Number of vertices written per call, None to write every geometry at once.
+                NURBS surfaces and lattices holding written vertices are always written whole.
+        Returns:
+            int: The number of setWeights calls.
+        """
+
+        skin_fn, geometries = self._skin_fn(skin_cluster)
+        indices = to_maya(self.om.MIntArray, np.arange(sparse_weights.influence_count), np.int32)
+        offsets = np.cumsum([0] + [geometry[2] for geometry in geometries])
+        bounds = np.searchsorted(rows, offsets)
+        writes = []
+        for (_, dag_path, vertex_count, layout), offset, first, last in zip(geometries, offsets, bounds[:-1], bounds[1:]):
+            geometry_rows = rows[first:last]
+            if len(layout[1]) > 1 and len(geometry_rows):
+                geometry_rows = np.arange(offset, offset + vertex_count)
+            step = chunk_size if chunk_size and len(layout[1]) == 1 else max(len(geometry_rows), 1)
+            for start in range(0, len(geometry_rows), step):
+                chunk = geometry_rows[start:start + step]
+                dense = sparse_weights.take_rows(chunk).to_dense()
+                writes.append((dag_path, self._vertex_component(chunk - offset, layout), to_maya(self.om.MDoubleArray, dense)))
+        old_values = []
+
+        def do():
+            old_values[:] = [skin_fn.setWeights(dag_path, component, indices, values, False, True) for dag_path, component, values in writes]
+
+        def undo():
+            for (dag_path, component, _), values in zip(writes, old_values):
+                skin_fn.setWeights(dag_path, component, indices, values, False)
+            self.weight_cache.pop(skin_cluster, None)
+
+        self.run_undoable(do, undo)
+        return len(writes)
+
+    def read_weights(self, skin_cluster, max_influences=None, dtype=np.float64, chunk_size=None):
+        """
+        Read all the weights of a skinCluster as sparse weights, one getWeights call per geometry.
+        The result is remembered so the next write_weights only pushes what changed.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            max_influences (int): Keep only the biggest weights of every vertex, renormalized.
+            dtype (np.dtype): Value type of the sparse weights, float64 or float32.
+            chunk_size (int): Number of vertices read per call, e.g. CHUNK_SIZE, which bounds the
+                dense temporary to chunk_size x influences. None reads every geometry at once.
+        Returns:
+            weights.SparseWeights: The skinCluster weights.
+        """
+
+        with profiling.span("read_weights", skin_cluster=skin_cluster):
+            result = self._read_weights(skin_cluster, chunk_size)
+            profiling.count("vertices_read", result.vertex_count)
+            profiling.count("bytes_read", result.nbytes)
+        self.weight_cache[skin_cluster] = result
+        if result.values.dtype != dtype:
+            result = result.astype(dtype)
+        if max_influences:
+            result = result.top_k(max_influences).normalize()
+        return result
+
+    def write_weights(self, skin_cluster, sparse_weights, chunk_size=None, delta=True):
+        """
+        Write the weights of a skinCluster, one setWeights call per geometry holding written vertices.
+        When the weights last read from or written to the skinCluster are known, only the vertices
+        that differ from them are written.
+        Changes made to the skinCluster outside of the adapter since then are not detected, call
+        forget_weights after editing weights by other means.
+        The columns of the sparse weights must follow the skinCluster influence order.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            sparse_weights (weights.SparseWeights): The weights to write.
+            chunk_size (int): Number of vertices written per call, e.g. CHUNK_SIZE, which bounds the
+                dense temporary to chunk_size x influences. None writes every geometry at once.
+            delta (bool): Only write the vertices that changed.
+        Returns:
+            int: The number of vertices written.
+        """
+
+        # Compare at the precision the weights come with, a float32 file round trip is no change.
+        tolerance = weights.value_tolerance(sparse_weights.values.dtype)
+        sparse_weights = sparse_weights.astype(np.float64) if sparse_weights.values.dtype != np.float64 else sparse_weights
+        previous = self.weight_cache.get(skin_cluster) if delta else None
+        if previous is not None and previous.influences != sparse_weights.influences and set(previous.influences) <= set(sparse_weights.influences):
+            # Influences added since the last read hold no weight yet.
+            previous = previous.remap(sparse_weights.influences)
+        if previous is not None and previous.shape == sparse_weights.shape and previous.influences == sparse_weights.influences:
+            rows = np.flatnonzero(weights.changed_rows(previous, sparse_weights, tolerance))
+        else:
+            rows = np.arange(sparse_weights.vertex_count)
+
+        if len(rows):
+            with profiling.span("write_weights", skin_cluster=skin_cluster):
+                self.writing.add(skin_cluster)
+                try:
+                    profiling.count("write_calls", self._write_rows(skin_cluster, sparse_weights, rows, chunk_size))
+                finally:
+                    self.writing.discard(skin_cluster)
+                profiling.count("vertices_written", len(rows))
+        self.weight_cache[skin_cluster] = sparse_weights
+        return len(rows)
+
+    def forget_weights(self, skin_cluster=None):
+        """
+        Drop the remembered weights of a skinCluster, the next write will write every vertex.
+        Args:
+            skin_cluster (str): The skinCluster name, None to forget every skinCluster.
+        """
+
+        if skin_cluster is None:
+            self.weight_cache.clear()
+        else:
+            self.weight_cache.pop(skin_cluster, None)
@@ -0,0 +1,855 @@
+import functools
+import importlib.machinery
+import itertools
+import sys
+import types
+
+import numpy as np
+
+from skinClusterManager import dcc
+from skinClusterManager import weights as sparse
+
+
+"""
+In-memory stand-in for the parts of maya.cmds and OpenMaya the tool uses.
+It lets the logics run on plain Python, with no Maya session around.
+"""
+
+
+class FakeScene(object):
+    """
+    Minimal dependency graph holding nodes, plug connections, meshes and skinCluster weights.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty FakeScene.
+        """
+
+        self.nodes = {}
+        self.connections = {}
+        self.meshes = {}
+        self.skin_clusters = {}
+        self.parents = {}
+        self.attributes = {}
+        self.selection = []
+        self.messages = []
+        self.listeners = {}
+        self.node_listeners = {}
+        self.callback_ids = itertools.count(1)
+        self.command_count = 0
+        self.graph_batches = 0
+        self.undo_chunks = []
+        # Undo steps, each a list of callables reverting it, and the step of the open undo chunk.
+        self.undo_queue = []
+        self.open_chunk = None
+        self.write_calls = 0
+        self.written_vertices = 0
+
+    def notify(self):
+        """
+        Call every registered graph listener, like Maya's DG callbacks would.
+        """
+
+        for listener in list(self.listeners.values()):
+            listener()
+
+    def dirty(self, *nodes):
+        """
+        Call the listeners registered on nodes, like Maya's node callbacks would.
+        Args:
+            nodes (str): The changed nodes.
+        """
+
+        for node, listener in list(self.node_listeners.values()):
+            if node in nodes:
+                listener()
+
+    def record_undo(self, undo):
+        """
+        Record how to revert an edit, in the open undo chunk or as its own undo step.
+        Args:
+            undo (callable): Reverts the edit.
+        """
+
+        if self.open_chunk is None:
+            self.undo_queue.append([undo])
+        else:
+            self.open_chunk.append(undo)
+
+    def checkpoint(self):
+        """
+        Capture the scene state, including the influences of the skinClusters, for undo.
+        Returns:
+            dict: The state, see restore.
+        """
+
+        state = self.snapshot()
+        state["skin_clusters"] = {name: dict(data, influences=list(data["influences"]), geometries=list(data["geometries"])) for name, data in self.skin_clusters.items()}
+        return state
+
+    def undoable(self):
+        """
+        Record a checkpoint undo step, called by the fake commands before they edit the scene.
+        """
+
+        self.record_undo(functools.partial(self.restore, self.checkpoint()))
+
+    def undo(self):
+        """
+        Revert the last undo step, like Maya's undo.
+        Returns:
+            bool: False if there was nothing to undo.
+        """
+
+        while self.undo_queue and not self.undo_queue[-1]:
+            self.undo_queue.pop()
+        if not self.undo_queue:
+            return False
+        for undo in reversed(self.undo_queue.pop()):
+            undo()
+        return True
+
+    def create_node(self, node_type, name):
+        """
+        Create a node.
+        Args:
+            node_type (str): The node type.
+            name (str): The node name.
+        Returns:
+            str: The node name.
+        """
+
+        if name in self.nodes:
+            raise RuntimeError(f"Node already exists: {name}")
+        self.nodes[name] = node_type
+        self.notify()
+        return name
+
+    def add_joint(self, name, matrix=None):
+        """
+        Create a joint.
+        Args:
+            name (str): The joint name.
+            matrix (np.ndarray): Its 4x4 world matrix, identity when not given.
+        Returns:
+            str: The joint name.
+        """
+
+        self.create_node("joint", name)
+        self.attributes[f"{name}.worldMatrix[0]"] = np.eye(4) if matrix is None else np.asarray(matrix, dtype=np.float64).reshape(4, 4)
+        return name
+
+    def bind_influence(self, skin_cluster, influence, index):
+        """
+        Connect an influence to a skinCluster and bind it at its current world matrix.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            influence (str): The influence name, created if missing.
+            index (int): The matrix plug index.
+        """
+
+        if influence not in self.nodes:
+            self.add_joint(influence)
+        self.connect(f"{influence}.worldMatrix[0]", f"{skin_cluster}.matrix[{index}]")
+        self.attributes[f"{skin_cluster}.bindPreMatrix[{index}]"] = np.linalg.inv(self.attributes[f"{influence}.worldMatrix[0]"])
+
+    def add_mesh(self, name, points, faces=None, parent=None):
+        """
+        Create a mesh shape.
+        Args:
+            name (str): The shape name.
+            points (np.ndarray): Vertex positions of shape (vertices, 3).
+            faces (np.ndarray): Triangle vertex indices of shape (triangles, 3).
+            parent (str): Transform the shape lives under, created if missing.
+        Returns:
+            str: The shape name.
+        """
+
+        if parent is not None:
+            if parent not in self.nodes:
+                self.create_node("transform", parent)
+            self.parents[name] = parent
+        self.create_node("mesh", name)
+        self.meshes[name] = {
+            "points": np.asarray(points, dtype=np.float64),
+            "faces": None if faces is None else np.asarray(faces, dtype=np.int64),
+        }
+        return name
+
+    def add_skin_cluster(self, name, original_shape, output_shape, influences, weights):
+        """
+        Create a skinCluster wired between an original shape and an output shape.
+        Args:
+            name (str): The skinCluster name.
+            original_shape (str): The shape feeding the skinCluster.
+            output_shape (str): The shape deformed by the skinCluster.
+            influences (list): Influence joint names, created if missing.
+            weights (np.ndarray): Weight matrix of shape (vertices, influences) or SparseWeights.
+        Returns:
+            str: The skinCluster name.
+        """
+
+        self.create_node("skinCluster", name)
+        for index, influence in enumerate(influences):
+            self.bind_influence(name, influence, index)
+        self.skin_clusters[name] = {
+            "influences": list(influences),
+            "weights": sparse.SparseWeights(np.zeros(1, dtype=np.int64), [], [], influences),
+            "geometries": [],
+        }
+        self.add_geometry(name, original_shape, output_shape, weights)
+        return name
+
+    def add_geometry(self, skin_cluster, original_shape, output_shape, weights, source_index=0):
+        """
+        Make a skinCluster deform one more geometry, at the next geometry index.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            original_shape (str): The shape or skinCluster feeding the geometry.
+            output_shape (str): The shape deformed.
+            weights (np.ndarray): Weight matrix of shape (vertices, influences) or SparseWeights.
+            source_index (int): The geometry index read when original_shape is a skinCluster.
+        Returns:
+            int: The geometry index.
+        """
+
+        data = self.skin_clusters[skin_cluster]
+        if not isinstance(weights, sparse.SparseWeights):
+            weights = sparse.SparseWeights.from_dense(weights, data["influences"])
+        index = len(data["geometries"])
+        data["weights"] = sparse.SparseWeights.vstack([data["weights"], weights])
+        data["geometries"].append((index, output_shape, weights.vertex_count))
+
+        is_mesh = self.nodes[original_shape] == "mesh"
+        source_plug = f"{original_shape}.worldMesh[0]" if is_mesh else f"{original_shape}.outputGeometry[{source_index}]"
+        self.connect(source_plug, f"{skin_cluster}.input[{index}].inputGeometry")
+        self.connect(f"{self.original_shape(original_shape, 0 if is_mesh else source_index)}.outMesh", f"{skin_cluster}.originalGeometry[{index}]")
+        self.connect(f"{skin_cluster}.outputGeometry[{index}]", f"{output_shape}.inMesh")
+        return index
+
+    def original_shape(self, node, index=0):
+        """
+        Walk up a deformer chain until the shape feeding it is found.
+        Args:
+            node (str): A shape or a skinCluster.
+            index (int): The geometry index followed through the skinClusters.
+        Returns:
+            str: The original shape.
+        """
+
+        while self.nodes.get(node) == "skinCluster":
+            node = self.connections[f"{node}.originalGeometry[{index}]"].split(".", 1)[0]
+        return node
+
+    def connect(self, source_plug, destination_plug):
+        """
+        Connect two plugs, replacing any existing input of the destination.
+        Args:
+            source_plug (str): The source plug.
+            destination_plug (str): The destination plug.
+        """
+
+        self.connections[destination_plug] = source_plug
+        self.dirty(source_plug.split(".", 1)[0], destination_plug.split(".", 1)[0])
+        self.notify()
+
+    def set_points(self, name, points):
+        """
+        Move the vertices of a mesh.
+        Args:
+            name (str): The mesh shape name.
+            points (np.ndarray): Vertex positions of shape (vertices, 3).
+        """
+
+        self.meshes[name]["points"] = np.asarray(points, dtype=np.float64)
+        self.dirty(name)
+
+    def write_rows(self, skin_cluster, rows, block):
+        """
+        Replace the weights of some vertices of a skinCluster, like setWeights on a vertex component.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            rows (np.ndarray): The sorted vertices written, over all the geometries.
+            block (weights.SparseWeights): Their weights, one row per written vertex.
+        """
+
+        data = self.skin_clusters[skin_cluster]
+        current = data["weights"]
+        if block.influence_count != current.influence_count:
+            raise ValueError(f"Weights of {block.influence_count} influences do not match the {current.influence_count} of {skin_cluster}")
+        keep = np.ones(current.vertex_count, dtype=bool)
+        keep[rows] = False
+        order = np.argsort(np.concatenate([np.flatnonzero(keep), rows]), kind="stable")
+        spliced = sparse.SparseWeights.vstack([current.take_rows(np.flatnonzero(keep)), block])
+        data["weights"] = sparse.SparseWeights(spliced.indptr, spliced.indices, spliced.values, data["influences"]).take_rows(order).copy()
+        self.written_vertices += len(rows)
+        self.dirty(skin_cluster)
+
+    def delete(self, node):
+        """
+        Delete a node and all its connections.
+        Args:
+            node (str): The node name.
+        """
+
+        self._remove(node)
+        self.notify()
+
+    def rename(self, node, name):
+        """
+        Rename a node, updating its plugs and connections, then notify the graph listeners.
+        Args:
+            node (str): The node name.
+            name (str): The new name.
+        Returns:
+            str: The new name.
+        """
+
+        if name in self.nodes:
+            raise RuntimeError(f"Node already exists: {name}")
+
+        def renamed(plug):
+            owner, dot, attribute = plug.partition(".")
+            return f"{name}{dot}{attribute}" if owner == node else plug
+
+        self.nodes = {renamed(key): value for key, value in self.nodes.items()}
+        self.meshes = {renamed(key): value for key, value in self.meshes.items()}
+        self.skin_clusters = {renamed(key): value for key, value in self.skin_clusters.items()}
+        self.parents = {renamed(key): renamed(value) for key, value in self.parents.items()}
+        self.attributes = {renamed(key): value for key, value in self.attributes.items()}
+        self.connections = {renamed(key): renamed(value) for key, value in self.connections.items()}
+        self.selection = [renamed(selected) for selected in self.selection]
+        for data in self.skin_clusters.values():
+            data["influences"][:] = [renamed(influence) for influence in data["influences"]]
+            data["geometries"][:] = [(index, renamed(shape), count) for index, shape, count in data["geometries"]]
+            data["weights"] = sparse.SparseWeights(data["weights"].indptr, data["weights"].indices, data["weights"].values, data["influences"])
+        self.notify()
+        return name
+
+    def _remove(self, node):
+        self.dirty(node)
+        self.nodes.pop(node, None)
+        self.meshes.pop(node, None)
+        self.parents.pop(node, None)
+        self.skin_clusters.pop(node, None)
+        prefix = f"{node}."
+        for plug in [plug for plug in self.attributes if plug.startswith(prefix)]:
+            del self.attributes[plug]
+        for destination, source in list(self.connections.items()):
+            if destination.startswith(prefix) or source.startswith(prefix):
+                del self.connections[destination]
+
+    def apply_edits(self, connections, deletions):
+        """
+        Connect plugs and delete nodes, notifying the listeners once for the whole batch.
+        Args:
+            connections (list): (source plug, destination plug) pairs.
+            deletions (list): Nodes deleted after the connections.
+        """
+
+        for source_plug, destination_plug in connections:
+            self.connections[destination_plug] = source_plug
+            self.dirty(source_plug.split(".", 1)[0], destination_plug.split(".", 1)[0])
+        for node in deletions:
+            self._remove(node)
+        self.graph_batches += 1
+        self.notify()
+
+    def snapshot(self):
+        """
+        Copy the scene tables, so restore can revert the node and connection edits made since.
+        Returns:
+            dict: The copied tables.
+        """
+
+        return {name: dict(getattr(self, name)) for name in ("nodes", "connections", "meshes", "skin_clusters", "parents", "attributes")}
+
+    def restore(self, snapshot):
+        """
+        Revert the scene tables to a snapshot.
+        Args:
+            snapshot (dict): The tables from snapshot.
+        """
+
+        for name, table in snapshot.items():
+            setattr(self, name, dict(table))
+        self.dirty(*[node for node, _ in self.node_listeners.values()])
+        self.notify()
+
+    def duplicate(self, node, name):
+        """
+        Duplicate a mesh without its connections.
+        Args:
+            node (str): The mesh to duplicate.
+            name (str): The name of the duplicate.
+        Returns:
+            str: The duplicate name.
+        """
+
+        mesh = self.meshes[node]
+        return self.add_mesh(name, mesh["points"].copy(), None if mesh["faces"] is None else mesh["faces"].copy())
+
+
+class FakeCmds(object):
+    """
+    Subset of maya.cmds backed by a FakeScene.
+    """
+
+    def __init__(self, scene):
+        """
+        Initialize the FakeCmds.
+        Args:
+            scene (FakeScene): The scene to operate on.
+        """
+
+        self.scene = scene
+
+    def ls(self, *nodes, sl=False, type=None, **kwargs):
+        names = list(self.scene.selection) if sl else (list(nodes) or list(self.scene.nodes))
+        if type:
+            names = [name for name in names if self.scene.nodes.get(name) == type]
+        return names
+
+    def select(self, nodes=None, clear=False, **kwargs):
+        self.scene.selection = [] if clear or nodes is None else list(nodes if isinstance(nodes, (list, tuple)) else [nodes])
+
+    def listRelatives(self, nodes, allDescendents=False, ad=False, shapes=False, **kwargs):
+        nodes = set(nodes if isinstance(nodes, (list, tuple)) else [nodes])
+        children = [child for child, parent in self.scene.parents.items() if parent in nodes]
+        if shapes:
+            children = [child for child in children if self.scene.nodes.get(child) == "mesh"]
+        return children or None
+
+    def objExists(self, node):
+        return node.split(".", 1)[0] in self.scene.nodes
+
+    def objectType(self, node):
+        return self.scene.nodes[node]
+
+    def listConnections(self, node, connections=False, source=True, destination=True, shapes=False, type=None, plugs=False, **kwargs):
+        self.scene.command_count += 1
+        nodes = set(node if isinstance(node, (list, tuple)) else [node])
+        result = []
+        for destination_plug, source_plug in self.scene.connections.items():
+            pairs = []
+            if source and destination_plug.split(".", 1)[0] in nodes:
+                pairs.append((destination_plug, source_plug))
+            if destination and source_plug.split(".", 1)[0] in nodes:
+                pairs.append((source_plug, destination_plug))
+            for own_plug, other_plug in pairs:
+                other_node = other_plug.split(".", 1)[0]
+                if type and self.scene.nodes.get(other_node) != type:
+                    continue
+                other = other_plug if plugs else other_node
+                result.extend([own_plug, other] if connections else [other])
+        return result or None
+
+    def getAttr(self, plug, time=None, **kwargs):
+        return self.scene.attributes[plug].ravel().tolist()
+
+    def setAttr(self, plug, *values, type=None, **kwargs):
+        self.scene.undoable()
+        self.scene.attributes[plug] = np.array(values, dtype=np.float64).reshape(4, 4) if type == "matrix" else values[0]
+        self.scene.dirty(plug.split(".", 1)[0])
+
+    def undoInfo(self, openChunk=False, closeChunk=False, chunkName=None, **kwargs):
+        if openChunk:
+            self.scene.undo_chunks.append(chunkName)
+            self.scene.open_chunk = []
+            self.scene.undo_queue.append(self.scene.open_chunk)
+        if closeChunk:
+            self.scene.open_chunk = None
+
+    def undo(self, **kwargs):
+        self.scene.undo()
+
+    def connectAttr(self, source_plug, destination_plug, force=False, **kwargs):
+        if destination_plug in self.scene.connections and not force:
+            raise RuntimeError(f"{destination_plug} is already connected.")
+        self.scene.undoable()
+        self.scene.connect(source_plug, destination_plug)
+
+    def duplicate(self, node, name=None, **kwargs):
+        self.scene.undoable()
+        return [self.scene.duplicate(node, name or f"{node}1")]
+
+    def rename(self, node, name, **kwargs):
+        self.scene.undoable()
+        return self.scene.rename(node, name)
+
+    def delete(self, nodes):
+        self.scene.undoable()
+        for node in nodes if isinstance(nodes, (list, tuple)) else [nodes]:
+            self.scene.delete(node)
+
+    def skinCluster(self, node, query=False, edit=False, influence=False, addInfluence=None, weight=0.0, **kwargs):
+        data = self.scene.skin_clusters[node]
+        if query and influence:
+            return list(data["influences"])
+        if edit and addInfluence:
+            self.scene.undoable()
+            self.scene.bind_influence(node, addInfluence, len(data["influences"]))
+            data["influences"].append(addInfluence)
+            data["weights"] = sparse.SparseWeights(data["weights"].indptr, data["weights"].indices, data["weights"].values, data["influences"])
+        return None
+
+
+class FakeGlobal(object):
+    """
+    Stand-in for om2.MGlobal that records the displayed messages on the scene.
+    """
+
+    scene = None
+
+    @classmethod
+    def displayInfo(cls, message):
+        cls.scene.messages.append(("info", message))
+
+    @classmethod
+    def displayWarning(cls, message):
+        cls.scene.messages.append(("warning", message))
+
+    @classmethod
+    def displayError(cls, message):
+        cls.scene.messages.append(("error", message))
+
+
+class FakeAdapter(dcc.MayaAdapter):
+    """
+    MayaAdapter running on a FakeScene instead of a Maya session.
+    """
+
+    def __init__(self, scene):
+        """
+        Initialize the FakeAdapter.
+        Args:
+            scene (FakeScene): The scene to operate on.
+        """
+
+        self.scene = scene
+        super(FakeAdapter, self).__init__(cmds=FakeCmds(scene), om=types.SimpleNamespace(MGlobal=FakeGlobal), oma=types.SimpleNamespace())
+
+    def add_graph_callbacks(self, callback):
+        callback_id = next(self.scene.callback_ids)
+        self.scene.listeners[callback_id] = callback
+        return [callback_id]
+
+    def add_node_callbacks(self, node, callback):
+        callback_id = next(self.scene.callback_ids)
+        self.scene.node_listeners[callback_id] = (node, callback)
+        return [callback_id]
+
+    def remove_callbacks(self, callback_ids):
+        for callback_id in callback_ids:
+            self.scene.listeners.pop(callback_id, None)
+            self.scene.node_listeners.pop(callback_id, None)
+
+    def vertex_count(self, skin_cluster):
+        return self.scene.skin_clusters[skin_cluster]["weights"].vertex_count
+
+    def geometry_ranges(self, skin_cluster):
+        ranges = []
+        start = 0
+        for index, shape, count in self.scene.skin_clusters[skin_cluster]["geometries"]:
+            ranges.append((index, shape, start, start + count))
+            start += count
+        return ranges
+
+    def run_undoable(self, do, undo):
+        do()
+        self.scene.record_undo(undo)
+
+    def apply_graph_edits(self, connections, deletions=()):
+        state = self.scene.snapshot()
+        self.graph_edits.append(state)
+        self.run_undoable(functools.partial(self.scene.apply_edits, connections, deletions), functools.partial(self.scene.restore, state))
+        for node in deletions:
+            self.weight_cache.pop(node, None)
+
+    def undo_graph_edits(self):
+        if not self.graph_edits:
+            return False
+        self.scene.restore(self.graph_edits.pop())
+        self.weight_cache.clear()
+        return True
+
+    def mesh_topology(self, shape):
+        mesh = self.scene.meshes[shape]
+        faces = mesh["faces"] if mesh["faces"] is not None else np.zeros((0, 3), dtype=np.int64)
+        return len(mesh["points"]), np.full(len(faces), faces.shape[1], dtype=np.int32), faces.ravel().astype(np.int32)
+
+    def mesh_points(self, shape):
+        return self.scene.meshes[shape]["points"].copy()
+
+    def mesh_triangles(self, shape):
+        return self.scene.meshes[shape]["faces"].copy()
+
+    def create_skin_cluster(self, shape, influences, name):
+        original = self.scene.duplicate(shape, f"{shape}Orig")
+        bind_weights = np.zeros((len(self.scene.meshes[shape]["points"]), len(influences)))
+        bind_weights[:, 0] = 1.0
+        return self.scene.add_skin_cluster(name, original, shape, influences, bind_weights)
+
+    def _read_weights(self, skin_cluster, chunk_size):
+        return self.scene.skin_clusters[skin_cluster]["weights"].astype(np.float64)
+
+    def _write_rows(self, skin_cluster, sparse_weights, rows, chunk_size):
+        data = self.scene.skin_clusters[skin_cluster]
+        if sparse_weights.shape != data["weights"].shape:
+            raise ValueError(f"Weight shape {sparse_weights.shape} does not match {data['weights'].shape}")
+        previous = data["weights"]
+
+        def undo():
+            self.scene.skin_clusters[skin_cluster]["weights"] = previous
+            self.weight_cache.pop(skin_cluster, None)
+            self.scene.dirty(skin_cluster)
+
+        self.run_undoable(functools.partial(self.scene.write_rows, skin_cluster, rows, sparse_weights.take_rows(rows)), undo)
+        if chunk_size:
+            calls = -(-len(rows) // chunk_size)
+        else:
+            offsets = np.cumsum([count for _, _, count in data["geometries"]])
+            calls = len(np.unique(np.searchsorted(offsets, rows, side="right")))
+        self.scene.write_calls += calls
+        return calls
+
+
+class FakeArray(list):
+    """
+    Stand-in for the OpenMaya arrays, MDoubleArray, MIntArray and MPointArray. Like them it is a
+    sequence with no buffer access, so the adapter copies it the way it copies the real ones.
+    """
+
+
+# Stand-in for om2.MFn, the fake scenes only deform meshes.
+FakeMFn = types.SimpleNamespace(
+    kMesh=296,
+    kNurbsCurve=267,
+    kNurbsSurface=294,
+    kLattice=279,
+    kMeshVertComponent=550,
+    kCurveCVComponent=533,
+    kSurfaceCVComponent=536,
+    kLatticeComponent=545,
+)
+
+
+class FakeDagPath(object):
+    def __init__(self, name):
+        self.name = name
+
+    def partialPathName(self):
+        return self.name
+
+    def apiType(self):
+        return FakeMFn.kMesh
+
+
+class FakeComponent(object):
+    """
+    A vertex component built by FakeComponentFn, complete or holding explicit vertex indices.
+    """
+
+    def __init__(self):
+        self.complete = None
+        self.elements = np.zeros(0, dtype=np.int64)
+
+    def vertices(self):
+        return np.arange(self.complete) if self.complete is not None else self.elements
+
+
+class FakeComponentFn(object):
+    """
+    Stand-in for om2.MFnSingleIndexedComponent.
+    """
+
+    def __init__(self):
+        self.component = None
+
+    def create(self, component_type):
+        self.component = FakeComponent()
+        return self.component
+
+    def setCompleteData(self, count):
+        self.component.complete = count
+
+    def addElements(self, elements):
+        self.component.elements = np.concatenate([self.component.elements, np.fromiter(elements, dtype=np.int64)])
+
+
+class FakeSelectionList(object):
+    def __init__(self):
+        self.names = []
+
+    def add(self, name):
+        self.names.append(name)
+
+    def getDagPath(self, index):
+        return FakeDagPath(self.names[index])
+
+    def getDependNode(self, index):
+        return self.names[index]
+
+
+class FakeMeshFn(object):
+    """
+    Stand-in for om2.MFnMesh, bound to the scene of the api_modules it was made by.
+    """
+
+    scene = None
+
+    def __init__(self, dag_path):
+        self.mesh = self.scene.meshes[dag_path.partialPathName()]
+
+    @property
+    def numVertices(self):
+        return len(self.mesh["points"])
+
+    def _faces(self):
+        faces = self.mesh["faces"]
+        return faces if faces is not None else np.zeros((0, 3), dtype=np.int64)
+
+    def getPoints(self, space=None):
+        points = self.mesh["points"]
+        return FakeArray(map(tuple, np.concatenate([points, np.ones((len(points), 1))], axis=1).tolist()))
+
+    def getVertices(self):
+        faces = self._faces()
+        return FakeArray([faces.shape[1]] * len(faces)), FakeArray(faces.ravel().tolist())
+
+    def getTriangles(self):
+        faces = self._faces()
+        return FakeArray([1] * len(faces)), FakeArray(faces.ravel().tolist())
+
+
+class FakeSkinClusterFn(object):
+    """
+    Stand-in for oma.MFnSkinCluster, bound to the scene of the api_modules it was made by.
+    """
+
+    scene = None
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def data(self):
+        return self.scene.skin_clusters[self.node]
+
+    def numOutputConnections(self):
+        return len(self.data["geometries"])
+
+    def indexForOutputConnection(self, connection):
+        return self.data["geometries"][connection][0]
+
+    def getPathAtIndex(self, index):
+        return FakeDagPath(self.data["geometries"][index][1])
+
+    def _rows(self, dag_path, component):
+        start = 0
+        for _, shape, count in self.data["geometries"]:
+            if shape == dag_path.partialPathName():
+                return start + component.vertices()
+            start += count
+        raise RuntimeError(f"{dag_path.partialPathName()} is not deformed by {self.node}")
+
+    def getWeights(self, dag_path, component):
+        dense = self.data["weights"].take_rows(self._rows(dag_path, component)).to_dense()
+        return FakeArray(dense.ravel().tolist()), dense.shape[1]
+
+    def setWeights(self, dag_path, component, influence_indices, values, normalize=True, returnOldWeights=False):
+        rows = self._rows(dag_path, component)
+        old_values = self.getWeights(dag_path, component)[0] if returnOldWeights else None
+        columns = np.fromiter(influence_indices, dtype=np.int64)
+        dense = np.zeros((len(rows), len(self.data["influences"])))
+        dense[:, columns] = np.fromiter(values, dtype=np.float64).reshape(len(rows), len(columns))
+        self.scene.write_rows(self.node, rows, sparse.SparseWeights.from_dense(dense, self.data["influences"]))
+        self.scene.write_calls += 1
+        return old_values
+
+
+def api_modules(scene):
+    """
+    Build stand-ins for maya.api.OpenMaya and maya.api.OpenMayaAnim operating on a scene, with the
+    function sets and arrays the MayaAdapter weight and mesh I/O uses.
+    Args:
+        scene (FakeScene): The scene the function sets operate on.
+    Returns:
+        tuple: The OpenMaya and OpenMayaAnim stand-ins.
+    """
+
+    om = types.SimpleNamespace(
+        MGlobal=FakeGlobal,
+        MSelectionList=FakeSelectionList,
+        MFnSingleIndexedComponent=FakeComponentFn,
+        MFnMesh=type("MFnMesh", (FakeMeshFn,), {"scene": scene}),
+        MFn=FakeMFn,
+        MSpace=types.SimpleNamespace(kWorld=4),
+        MDoubleArray=FakeArray,
+        MIntArray=FakeArray,
+    )
+    oma = types.SimpleNamespace(MFnSkinCluster=type("MFnSkinCluster", (FakeSkinClusterFn,), {"scene": scene}))
+    return om, oma
+
+
+class FakeApiAdapter(FakeAdapter):
+    """
+    FakeAdapter moving weights and points through the MayaAdapter OpenMaya code, on api_modules
+    stand-ins, so that code path can be tested and its throughput benchmarked.
+    """
+
+    def __init__(self, scene):
+        """
+        Initialize the FakeApiAdapter.
+        Args:
+            scene (FakeScene): The scene to operate on.
+        """
+
+        super(FakeApiAdapter, self).__init__(scene)
+        self.om, self.oma = api_modules(scene)
+
+    vertex_count = dcc.MayaAdapter.vertex_count
+    geometry_ranges = dcc.MayaAdapter.geometry_ranges
+    mesh_topology = dcc.MayaAdapter.mesh_topology
+    mesh_points = dcc.MayaAdapter.mesh_points
+    mesh_triangles = dcc.MayaAdapter.mesh_triangles
+    _read_weights = dcc.MayaAdapter._read_weights
+    _write_rows = dcc.MayaAdapter._write_rows
+
+
+def install(scene=None):
+    """
+    Register fake maya, maya.cmds and maya.api modules so the tool can be imported without Maya.
+    Args:
+        scene (FakeScene): The scene the fake modules operate on, a new one when not given.
+    Returns:
+        FakeAdapter: An adapter bound to the same scene.
+    """
+
+    scene = scene or FakeScene()
+    adapter = FakeAdapter(scene)
+    FakeGlobal.scene = scene
+
+    maya = types.ModuleType("maya")
+    cmds = types.ModuleType("maya.cmds")
+    for name in dir(adapter.cmds):
+        if not name.startswith("_") and name != "scene":
+            setattr(cmds, name, getattr(adapter.cmds, name))
+    api = types.ModuleType("maya.api")
+    om = types.ModuleType("maya.api.OpenMaya")
+    om.MGlobal = FakeGlobal
+    oma = types.ModuleType("maya.api.OpenMayaAnim")
+    maya.cmds, maya.api, api.OpenMaya, api.OpenMayaAnim = cmds, api, om, oma
+    # Specs let importlib.util.find_spec see the fake modules as imported.
+    for module in (maya, cmds, api, om, oma):
+        module.__spec__ = importlib.machinery.ModuleSpec(module.__name__, None, is_package=module in (maya, api))
+
+    sys.modules.update({
+        "maya": maya,
+        "maya.cmds": cmds,
+        "maya.api": api,
+        "maya.api.OpenMaya": om,
+        "maya.api.OpenMayaAnim": oma,
+    })
+    return adapter
@@ -0,0 +1,381 @@
+import re
+
+from skinClusterManager import profiling
+
+
+"""
+Indexed view of the skinCluster deformer graph.
+The whole graph is read with one connection query for every skinCluster at once, then every
+lookup is a dictionary access until a scene callback marks the index dirty. A skinCluster can
+deform several geometries, every geometry index found in that query gets its own connections.
+"""
+
+
+INPUT_ATTRIBUTE = "input[{index}].inputGeometry"
+ORIGINAL_ATTRIBUTE = "originalGeometry[{index}]"
+OUTPUT_ATTRIBUTE = "outputGeometry[{index}]"
+_GEOMETRY_ATTRIBUTE = re.compile(r"^(?:input\[(?P<input>\d+)\]\.inputGeometry|originalGeometry\[(?P<original>\d+)\]|outputGeometry\[(?P<output>\d+)\])$")
+
+
+def geometry_attribute(attribute):
+    """
+    Parse a geometry attribute of a skinCluster.
+    Args:
+        attribute (str): The attribute path, e.g. "input[2].inputGeometry".
+    Returns:
+        tuple: "input", "original" or "output" and the geometry index, None for other attributes.
+    """
+
+    match = _GEOMETRY_ATTRIBUTE.match(attribute)
+    if match is None:
+        return None
+    kind = match.lastgroup
+    return kind, int(match.group(kind))
+
+
+class Plug(object):
+    """
+    A node attribute, e.g. skinCluster1.outputGeometry[0].
+    """
+
+    __slots__ = ("node", "attribute")
+
+    def __init__(self, node, attribute):
+        """
+        Initialize the Plug.
+        Args:
+            node (str): The node name.
+            attribute (str): The attribute path on the node.
+        """
+
+        self.node = node
+        self.attribute = attribute
+
+    @classmethod
+    def from_string(cls, plug):
+        """
+        Build a Plug from its "node.attribute" name.
+        Args:
+            plug (str): The full plug name.
+        Returns:
+            Plug: The parsed plug.
+        """
+
+        node, _, attribute = plug.partition(".")
+        return cls(node, attribute)
+
+    def __str__(self):
+        return f"{self.node}.{self.attribute}"
+
+    def __repr__(self):
+        return f"Plug('{self}')"
+
+    def __eq__(self, other):
+        return isinstance(other, Plug) and self.node == other.node and self.attribute == other.attribute
+
+    def __hash__(self):
+        return hash((self.node, self.attribute))
+
+
+class Edge(object):
+    """
+    A connection from a source plug to a destination plug.
+    """
+
+    __slots__ = ("source", "destination")
+
+    def __init__(self, source, destination):
+        """
+        Initialize the Edge.
+        Args:
+            source (Plug): The plug driving the connection.
+            destination (Plug): The driven plug.
+        """
+
+        self.source = source
+        self.destination = destination
+
+    def __repr__(self):
+        return f"Edge({self.source} -> {self.destination})"
+
+
+class SkinClusterRecord(object):
+    """
+    Geometry connections of one skinCluster, by geometry index.
+    """
+
+    __slots__ = ("name", "inputs", "originals", "outputs")
+
+    def __init__(self, name):
+        """
+        Initialize the SkinClusterRecord.
+        Args:
+            name (str): The skinCluster name.
+        """
+
+        self.name = name
+        self.inputs = {}
+        self.originals = {}
+        self.outputs = {}
+
+    def __repr__(self):
+        return f"SkinClusterRecord({self.name}, inputs={self.inputs}, originals={self.originals}, outputs={self.outputs})"
+
+    def indices(self):
+        """
+        Get the geometry indices with any connection.
+        Returns:
+            list: The indices, ascending.
+        """
+
+        return sorted(set(self.inputs) | set(self.originals) | set(self.outputs))
+
+    @property
+    def input(self):
+        return self.inputs[min(self.inputs)] if self.inputs else None
+
+    @property
+    def original(self):
+        return self.originals[min(self.originals)] if self.originals else None
+
+
+class DeformerGraph(object):
+    """
+    Lazily built index from skinClusters to the geometry they read and write.
+    """
+
+    def __init__(self, adapter):
+        """
+        Initialize the DeformerGraph.
+        Args:
+            adapter (dcc.MayaAdapter): The adapter used to read the scene.
+        """
+
+        self.adapter = adapter
+        self.records = {}
+        self.edges = []
+        self.by_output_node = {}
+        self.by_original_node = {}
+        self.dirty = True
+        self.build_count = 0
+        self._callback_ids = []
+
+    def invalidate(self, *args):
+        """
+        Mark the index dirty, it is rebuilt on the next lookup. Accepts any callback arguments.
+        """
+
+        self.dirty = True
+
+    def watch(self):
+        """
+        Register the scene callbacks that invalidate the index.
+        """
+
+        if not self._callback_ids:
+            self._callback_ids = self.adapter.add_graph_callbacks(self.invalidate)
+
+    def unwatch(self):
+        """
+        Remove the scene callbacks registered by watch.
+        """
+
+        if self._callback_ids:
+            self.adapter.remove_callbacks(self._callback_ids)
+        self._callback_ids = []
+
+    def build(self):
+        """
+        Read every skinCluster connection of the scene in one pass.
+        """
+
+        with profiling.span("graph_build"):
+            self._build()
+            profiling.count("graph_builds")
+
+    def _build(self):
+        records = {name: SkinClusterRecord(name) for name in self.adapter.list_nodes("skinCluster")}
+        pairs = set()
+        if records:
+            nodes = list(records)
+            incoming = self.adapter.list_connections(nodes, source=True, destination=False, plugs=True)
+            outgoing = self.adapter.list_connections(nodes, source=False, destination=True, plugs=True)
+            pairs.update((other, own) for own, other in zip(incoming[::2], incoming[1::2]))
+            pairs.update((own, other) for own, other in zip(outgoing[::2], outgoing[1::2]))
+        edges = [Edge(Plug.from_string(source), Plug.from_string(destination)) for source, destination in sorted(pairs)]
+
+        by_output_node = {}
+        by_original_node = {}
+        for edge in edges:
+            record = records.get(edge.destination.node)
+            parsed = geometry_attribute(edge.destination.attribute) if record is not None else None
+            if parsed is not None and parsed[0] == "input":
+                record.inputs[parsed[1]] = edge.source
+            elif parsed is not None and parsed[0] == "original":
+                record.originals[parsed[1]] = edge.source
+                by_original_node.setdefault(edge.source.node, []).append(record.name)
+            record = records.get(edge.source.node)
+            parsed = geometry_attribute(edge.source.attribute) if record is not None else None
+            if parsed is not None and parsed[0] == "output":
+                record.outputs.setdefault(parsed[1], []).append(edge.destination)
+                by_output_node.setdefault(edge.destination.node, []).append(record.name)
+
+        self.records = records
+        self.edges = edges
+        self.by_output_node = by_output_node
+        self.by_original_node = by_original_node
+        self.dirty = False
+        self.build_count += 1
+
+    def _ensure(self):
+        if self.dirty:
+            self.build()
+
+    def version(self):
+        """
+        Get a number that changes every time the index is rebuilt after a scene change.
+        Returns:
+            int: The build count.
+        """
+
+        self._ensure()
+        return self.build_count
+
+    def skin_clusters(self):
+        """
+        Get every skinCluster of the scene.
+        Returns:
+            list: The skinCluster names.
+        """
+
+        self._ensure()
+        return list(self.records)
+
+    def record(self, skin_cluster):
+        """
+        Get the connection record of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            SkinClusterRecord: The record, None if the node is not a skinCluster.
+        """
+
+        self._ensure()
+        return self.records.get(skin_cluster)
+
+    def input_node(self, skin_cluster, index=None):
+        """
+        Get the node feeding an input geometry of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            index (int): The geometry index, the first connected one when not given.
+        Returns:
+            str: The node name, None if nothing is connected.
+        """
+
+        record = self.record(skin_cluster)
+        if record is None:
+            return None
+        plug = record.input if index is None else record.inputs.get(index)
+        return plug.node if plug else None
+
+    def input_nodes(self, skin_cluster):
+        """
+        Get the nodes feeding every input geometry of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            list: The node names, in geometry index order.
+        """
+
+        record = self.record(skin_cluster)
+        return [record.inputs[index].node for index in sorted(record.inputs)] if record else []
+
+    def original_node(self, skin_cluster, index=None):
+        """
+        Get the shape connected to an original geometry of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            index (int): The geometry index, the first connected one when not given.
+        Returns:
+            str: The shape name, None if nothing is connected.
+        """
+
+        record = self.record(skin_cluster)
+        if record is None:
+            return None
+        plug = record.original if index is None else record.originals.get(index)
+        return plug.node if plug else None
+
+    def original_nodes(self, skin_cluster):
+        """
+        Get the shapes connected to every original geometry of a skinCluster. Their vertices follow
+        each other in that order in the skinCluster weights.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            list: The shape names, in geometry index order.
+        """
+
+        record = self.record(skin_cluster)
+        return [record.originals[index].node for index in sorted(record.originals)] if record else []
+
+    def output_nodes(self, skin_cluster, index=None):
+        """
+        Get the nodes driven by the output geometries of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            index (int): Only the nodes of this geometry index, every geometry when not given.
+        Returns:
+            list: The node names, in geometry index order.
+        """
+
+        record = self.record(skin_cluster)
+        if record is None:
+            return []
+        indices = sorted(record.outputs) if index is None else [index]
+        return [plug.node for position in indices for plug in record.outputs.get(position, [])]
+
+    def upstream(self, skin_cluster):
+        """
+        Get the skinClusters feeding any input geometry of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            list: The skinCluster names.
+        """
+
+        self._ensure()
+        return list(dict.fromkeys(node for node in self.input_nodes(skin_cluster) if node in self.records))
+
+    def downstream(self, skin_cluster):
+        """
+        Get the skinClusters stacked right after a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            list: The skinCluster names.
+        """
+
+        self._ensure()
+        return list(dict.fromkeys(node for node in self.output_nodes(skin_cluster) if node in self.records))
+
+    def deformers_of(self, shape):
+        """
+        Get the skinClusters deforming a shape, walking stacked chains up to the original shape.
+        Args:
+            shape (str): A deformed or original shape.
+        Returns:
+            list: The skinCluster names, last evaluated first.
+        """
+
+        self._ensure()
+        found = []
+        pending = list(self.by_output_node.get(shape, [])) + list(self.by_original_node.get(shape, []))
+        while pending:
+            name = pending.pop(0)
+            if name in found:
+                continue
+            found.append(name)
+            pending.extend(self.upstream(name))
+        return found
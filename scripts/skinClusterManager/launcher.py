@@ -0,0 +1,114 @@
+import importlib
+import os
+import sys
+import time
+
+
+"""
+Entry point of the SkinCluster Manager window, cheap enough to import at Maya startup.
+Only the standard library is imported here, PySide, NumPy and the logics are imported the first time
+the window is shown. The window is built once and kept, later calls show it again and refresh it in
+place. Modules are only reloaded in dev mode, set with set_dev_mode or the SKIN_CLUSTER_MANAGER_DEV
+environment variable, which rebuilds the window from the reloaded code on every show.
+"""
+
+
+PACKAGE = "skinClusterManager"
+DEV_ENVIRONMENT_VARIABLE = "SKIN_CLUSTER_MANAGER_DEV"
+# Modules never reloaded: this one holds the window, the others never run in the UI session.
+NO_RELOAD = (f"{PACKAGE}.launcher", f"{PACKAGE}.fakes", f"{PACKAGE}.batch", f"{PACKAGE}.benchmarks")
+
+
+_window = None
+_dev_mode = os.environ.get(DEV_ENVIRONMENT_VARIABLE, "").lower() in ("1", "true", "yes", "on")
+_timings = []
+
+
+def dev_mode():
+    return _dev_mode
+
+
+def set_dev_mode(enabled):
+    """
+    Turn dev mode on or off.
+    Args:
+        enabled (bool): Reload the package modules and rebuild the window on every show.
+    """
+    global _dev_mode
+    _dev_mode = bool(enabled)
+
+
+def timings():
+    """
+    Get the measured open times of this session.
+    Returns:
+        list: (kind, seconds) per show, kind being cold for the first one, warm when an existing
+            window was shown again and reload for the dev mode rebuilds.
+    """
+    return list(_timings)
+
+
+def _window_alive():
+    if _window is None:
+        return False
+    import shiboken2
+    return shiboken2.isValid(_window)
+
+
+def _close_window():
+    """
+    Close and delete the kept window, stopping its scan.
+    """
+    global _window
+    if _window_alive():
+        _window.cancel_scan()
+        _window.close()
+        _window.deleteLater()
+    _window = None
+
+
+def reload_package():
+    """
+    Reload every loaded module of the package, the ones imported last first, so the modules are
+    reloaded before the modules importing them. The callbacks of the logics are removed first, the
+    reloaded logics start without any.
+    """
+    logics = sys.modules.get(f"{PACKAGE}.logics")
+    if logics is not None:
+        logics.set_adapter(None)
+    names = [name for name in sys.modules if name.startswith(f"{PACKAGE}.") and not name.startswith(NO_RELOAD)]
+    for name in reversed(names):
+        importlib.reload(sys.modules[name])
+
+
+def show():
+    """
+    Show the SkinCluster Manager window, built on the first call and refreshed on the next ones.
+    Returns:
+        ui.SkinClusterManager: The window.
+    """
+    global _window
+    start = time.perf_counter()
+    if _dev_mode:
+        kind = "reload"
+        _close_window()
+        reload_package()
+    else:
+        kind = "warm" if _window_alive() else "cold"
+
+    if kind == "warm":
+        _window.refresh()
+    else:
+        from skinClusterManager import ui
+        _window = ui.SkinClusterManager()
+    if _window.isMinimized():
+        _window.showNormal()
+    _window.show()
+    _window.raise_()
+    _window.activateWindow()
+
+    elapsed = time.perf_counter() - start
+    _timings.append((kind, elapsed))
+    import maya.api.OpenMaya as om2
+    om2.MGlobal.displayInfo(f"SkinCluster Manager opened in {elapsed * 1000.0:.1f} ms ({kind}).")
+    return _window
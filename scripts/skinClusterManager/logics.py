@@ -1,6 +1,28 @@
+import concurrent.futures
+import contextlib
+import functools
+import hashlib
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
 import maya.cmds as cmds
 import maya.api.OpenMaya as om2
 
+from skinClusterManager import cache
+from skinClusterManager import dcc
+from skinClusterManager import graph
+from skinClusterManager import plan
+from skinClusterManager import profiling
+from skinClusterManager import refit
+from skinClusterManager import smoothing
+from skinClusterManager import snapshots
+from skinClusterManager import transfer
+from skinClusterManager import weight_file
+from skinClusterManager import weights
+
 
 
 """
@@ -8,98 +30,965 @@ Still Workin in progress
 """
 
 
+# skinClusters whose stats are read per scan step.
+SCAN_CHUNK_SIZE = 16
+
+
+_adapter = None
+
+
+def get_adapter():
+    """
+    Get the DCC adapter the logics run on, a MayaAdapter unless another one was set.
+    Returns:
+        dcc.MayaAdapter: The current adapter.
+    """
+    global _adapter
+    if _adapter is None:
+        _adapter = dcc.MayaAdapter(cmds=cmds, om=om2)
+    return _adapter
+
+
+def set_adapter(adapter):
+    """
+    Set the DCC adapter the logics run on, e.g. a fakes.FakeAdapter outside of Maya.
+    Args:
+        adapter (dcc.MayaAdapter): The adapter to use, None to go back to Maya.
+    """
+    global _adapter
+    if _graph is not None:
+        _graph.unwatch()
+    set_graph(None)
+    if _cache is not None:
+        _cache.unwatch()
+    set_cache(None)
+    _plan_cache.clear()
+    _snapshot_store.clear()
+    _adapter = adapter
+
+
+_graph = None
+_cache = None
+_plan_cache = plan.PlanCache()
+_snapshot_store = snapshots.SnapshotStore()
+
+
+def get_graph():
+    """
+    Get the cached deformer graph index of the current adapter, invalidated by scene callbacks.
+    Returns:
+        graph.DeformerGraph: The graph index.
+    """
+    global _graph
+    if _graph is None:
+        _graph = graph.DeformerGraph(get_adapter())
+        _graph.watch()
+    return _graph
+
+
+def set_graph(deformer_graph):
+    """
+    Replace the cached deformer graph index.
+    Args:
+        deformer_graph (graph.DeformerGraph): The graph to use, None to build a new one on demand.
+    """
+    global _graph
+    _graph = deformer_graph
+
+
+def get_cache():
+    """
+    Get the cache of meshes and skinClusters derived data of the current adapter, see cache.DerivedCache.
+    Returns:
+        cache.DerivedCache: The cache.
+    """
+    global _cache
+    if _cache is None:
+        _cache = cache.DerivedCache(get_adapter())
+    return _cache
+
+
+def set_cache(derived_cache):
+    """
+    Replace the cache of derived data.
+    Args:
+        derived_cache (cache.DerivedCache): The cache to use, None to make a new one on demand.
+    """
+    global _cache
+    _cache = derived_cache
+
+
+@contextlib.contextmanager
+def profile(path=None, track_memory=False):
+    """
+    Record the logics operations run inside the block, e.g.
+        with logics.profile("merge.json") as recorder:
+            logics.combine_skin_clusters(groups)
+        print(recorder.summary())
+    Args:
+        path (str): Write a Chrome trace_event file here when the block ends, optional.
+        track_memory (bool): Also measure the bytes allocated in every span, slower.
+    Yields:
+        profiling.Recorder: The recorder, with the spans and counters of the block.
+    """
+    recorder = profiling.enable(get_adapter(), track_memory)
+    try:
+        yield recorder
+    finally:
+        profiling.disable()
+        if path:
+            recorder.write_trace(path)
+
+
+@profiling.operation
+def find_skin_clusters(nodes=None):
+    """
+    Find the skinClusters deforming the shapes among and under nodes, or every skinCluster of the scene.
+    Args:
+        nodes (list): The nodes to search, None for the whole scene.
+    Returns:
+        list: The skinCluster names, without duplicates.
+    """
+    adapter = get_adapter()
+    deformer_graph = get_graph()
+    if nodes is None:
+        return deformer_graph.skin_clusters()
+
+    found = [node for node in nodes if deformer_graph.record(node) is not None]
+    for shape in adapter.shapes_under(nodes):
+        found.extend(deformer_graph.deformers_of(shape))
+    return list(dict.fromkeys(found))
+
+
+@profiling.operation
 def check_skincluster_existance():
-    sel = cmds.ls(sl=True)
-    relatives = cmds.listRelatives(sel, ad=True, shapes=True)
-    if len(relatives) >= 2:
-        skin_clusters = cmds.listConnections(relatives[0], type="skinCluster")
-        print(f"Input connections: {skin_clusters}")
-        if skin_clusters:
-            om2.MGlobal.displayInfo(f"SkinClusters found: {skin_clusters}")
-            return skin_clusters
-        else:
-            om2.MGlobal.displayError("No Skinclusters found in the selection.")
-     
-    else:
-        om2.MGlobal.displayError("No Skinclusters found in the selection.")
+    """
+    Find the skinClusters of every shape under the selection.
+    Returns:
+        list: The skinCluster names, None if there are none.
+    """
+    skin_clusters = find_skin_clusters(get_adapter().selection())
+    if skin_clusters:
+        om2.MGlobal.displayInfo(f"SkinClusters found: {skin_clusters}")
+        return skin_clusters
+    om2.MGlobal.displayError("No Skinclusters found in the selection.")
+
+
+def skin_cluster_stats(skin_cluster):
+    """
+    Get the geometry and influence stats of a skinCluster.
+    Args:
+        skin_cluster (str): The skinCluster name.
+    Returns:
+        tuple: The skinCluster name, its vertex count over all its geometries, its influence count and a status: "stacked"
+            when it reads another skinCluster, "unconnected" when it has no geometry, None otherwise.
+            The counts are None when they cannot be read.
+    """
+    adapter = get_adapter()
+    deformer_graph = get_graph()
+    record = deformer_graph.record(skin_cluster)
+    if record is None or not record.inputs or not record.outputs:
+        return skin_cluster, None, None, "unconnected"
 
-def merge_skin_clusters(target_skinCluster, source_skinCluster):
-    if not cmds.objExists(target_skinCluster) or cmds.objectType(target_skinCluster) != "skinCluster" or not cmds.objExists(source_skinCluster) or cmds.objectType(source_skinCluster) != "skinCluster":
+    status = "stacked" if deformer_graph.upstream(skin_cluster) else None
+    try:
+        vertex_count = adapter.vertex_count(skin_cluster)
+    except RuntimeError:
+        vertex_count = None
+    return skin_cluster, vertex_count, len(get_cache().influences(skin_cluster)), status
+
+
+def scan_skin_clusters(nodes=None, chunk_size=SCAN_CHUNK_SIZE, exclude=()):
+    """
+    Scan skinClusters and their stats in chunks, so a caller can spread the work over idle time.
+    The skinClusters are found with one graph query, the stats are read chunk by chunk.
+    Args:
+        nodes (list): Only scan the skinClusters deforming these nodes, None for the whole scene.
+        chunk_size (int): Number of skinClusters read per step.
+        exclude (iterable): skinClusters to skip, e.g. the ones already listed.
+    Yields:
+        tuple: The number of skinClusters scanned so far, the total, and the skin_cluster_stats of
+            the chunk.
+    """
+    exclude = set(exclude)
+    skin_clusters = [name for name in find_skin_clusters(nodes) if name not in exclude]
+    total = len(skin_clusters)
+    if not total:
+        yield 0, 0, []
+    for start in range(0, total, chunk_size):
+        chunk = skin_clusters[start:start + chunk_size]
+        with profiling.span("scan_chunk", size=len(chunk)):
+            rows = [skin_cluster_stats(name) for name in chunk]
+        yield start + len(chunk), total, rows
+
+@profiling.operation
+def merge_skin_clusters(target_skinCluster, source_skinCluster, mode="stack", passthrough=None, max_influences=None):
+    """
+    Merge two skinClusters.
+    Args:
+        target_skinCluster (str): The skinCluster that is kept.
+        source_skinCluster (str): The skinCluster merged into the target.
+        mode (str): "stack" chains the target in front of the source, "merge" combines both weight
+            sets into the target skinCluster.
+        passthrough (list): Only used by "merge", see weights.merge_weights.
+        max_influences (int): Only used by "merge", cap on the influences per vertex.
+    Returns:
+        str: The target skinCluster when merged, None otherwise.
+    """
+    adapter = get_adapter()
+    if not adapter.exists(target_skinCluster) or adapter.node_type(target_skinCluster) != "skinCluster" or not adapter.exists(source_skinCluster) or adapter.node_type(source_skinCluster) != "skinCluster":
         om2.MGlobal.displayError("One or both nodes do not exist or are not skinCluster nodes.")
         return
+
+    if mode == "merge":
+        merged = combine_skin_clusters([(target_skinCluster, [source_skinCluster])], passthrough, max_influences, workers=1)
+        return merged[0] if merged else None
     
-    list_target_input_connections = cmds.listConnections(target_skinCluster, connections=True, source=True, destination=False, shapes=True)
-    list_source_input_connections = cmds.listConnections(source_skinCluster, connections=True, source=True, destination=False, shapes=True)
-    
-    for e, lists in enumerate([list_target_input_connections, list_source_input_connections]):
-        connections_accepted =[
-            ".input[0].inputGeometry",
-            ".originalGeometry[0]"
-        ]
-        i = 0
-        valid_connections = []
-        while i < len(lists):
-            for connection in connections_accepted:
-                if connection in lists[i]:
-                    valid_connections.append([lists[i], lists[i+1]])
-                    i += 2
-                else:
-                    i += 1
-        if e == 0:
-            target_valid_connections = valid_connections
-        else:
-            source_valid_connections = valid_connections
-
-    for i, connection in enumerate(source_valid_connections):
-        if "originalGeometry" in connection[0]:
-            origin_shape = connection[1] 
-
-    cmds.connectAttr(f"{origin_shape}.worldMesh[0]", f"{target_skinCluster}.input[0].inputGeometry", force=True)
-    cmds.connectAttr(f"{origin_shape}.outMesh", f"{target_skinCluster}.originalGeometry[0]", force=True)
-    cmds.connectAttr(f"{target_skinCluster}.outputGeometry[0]", f"{source_skinCluster}.input[0].inputGeometry", force=True)
-
-
-def rebuild_skinCluster(rebuildable_skinCluster, mesh="new"):
-    if not cmds.objExists(rebuildable_skinCluster) or cmds.objectType(rebuildable_skinCluster) != "skinCluster":
-        om2.MGlobal.displayError("The node does not exist or is not a skinCluster node.")
+    record = get_graph().record(source_skinCluster)
+    if record is None or not record.originals:
+        om2.MGlobal.displayError(f"{source_skinCluster} has no original geometry connected.")
         return
-    
-    list_rebuildable_connections = cmds.listConnections(rebuildable_skinCluster, connections=True, source=True, destination=True, shapes=True)
-    print(list_rebuildable_connections)
-
-    connections_accepted =[
-        ".input[0].inputGeometry",
-        ".originalGeometry[0]",
-        ".outputGeometry[0]"
-    ]
-    i = 0
-    valid_connections = []
-    while i < len(list_rebuildable_connections):
-        for connection in connections_accepted:
-            if connection in list_rebuildable_connections[i]:
-                valid_connections.append([list_rebuildable_connections[i], list_rebuildable_connections[i+1]])
-                i += 1
+
+    # Every geometry of the source gets the target stacked in front of it, at the same index.
+    connections = []
+    for index, origin in sorted(record.originals.items()):
+        connections.extend([
+            (f"{origin.node}.worldMesh[0]", f"{target_skinCluster}.{graph.INPUT_ATTRIBUTE.format(index=index)}"),
+            (f"{origin.node}.outMesh", f"{target_skinCluster}.{graph.ORIGINAL_ATTRIBUTE.format(index=index)}"),
+            (f"{target_skinCluster}.{graph.OUTPUT_ATTRIBUTE.format(index=index)}", f"{source_skinCluster}.{graph.INPUT_ATTRIBUTE.format(index=index)}"),
+        ])
+    execute_plan(plan.EditPlan.build("merge_skin_clusters", connections=connections))
+
+
+def _chain_depth(deformer_graph, skin_cluster):
+    """
+    Count the skinClusters evaluated before a skinCluster in its chain.
+    Args:
+        deformer_graph (graph.DeformerGraph): The graph index.
+        skin_cluster (str): The skinCluster name.
+    Returns:
+        int: The number of upstream skinClusters.
+    """
+    depth = 0
+    visited = {skin_cluster}
+    upstream = deformer_graph.upstream(skin_cluster)
+    while upstream and upstream[0] not in visited:
+        visited.add(upstream[0])
+        depth += 1
+        upstream = deformer_graph.upstream(upstream[0])
+    return depth
+
+
+def _plan_bypass(deformer_graph, skin_clusters):
+    """
+    Plan the connections that take skinClusters out of their chains.
+    The outputs of every geometry of a removed skinCluster get fed by the closest input upstream
+    of that geometry that is kept.
+    Args:
+        deformer_graph (graph.DeformerGraph): The graph index.
+        skin_clusters (list): The skinClusters to remove.
+    Returns:
+        list: (source plug, destination plug) connections to make before deleting them.
+    """
+    removed = set(skin_clusters)
+    connections = []
+    for skin_cluster in skin_clusters:
+        record = deformer_graph.record(skin_cluster)
+        for index, destinations in sorted(record.outputs.items()):
+            source = record.inputs.get(index)
+            visited = {skin_cluster}
+            while source is not None and source.node in removed and source.node not in visited:
+                visited.add(source.node)
+                # Follow the geometry index of the upstream output the source plug is.
+                parsed = graph.geometry_attribute(source.attribute)
+                source = deformer_graph.record(source.node).inputs.get(parsed[1]) if parsed else None
+            if source is None or source.node in removed:
                 continue
-        i += 1
-
-    for i, connection in enumerate(valid_connections):
-        if "originalGeometry" in connection[0]:
-            origin_shape = connection[1] 
-        elif "outputGeometry" in connection[0]:
-            output_shape = connection[1]
-        elif "inputGeometry" in connection[0]:
-            input_shape = connection[1]
-    
-    if cmds.objectType(input_shape) == "mesh" and cmds.objectType(output_shape) == "mesh":
-        om2.MGlobal.displayInfo("The skinCluster is already rebuilt.")
+            connections.extend((str(source), str(destination)) for destination in destinations if destination.node not in removed)
+    return connections
+
+
+def _chain_of(deformer_graph, skin_cluster):
+    """
+    Get the whole skinCluster chain a skinCluster belongs to.
+    Args:
+        deformer_graph (graph.DeformerGraph): The graph index.
+        skin_cluster (str): Any skinCluster of the chain.
+    Returns:
+        list: The skinClusters, first evaluated first, None if the chain branches.
+    """
+    bottom = skin_cluster
+    visited = {skin_cluster}
+    while deformer_graph.upstream(bottom) and deformer_graph.upstream(bottom)[0] not in visited:
+        bottom = deformer_graph.upstream(bottom)[0]
+        visited.add(bottom)
+
+    chain = [bottom]
+    while True:
+        downstream = deformer_graph.downstream(chain[-1])
+        if len(downstream) > 1:
+            return None
+        if not downstream or downstream[0] in chain:
+            return chain
+        chain.append(downstream[0])
+
+
+def skin_chains(skin_clusters=None):
+    """
+    Get the chains of stacked skinClusters, e.g. to combine every chain of a scene.
+    Args:
+        skin_clusters (list): Only the chains holding one of these skinClusters, every chain when not given.
+    Returns:
+        list: The chains of more than one skinCluster that do not branch, first evaluated first.
+    """
+    deformer_graph = get_graph()
+    chains = []
+    seen = set()
+    for skin_cluster in skin_clusters if skin_clusters is not None else deformer_graph.skin_clusters():
+        if skin_cluster in seen or deformer_graph.record(skin_cluster) is None:
+            continue
+        chain = _chain_of(deformer_graph, skin_cluster)
+        if chain is None:
+            seen.add(skin_cluster)
+            continue
+        seen.update(chain)
+        if len(chain) > 1:
+            chains.append(chain)
+    return chains
+
+
+def _worker_executable():
+    """
+    Get the interpreter process pool workers must run, mayapy when running inside the Maya GUI.
+    Returns:
+        str: The interpreter path, None to use the current one.
+    """
+    name = os.path.splitext(os.path.basename(sys.executable))[0].lower()
+    if name not in ("maya", "maya.bin"):
+        return None
+    mayapy = "mayapy.exe" if sys.platform == "win32" else "mayapy"
+    return os.path.join(os.path.dirname(sys.executable), mayapy)
+
+
+def _map_jobs(function, jobs, workers=None):
+    """
+    Run a function over jobs, in a process pool when there is more than one job and worker.
+    Args:
+        function (callable): A picklable module level function taking one job.
+        jobs (list): The job arguments.
+        workers (int): Number of worker processes, defaults to the CPU count.
+    Returns:
+        list: The results, in job order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        return [function(job) for job in jobs]
+
+    context = multiprocessing.get_context("spawn")
+    executable = _worker_executable()
+    if executable:
+        context.set_executable(executable)
+    workers = min(workers, len(jobs))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        return list(pool.map(function, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+@profiling.operation
+def execute_plan(edit_plan, snapshot=True):
+    """
+    Apply an edit plan as one undo step: the weight writes, then every connection and deletion in
+    one batched graph edit, then the duplicates. The API edits run through the undoable command of
+    undo_plugin, so Maya's undo reverts the whole plan. The weights alone can also be restored
+    later with rollback_skin_cluster, from the snapshot taken before writing them.
+    Args:
+        edit_plan (plan.EditPlan): The plan to apply.
+        snapshot (bool): Snapshot every skinCluster before its weights are written.
+    Returns:
+        list: The duplicates made.
+    """
+    adapter = get_adapter()
+    created = []
+    if snapshot:
+        for edit in edit_plan.weight_edits:
+            _snapshot_store.take(edit.skin_cluster, get_cache().weights(edit.skin_cluster), edit_plan.operation, adapter.bind_pre_matrices(edit.skin_cluster))
+    with adapter.undo_chunk(edit_plan.operation):
+        for edit in edit_plan.weight_edits:
+            adapter.add_influences(edit.skin_cluster, list(edit.add_influences), edit.bind_pre_matrices)
+            written = adapter.write_weights(edit.skin_cluster, edit.weights)
+            om2.MGlobal.displayInfo(f"{edit.description}, {written} vertices written.")
+        if edit_plan.connections or edit_plan.deletions:
+            with profiling.span("graph_edit", connections=len(edit_plan.connections), deleted=len(edit_plan.deletions)):
+                adapter.apply_graph_edits(edit_plan.connections, edit_plan.deletions)
+        for node, name in edit_plan.duplicates:
+            created.append(adapter.duplicate(node, name=name))
+    return created
+
+
+def get_snapshot_store():
+    """
+    Get the in-session store of weight snapshots.
+    Returns:
+        snapshots.SnapshotStore: The store.
+    """
+    return _snapshot_store
+
+
+@profiling.operation
+def snapshot_skin_clusters(skin_clusters, label=None):
+    """
+    Snapshot the current weights of skinClusters, to roll them back later with rollback_skin_cluster.
+    Args:
+        skin_clusters (list): The skinCluster names.
+        label (str): A description stored with the snapshots.
+    Returns:
+        list: The snapshots.Snapshot taken.
+    """
+    adapter = get_adapter()
+    taken = []
+    for skin_cluster in skin_clusters:
+        if not adapter.exists(skin_cluster) or adapter.node_type(skin_cluster) != "skinCluster":
+            om2.MGlobal.displayError(f"{skin_cluster} does not exist or is not a skinCluster node.")
+            continue
+        taken.append(_snapshot_store.take(skin_cluster, get_cache().weights(skin_cluster), label, adapter.bind_pre_matrices(skin_cluster)))
+    return taken
+
+
+@profiling.operation
+def rollback_skin_cluster(skin_cluster, snapshot_id=None):
+    """
+    Restore the weights of a skinCluster from a snapshot, as one undo step. Only the vertices that
+    differ from the snapshot by more than the quantization error are written. Only the weights and
+    influences are restored, the connections and deletions of the operation that followed the
+    snapshot are not: Maya's undo reverts those.
+    Args:
+        skin_cluster (str): The skinCluster name.
+        snapshot_id (int): The snapshot to restore, it must have been taken of the skinCluster. The
+            latest one of the skinCluster when not given.
+    Returns:
+        int: The number of vertices written, None if nothing could be restored.
+    """
+    adapter = get_adapter()
+    if not adapter.exists(skin_cluster) or adapter.node_type(skin_cluster) != "skinCluster":
+        om2.MGlobal.displayError(f"{skin_cluster} does not exist or is not a skinCluster node.")
+        return
+    snapshot = _snapshot_store.snapshots.get(snapshot_id) if snapshot_id is not None else _snapshot_store.latest(skin_cluster)
+    if snapshot is None:
+        om2.MGlobal.displayError(f"No snapshot of {skin_cluster} to roll back to.")
+        return
+    if snapshot.skin_cluster != skin_cluster:
+        om2.MGlobal.displayError(f"Snapshot {snapshot.id} was taken of {snapshot.skin_cluster}, not {skin_cluster}.")
+        return
+
+    current = get_cache().weights(skin_cluster)
+    if current.vertex_count != snapshot.vertex_count:
+        om2.MGlobal.displayError(f"Snapshot {snapshot.id} holds {snapshot.vertex_count} vertices, {skin_cluster} deforms {current.vertex_count}.")
+        return
+    known = set(current.influences)
+    missing = [name for name in snapshot.influences if name not in known]
+    influences = current.influences + missing
+    current = current.remap(influences)
+    restored = _snapshot_store.restore(snapshot.id).remap(influences)
+    changed = weights.changed_rows(current, restored, tolerance=1.0 / snapshots.SCALE)
+    rows = np.flatnonzero(changed)
+    with adapter.undo_chunk("rollback_skin_cluster"):
+        adapter.add_influences(skin_cluster, missing, snapshot.bind_pre_matrices)
+        written = adapter.write_weights(skin_cluster, current.put_rows(rows, restored.take_rows(rows)))
+    om2.MGlobal.displayInfo(f"Rolled {skin_cluster} back to snapshot {snapshot.id}, {written} vertices written.")
+    return written
+
+
+def _plan_key(operation, *args):
+    """
+    Build a hashable plan cache key from operation arguments made of lists, tuples, dicts and scalars.
+    Args:
+        operation (str): The operation name.
+        args: The arguments.
+    Returns:
+        tuple: The key.
+    """
+    def freeze(value):
+        if isinstance(value, dict):
+            return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(freeze(item) for item in value)
+        return value
+    return (operation,) + freeze(args)
+
+
+@profiling.operation
+def plan_combine(groups, passthrough=None, max_influences=None, workers=None, renames=None, smooth_iterations=0, seam_rings=smoothing.SEAM_RINGS):
+    """
+    Plan the combine of many groups of skinClusters, every group into its target skinCluster.
+    The weights and graph connections are read from the scene first and the merges run in a process
+    pool. Sources stacked on the same original shape as their target are planned to be taken out of
+    the chain and deleted. A plan computed from the same weights, graph and arguments is reused.
+    Args:
+        groups (list): (target skinCluster, [source skinClusters]) pairs.
+        passthrough (list): See weights.merge_weights.
+        max_influences (int): Cap on the influences per vertex of the merged weights.
+        workers (int): Number of worker processes, 1 runs everything in this process.
+        renames (dict): Maps source influence names to target names, see weights.rename_table.
+        smooth_iterations (int): Smooth the seam between the vertices the sources changed and the
+            ones they left alone with this many iterations, see smoothing.smooth_weights.
+        seam_rings (int): Rings of vertices smoothed on each side of the seam.
+    Returns:
+        plan.EditPlan: The plan, its results are the target skinClusters combined.
+    """
+    adapter = get_adapter()
+    deformer_graph = get_graph()
+    derived_cache = get_cache()
+
+    plans = []
+    read = {}
+    for target, sources in groups:
+        names = [target] + [source for source in sources if source != target]
+        invalid = [name for name in names if not adapter.exists(name) or adapter.node_type(name) != "skinCluster"]
+        if invalid:
+            om2.MGlobal.displayError(f"Skipping {target}, not skinCluster nodes: {invalid}")
+            continue
+        for name in names:
+            if name not in read:
+                read[name] = derived_cache.weights(name)
+        if len({read[name].vertex_count for name in names}) > 1:
+            om2.MGlobal.displayError(f"Skipping {target}, its skinClusters deform a different number of vertices.")
+            continue
+        ordered = sorted(names, key=lambda name: (_chain_depth(deformer_graph, name), names.index(name)))
+        plans.append((target, names[1:], ordered))
+
+    # Influences a target lacks are added at the bind pose they have in the sources they come from.
+    bind_pre_matrices = {}
+    for target, _, ordered in plans:
+        known = set(read[target].influences)
+        for position, name in enumerate(ordered):
+            if name == target or known.issuperset(read[name].influences):
+                continue
+            for influence, matrix in adapter.bind_pre_matrices(name).items():
+                if not (position and renames and renames.get(influence, influence) != influence):
+                    bind_pre_matrices.setdefault((target, influence), matrix)
+
+    key = _plan_key("combine", groups, passthrough, max_influences, renames, smooth_iterations, seam_rings)
+    matrices_digest = hashlib.blake2b(digest_size=16)
+    for (target, influence), matrix in sorted(bind_pre_matrices.items(), key=lambda item: item[0]):
+        matrices_digest.update(f"{target}.{influence}".encode())
+        matrices_digest.update(np.ascontiguousarray(matrix, dtype=np.float64).tobytes())
+    fingerprint = (deformer_graph.version(), tuple(sorted((name, sparse.digest()) for name, sparse in read.items())), matrices_digest.hexdigest())
+    cached = _plan_cache.get(key, fingerprint)
+    if cached is not None:
+        return cached
+
+    removed = []
+    for target, sources, _ in plans:
+        originals = deformer_graph.original_nodes(target)
+        removed.extend(source for source in sources if originals and deformer_graph.original_nodes(source) == originals and source not in removed)
+    bypass = _plan_bypass(deformer_graph, removed)
+
+    jobs = [[read[name] for name in ordered] for _, _, ordered in plans]
+    with profiling.span("merge_stack", jobs=len(jobs)):
+        results = _map_jobs(functools.partial(weights.merge_stack, passthrough=passthrough, max_influences=max_influences, renames=renames), jobs, workers)
+
+    weight_edits = []
+    for (target, sources, _), merged in zip(plans, results):
+        if smooth_iterations:
+            adjacency = _mesh_adjacency(adapter, deformer_graph.original_nodes(target))
+            if adjacency is None or adjacency.vertex_count != merged.vertex_count:
+                om2.MGlobal.displayWarning(f"{target} does not deform a mesh, its combined weights are not smoothed.")
+            else:
+                changed = weights.changed_rows(read[target].remap(merged.influences), merged)
+                with profiling.span("smooth_weights", skin_cluster=target):
+                    merged = smoothing.smooth_weights(merged, adjacency, smoothing.seam_mask(adjacency, changed, seam_rings), smooth_iterations, max_influences=max_influences)
+        target_influences = read[target].influences
+        known = set(target_influences)
+        missing = [name for name in merged.influences if name not in known]
+        matrices = {name: bind_pre_matrices[(target, name)] for name in missing if (target, name) in bind_pre_matrices}
+        weight_edits.append(plan.WeightEdit(target, tuple(missing), merged.remap(target_influences + missing), f"Combined {sources} into {target}", matrices))
+
+    edit_plan = plan.EditPlan.build("combine_skin_clusters", weight_edits, bypass, removed, results=[target for target, _, _ in plans])
+    _plan_cache.put(key, fingerprint, edit_plan)
+    return edit_plan
+
+
+@profiling.operation
+def combine_skin_clusters(groups, passthrough=None, max_influences=None, workers=None, renames=None, smooth_iterations=0, dry_run=False):
+    """
+    Combine many groups of skinClusters, every group into its target skinCluster, see plan_combine.
+    Args:
+        groups (list): (target skinCluster, [source skinClusters]) pairs.
+        passthrough (list): See weights.merge_weights.
+        max_influences (int): Cap on the influences per vertex of the merged weights.
+        workers (int): Number of worker processes, 1 runs everything in this process.
+        renames (dict): Maps source influence names to target names, see weights.rename_table.
+        smooth_iterations (int): Smooth the merge seams with this many iterations, 0 to not smooth.
+        dry_run (bool): Only plan and report the edits, the scene is left untouched.
+    Returns:
+        list: The target skinClusters that were combined, the plan.EditPlan on a dry run. Their
+            weights from before the combine can be restored with rollback_skin_cluster, the deleted
+            sources only come back with Maya's undo.
+    """
+    edit_plan = plan_combine(groups, passthrough, max_influences, workers, renames, smooth_iterations)
+    if dry_run:
+        om2.MGlobal.displayInfo(str(edit_plan))
+        return edit_plan
+    execute_plan(edit_plan)
+    return list(edit_plan.results)
+
+
+@profiling.operation
+def plan_flatten(skin_cluster, frames=None, pose_count=refit.POSE_COUNT, max_angle=refit.MAX_ANGLE):
+    """
+    Plan the flatten of a chain of stacked skinClusters into its first skinCluster, refitted so one
+    linear blend skinning pass reproduces the whole chain over sampled poses. The other skinClusters
+    of the chain are planned to be taken out of it and deleted.
+    Args:
+        skin_cluster (str): Any skinCluster of the chain.
+        frames (list): Sample the influences at these frames, random poses around the current one when not given.
+        pose_count (int): Number of random poses, when no frames are given.
+        max_angle (float): Largest random rotation of an influence in degrees, when no frames are given.
+    Returns:
+        tuple: The refit.ChainFit and the plan.EditPlan, its results are the flattened skinCluster.
+            None on error.
+    """
+    adapter = get_adapter()
+    deformer_graph = get_graph()
+    if not adapter.exists(skin_cluster) or adapter.node_type(skin_cluster) != "skinCluster":
+        om2.MGlobal.displayError(f"{skin_cluster} is not a skinCluster.")
+        return
+
+    chain = _chain_of(deformer_graph, skin_cluster)
+    if chain is None:
+        om2.MGlobal.displayError(f"The chain of {skin_cluster} branches, it cannot be flattened.")
+        return
+    originals = deformer_graph.original_nodes(chain[0])
+    if not originals or any(adapter.node_type(original) != "mesh" for original in originals):
+        om2.MGlobal.displayError(f"{chain[0]} has no original mesh.")
         return
+
+    layers = [get_cache().weights(name) for name in chain]
+    if len({layer.vertex_count for layer in layers}) > 1:
+        om2.MGlobal.displayError(f"The skinClusters of {chain} deform a different number of vertices.")
+        return
+    bind_pre_matrices = [adapter.bind_pre_matrices(name) for name in chain]
+    influences = weights.InfluenceIndex([layer.influences for layer in layers]).influences
+    if frames:
+        pose_world_matrices = np.stack([adapter.world_matrices(influences, time=frame) for frame in frames])
     else:
-        if mesh == "new":
-            if cmds.objectType(input_shape) == "skinCluster" and cmds.objectType(output_shape) == "mesh": 
-                cmds.connectAttr(f"{input_shape}.outputGeometry[0]", f"{output_shape}.inMesh", force=True)
-                duplicate = cmds.duplicate(output_shape, name=f"{output_shape}Rebuilt")
-                print(duplicate)
+        pose_world_matrices = refit.sample_poses(adapter.world_matrices(influences), pose_count, max_angle)
 
+    with profiling.span("fit_chain", layers=len(layers)):
+        fit = refit.fit_chain(np.concatenate([adapter.mesh_points(original) for original in originals]), layers, bind_pre_matrices, pose_world_matrices, influences)
+    om2.MGlobal.displayInfo(f"Refit of {chain}: max error {fit.max_error:.6g}, mean error {fit.mean_error:.6g}.")
+    if len(chain) < 2:
+        return fit, plan.EditPlan.build("flatten_skin_chain")
 
-    
-rebuild_skinCluster("skinCluster1")
+    target = chain[0]
+    known = set(layers[0].influences)
+    missing = [name for name in fit.weights.influences if name not in known]
+    matrices = {name: fit.bind_pre_matrices[name] for name in missing}
+    weight_edit = plan.WeightEdit(target, tuple(missing), fit.weights.remap(layers[0].influences + missing), f"Flattened {chain} into {target}", matrices)
+    return fit, plan.EditPlan.build("flatten_skin_chain", [weight_edit], _plan_bypass(deformer_graph, chain[1:]), chain[1:], results=[target])
+
+
+@profiling.operation
+def flatten_skin_chain(skin_cluster, frames=None, pose_count=refit.POSE_COUNT, max_angle=refit.MAX_ANGLE, tolerance=refit.MAX_ERROR, dry_run=False):
+    """
+    Replace a chain of stacked skinClusters by its refitted first skinCluster, see plan_flatten.
+    The fit is only applied when every vertex is close enough to the chain. The first skinCluster
+    weights can then be restored with rollback_skin_cluster, the whole flatten is undone with Maya's undo.
+    Args:
+        skin_cluster (str): Any skinCluster of the chain.
+        frames (list): Sample the influences at these frames, random poses around the current one when not given.
+        pose_count (int): Number of random poses, when no frames are given.
+        max_angle (float): Largest random rotation of an influence in degrees, when no frames are given.
+        tolerance (float): Do not apply the fit when a vertex is off by more than this distance,
+            None to apply it whatever its error.
+        dry_run (bool): Only fit and report the edits, the scene is left untouched.
+    Returns:
+        refit.ChainFit: The fit, its skin_cluster is set when it was applied. None on error.
+    """
+    planned = plan_flatten(skin_cluster, frames, pose_count, max_angle)
+    if planned is None:
+        return
+    fit, edit_plan = planned
+    if dry_run or edit_plan.is_empty:
+        om2.MGlobal.displayInfo(str(edit_plan))
+        return fit
+    if tolerance is not None and fit.max_error > tolerance:
+        om2.MGlobal.displayWarning(f"{skin_cluster} chain not flattened, the refit error {fit.max_error:.6g} exceeds {tolerance}.")
+        return fit
+
+    execute_plan(edit_plan)
+    fit.skin_cluster = edit_plan.results[0]
+    return fit
+
+
+@profiling.operation
+def rebuild_skinCluster(rebuildable_skinCluster, mesh="new", new_mesh=None):
+    rebuilt = rebuild_skin_clusters([rebuildable_skinCluster], mesh=mesh, new_mesh=new_mesh)
+    return rebuilt[0] if rebuilt else None
+
+
+@profiling.operation
+def rebuild_skin_clusters(skin_clusters, mesh="new", new_mesh=None, max_influences=None, smooth_iterations=0, dry_run=False):
+    """
+    Rebuild many skinClusters. The edits are planned first, see plan_rebuild, then applied as one batch.
+    Args:
+        skin_clusters (list): The skinClusters to rebuild.
+        mesh (str): "new" to rebuild on a duplicate of the deformed mesh, or on new_mesh when given.
+        new_mesh (str): A mesh of any topology the weights are transferred onto.
+        max_influences (int): Cap on the influences per vertex of transferred weights.
+        smooth_iterations (int): Smooth the influence seams of transferred weights, see transfer_skin_cluster.
+        dry_run (bool): Only plan and report the edits, not supported when transferring onto new_mesh.
+    Returns:
+        list: The created meshes, or the created skinClusters when transferring onto new_mesh. The
+            plan.EditPlan on a dry run.
+    """
+    if mesh == "new" and new_mesh is not None:
+        if dry_run:
+            om2.MGlobal.displayError("Dry runs are not supported when transferring onto a new mesh.")
+            return
+        created = []
+        for rebuildable_skinCluster in skin_clusters:
+            created.extend(transfer_skin_cluster(rebuildable_skinCluster, [new_mesh], max_influences, smooth_iterations) or [])
+        return created
+
+    edit_plan = plan_rebuild(skin_clusters, mesh)
+    if dry_run:
+        om2.MGlobal.displayInfo(str(edit_plan))
+        return edit_plan
+    return execute_plan(edit_plan)
+
+
+@profiling.operation
+def plan_rebuild(skin_clusters, mesh="new"):
+    """
+    Plan the rebuild of many skinClusters on duplicates of their deformed meshes. Only the graph is
+    queried, a plan for an unchanged graph is reused.
+    Args:
+        skin_clusters (list): The skinClusters to rebuild.
+        mesh (str): "new" to rebuild on a duplicate of the deformed mesh, anything else only reports.
+    Returns:
+        plan.EditPlan: The plan, its results are the names of the planned duplicates.
+    """
+    adapter = get_adapter()
+    deformer_graph = get_graph()
+    key = _plan_key("rebuild", skin_clusters, mesh)
+    fingerprint = deformer_graph.version()
+    cached = _plan_cache.get(key, fingerprint)
+    if cached is not None:
+        return cached
+
+    connections = []
+    duplicates = []
+    for rebuildable_skinCluster in skin_clusters:
+        if not adapter.exists(rebuildable_skinCluster) or adapter.node_type(rebuildable_skinCluster) != "skinCluster":
+            om2.MGlobal.displayError(f"{rebuildable_skinCluster} does not exist or is not a skinCluster node.")
+            continue
+
+        record = deformer_graph.record(rebuildable_skinCluster)
+        if record is None or not record.inputs or not record.outputs:
+            om2.MGlobal.displayError(f"{rebuildable_skinCluster} is missing its input or output geometry.")
+            continue
+
+        for index in record.indices():
+            input_plug = record.inputs.get(index)
+            output_plugs = record.outputs.get(index)
+            if input_plug is None or not output_plugs:
+                continue
+            output_shape = output_plugs[0].node
+            if adapter.node_type(input_plug.node) == "mesh" and adapter.node_type(output_shape) == "mesh":
+                om2.MGlobal.displayInfo(f"{rebuildable_skinCluster} geometry {index} is already rebuilt.")
+            elif mesh == "new" and adapter.node_type(input_plug.node) == "skinCluster" and adapter.node_type(output_shape) == "mesh":
+                connections.append((str(input_plug), f"{output_shape}.inMesh"))
+                duplicates.append((output_shape, f"{output_shape}Rebuilt"))
+
+    edit_plan = plan.EditPlan.build("rebuild_skin_clusters", connections=connections, duplicates=duplicates, results=[name for _, name in duplicates])
+    _plan_cache.put(key, fingerprint, edit_plan)
+    return edit_plan
+
+
+def _topology_hash(adapter, skin_cluster):
+    """
+    Hash the topology of the meshes a skinCluster deforms.
+    Args:
+        adapter (dcc.MayaAdapter): The adapter to query.
+        skin_cluster (str): The skinCluster name.
+    Returns:
+        str: The topology hash, the hash of the joined per mesh hashes for several geometries. None
+            if an original shape is not a mesh.
+    """
+    shapes = get_graph().original_nodes(skin_cluster)
+    if not shapes or any(adapter.node_type(shape) != "mesh" for shape in shapes):
+        return None
+    hashes = [get_cache().fingerprint(shape)[0] for shape in shapes]
+    return hashes[0] if len(hashes) == 1 else hashlib.blake2b("".join(hashes).encode(), digest_size=16).hexdigest()
+
+
+@profiling.operation
+def export_weights(skin_cluster, path, dtype=np.float32):
+    """
+    Export the weights of a skinCluster to a binary weight file.
+    Args:
+        skin_cluster (str): The skinCluster name.
+        path (str): The file path.
+        dtype (np.dtype): Value type stored on disk, float32 or float64.
+    Returns:
+        str: The file path, None if the node is not a skinCluster.
+    """
+    adapter = get_adapter()
+    if not adapter.exists(skin_cluster) or adapter.node_type(skin_cluster) != "skinCluster":
+        om2.MGlobal.displayError(f"{skin_cluster} does not exist or is not a skinCluster node.")
+        return
+
+    sparse_weights = get_cache().weights(skin_cluster).astype(dtype)
+    weight_file.write(path, sparse_weights, topology=_topology_hash(adapter, skin_cluster), skin_cluster=skin_cluster, bind_pre_matrices=adapter.bind_pre_matrices(skin_cluster))
+    om2.MGlobal.displayInfo(f"Exported {skin_cluster} weights to {path}.")
+    return path
+
+
+@profiling.operation
+def import_weights(skin_cluster, path, vertex_range=None, influences=None, check_topology=True):
+    """
+    Import weights from a binary weight file into a skinCluster, matching influences by name.
+    Influences missing from the skinCluster are added.
+    Args:
+        skin_cluster (str): The skinCluster name.
+        path (str): The file path.
+        vertex_range (tuple): (start, stop) vertices to import, the others keep their weights.
+        influences (list): Only import the weights of these influences.
+        check_topology (bool): Refuse files saved from a mesh with another topology.
+    Returns:
+        str: The skinCluster, None if nothing was imported.
+    """
+    adapter = get_adapter()
+    if not adapter.exists(skin_cluster) or adapter.node_type(skin_cluster) != "skinCluster":
+        om2.MGlobal.displayError(f"{skin_cluster} does not exist or is not a skinCluster node.")
+        return
+
+    header = weight_file.read_header(path)
+    if check_topology and header["topology"] is not None:
+        topology = _topology_hash(adapter, skin_cluster)
+        if topology is not None and topology != header["topology"]:
+            om2.MGlobal.displayError(f"{path} was saved from a mesh with a different topology than {skin_cluster}.")
+            return
+
+    vertex_count = adapter.vertex_count(skin_cluster)
+    start, stop = vertex_range or (0, header["vertex_count"])
+    if stop > vertex_count or (vertex_range is None and header["vertex_count"] != vertex_count):
+        om2.MGlobal.displayError(f"{path} holds {header['vertex_count']} vertices, {skin_cluster} deforms {vertex_count}.")
+        return
+
+    imported, _ = weight_file.read(path, vertex_range=vertex_range, influences=influences)
+    current_influences = get_cache().influences(skin_cluster)
+    known = set(current_influences)
+    missing = [name for name in imported.influences if name not in known]
+    adapter.add_influences(skin_cluster, missing, {name: np.array(matrix).reshape(4, 4) for name, matrix in header.get("bind_pre_matrices", {}).items()})
+    imported = imported.remap(current_influences + missing)
+
+    if vertex_range is not None or influences is not None:
+        current = get_cache().weights(skin_cluster).remap(current_influences + missing)
+        if influences is not None:
+            imported = weights.replace_influences(current.slice_rows(start, stop), imported, influences)
+        imported = current.replace_rows(start, imported)
+
+    written = adapter.write_weights(skin_cluster, imported)
+    om2.MGlobal.displayInfo(f"Imported {path} weights into {skin_cluster}, {written} vertices written.")
+    return skin_cluster
+
+
+@profiling.operation
+def transfer_skin_cluster(skin_cluster, new_meshes, max_influences=None, smooth_iterations=0, seam_rings=smoothing.SEAM_RINGS):
+    """
+    Bind meshes of any topology to the influences of a skinCluster and transfer its weights.
+    The source meshes, every geometry of the skinCluster, are indexed once as one, every target
+    mesh is then resolved in vectorized batches with closest point on triangle and barycentric
+    interpolation.
+    Args:
+        skin_cluster (str): The source skinCluster.
+        new_meshes (list): The meshes to bind.
+        max_influences (int): Cap on the influences per vertex of the transferred weights.
+        smooth_iterations (int): Smooth the transferred weights around the borders between dominant
+            influences with this many iterations, 0 to not smooth.
+        seam_rings (int): Rings of vertices smoothed on each side of those borders.
+    Returns:
+        list: The created skinClusters, None if the source cannot be transferred.
+    """
+    adapter = get_adapter()
+    if not adapter.exists(skin_cluster) or adapter.node_type(skin_cluster) != "skinCluster":
+        om2.MGlobal.displayError(f"{skin_cluster} does not exist or is not a skinCluster node.")
+        return
+
+    source_shapes = get_graph().original_nodes(skin_cluster)
+    if not source_shapes or any(adapter.node_type(shape) != "mesh" for shape in source_shapes):
+        om2.MGlobal.displayError(f"{skin_cluster} has no original mesh to transfer from.")
+        return
+
+    source_weights = get_cache().weights(skin_cluster)
+    with profiling.span("index_mesh", shapes=len(source_shapes)):
+        mesh_index = get_cache().mesh_index(source_shapes)
+
+    created = []
+    for new_mesh in new_meshes:
+        with profiling.span("transfer_weights", mesh=new_mesh):
+            transferred = transfer.transfer_weights(source_weights, mesh_index, adapter.mesh_points(new_mesh), max_influences)
+        if smooth_iterations:
+            adjacency = _mesh_adjacency(adapter, new_mesh)
+            mask = smoothing.seam_mask(adjacency, smoothing.dominant_influences(transferred), seam_rings)
+            with profiling.span("smooth_weights", mesh=new_mesh):
+                transferred = smoothing.smooth_weights(transferred, adjacency, mask, smooth_iterations, max_influences=max_influences)
+        new_skin_cluster = adapter.create_skin_cluster(new_mesh, source_weights.influences, name=f"{new_mesh}_skinCluster")
+        adapter.write_weights(new_skin_cluster, transferred.remap(adapter.influences(new_skin_cluster)))
+        om2.MGlobal.displayInfo(f"Transferred {skin_cluster} weights to {new_mesh}.")
+        created.append(new_skin_cluster)
+    return created
+
+
+def _mesh_adjacency(adapter, shapes):
+    """
+    Get the vertex adjacency of meshes, joined in order like the geometries of a skinCluster.
+    Args:
+        adapter (dcc.MayaAdapter): The adapter to query.
+        shapes (list): The mesh shape names, or a single name.
+    Returns:
+        smoothing.Adjacency: The adjacency, None if a shape is not a mesh.
+    """
+    shapes = [shapes] if isinstance(shapes, str) else list(shapes)
+    if not shapes or any(adapter.node_type(shape) != "mesh" for shape in shapes):
+        return None
+    with profiling.span("mesh_adjacency", shapes=len(shapes)):
+        return get_cache().adjacency(shapes)
+
+
+@profiling.operation
+def smooth_skin_cluster(skin_cluster, iterations=smoothing.ITERATIONS, strength=smoothing.STRENGTH, vertices=None, seam_rings=smoothing.SEAM_RINGS, max_influences=None):
+    """
+    Smooth the weights of a skinCluster, restricted to some vertices or to the band around the
+    borders between dominant influences. The previous weights can be restored with rollback_skin_cluster.
+    Args:
+        skin_cluster (str): The skinCluster name.
+        iterations (int): Number of smoothing iterations.
+        strength (float): Fraction of the way to the neighbour average moved per iteration.
+        vertices (list): Indices of the vertices to smooth, the influence seams when not given.
+        seam_rings (int): Rings of vertices smoothed on each side of the seams, when no vertices are given.
+        max_influences (int): Cap on the influences per smoothed vertex.
+    Returns:
+        int: The number of vertices written, None on error.
+    """
+    adapter = get_adapter()
+    if not adapter.exists(skin_cluster) or adapter.node_type(skin_cluster) != "skinCluster":
+        om2.MGlobal.displayError(f"{skin_cluster} does not exist or is not a skinCluster node.")
+        return
+    current = get_cache().weights(skin_cluster)
+    adjacency = _mesh_adjacency(adapter, get_graph().original_nodes(skin_cluster))
+    if adjacency is None or adjacency.vertex_count != current.vertex_count:
+        om2.MGlobal.displayError(f"{skin_cluster} does not deform a mesh, it cannot be smoothed.")
+        return
+
+    if vertices is None:
+        mask = smoothing.seam_mask(adjacency, smoothing.dominant_influences(current), seam_rings)
+    else:
+        mask = np.zeros(current.vertex_count, dtype=bool)
+        mask[np.asarray(vertices, dtype=np.int64)] = True
+    _snapshot_store.take(skin_cluster, current, "smooth_skin_cluster", adapter.bind_pre_matrices(skin_cluster))
+    smoothed = smoothing.smooth_weights(current, adjacency, mask, iterations, strength, max_influences)
+    written = adapter.write_weights(skin_cluster, smoothed)
+    om2.MGlobal.displayInfo(f"Smoothed {int(mask.sum())} vertices of {skin_cluster}, {written} vertices written.")
+    return written
@@ -0,0 +1,250 @@
+import json
+
+from PySide2 import QtCore
+
+
+"""
+Qt item models behind the skinCluster lists.
+Rows are compact records in a plain Python list, the views only ask for the rows they paint, and
+every move or removal is a single batched model operation however many rows it touches.
+"""
+
+
+MIME_TYPE = "application/x-skinclustermanager-rows"
+# Removing more separate row ranges than this resets the model instead of signalling every range.
+MAX_REMOVE_RANGES = 64
+
+NameRole = QtCore.Qt.UserRole + 1
+EntryRole = QtCore.Qt.UserRole + 2
+
+
+class SkinClusterEntry(object):
+    """
+    One row of a skinCluster list.
+    """
+
+    __slots__ = ("name", "vertex_count", "influence_count", "status")
+
+    def __init__(self, name, vertex_count=None, influence_count=None, status=None):
+        """
+        Initialize the SkinClusterEntry.
+        Args:
+            name (str): The skinCluster name.
+            vertex_count (int): Number of deformed vertices, None when unknown.
+            influence_count (int): Number of influences, None when unknown.
+            status (str): Short cached state, e.g. "stacked" or "missing".
+        """
+
+        self.name = name
+        self.vertex_count = vertex_count
+        self.influence_count = influence_count
+        self.status = status
+
+    def __repr__(self):
+        return f"SkinClusterEntry({self.name}, vertices={self.vertex_count}, influences={self.influence_count}, status={self.status})"
+
+    def tooltip(self):
+        lines = [self.name]
+        if self.vertex_count is not None:
+            lines.append(f"Vertices: {self.vertex_count}")
+        if self.influence_count is not None:
+            lines.append(f"Influences: {self.influence_count}")
+        if self.status:
+            lines.append(f"Status: {self.status}")
+        return "\n".join(lines)
+
+
+def _ranges(rows):
+    """
+    Group row numbers into contiguous ranges.
+    Args:
+        rows (list): Row numbers, sorted ascending without duplicates.
+    Returns:
+        list: (first, last) inclusive ranges, ascending.
+    """
+
+    ranges = []
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return [tuple(pair) for pair in ranges]
+
+
+class SkinClusterListModel(QtCore.QAbstractListModel):
+    """
+    List model of SkinClusterEntry rows.
+    """
+
+    def __init__(self, parent=None):
+        """
+        Initialize the SkinClusterListModel.
+        Args:
+            parent (QObject): The parent object.
+        """
+
+        super(SkinClusterListModel, self).__init__(parent)
+        self.entries = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        if role in (QtCore.Qt.DisplayRole, NameRole):
+            return entry.name
+        if role == QtCore.Qt.ToolTipRole:
+            return entry.tooltip()
+        if role == EntryRole:
+            return entry
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.ItemIsDropEnabled
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsDragEnabled
+
+    def supportedDropActions(self):
+        return QtCore.Qt.MoveAction
+
+    def mimeTypes(self):
+        return [MIME_TYPE]
+
+    def mimeData(self, indexes):
+        mime_data = QtCore.QMimeData()
+        rows = sorted({index.row() for index in indexes if index.isValid()})
+        mime_data.setData(MIME_TYPE, QtCore.QByteArray(json.dumps({"model": id(self), "rows": rows}).encode()))
+        return mime_data
+
+    def dropMimeData(self, mime_data, action, row, column, parent):
+        if action != QtCore.Qt.MoveAction or not mime_data.hasFormat(MIME_TYPE):
+            return False
+        payload = json.loads(bytes(mime_data.data(MIME_TYPE)).decode())
+        if payload["model"] != id(self):
+            return False
+        if row < 0:
+            row = parent.row() if parent.isValid() else len(self.entries)
+        self.move_rows(payload["rows"], row)
+        # The rows are already moved, returning False keeps the view from removing the originals.
+        return False
+
+    def names(self):
+        """
+        Get the skinCluster name of every row.
+        Returns:
+            list: The names, in row order.
+        """
+
+        return [entry.name for entry in self.entries]
+
+    def append(self, entries):
+        """
+        Append rows in one insertion.
+        Args:
+            entries (list): The SkinClusterEntry rows to add.
+        """
+
+        entries = list(entries)
+        if not entries:
+            return
+        first = len(self.entries)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(entries) - 1)
+        self.entries.extend(entries)
+        self.endInsertRows()
+
+    def replace(self, entries):
+        """
+        Replace every row at once.
+        Args:
+            entries (list): The new SkinClusterEntry rows.
+        """
+
+        self.beginResetModel()
+        self.entries = list(entries)
+        self.endResetModel()
+
+    def take_rows(self, rows):
+        """
+        Remove rows and return them, one removal per contiguous range or a single reset when the
+        selection is scattered.
+        Args:
+            rows (list): The row numbers, in any order.
+        Returns:
+            list: The removed SkinClusterEntry rows, in row order.
+        """
+
+        rows = sorted(set(rows))
+        if not rows:
+            return []
+        taken = [self.entries[row] for row in rows]
+        ranges = _ranges(rows)
+        if len(ranges) > MAX_REMOVE_RANGES:
+            removed = set(rows)
+            self.beginResetModel()
+            self.entries = [entry for row, entry in enumerate(self.entries) if row not in removed]
+            self.endResetModel()
+            return taken
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            del self.entries[first:last + 1]
+            self.endRemoveRows()
+        return taken
+
+    def move_rows(self, rows, destination):
+        """
+        Move rows in front of another row, keeping their order, in a single layout change.
+        Args:
+            rows (list): The row numbers to move.
+            destination (int): The row they are inserted before, the row count to move them last.
+        """
+
+        rows = set(rows)
+        if not rows:
+            return
+        self.layoutAboutToBeChanged.emit()
+        old_persistent = self.persistentIndexList()
+        old_rows = [index.row() for index in old_persistent]
+
+        order = list(range(len(self.entries)))
+        moved = [row for row in order if row in rows]
+        kept_before = [row for row in order[:destination] if row not in rows]
+        kept_after = [row for row in order[destination:] if row not in rows]
+        order = kept_before + moved + kept_after
+        self.entries = [self.entries[row] for row in order]
+
+        new_row = {old: new for new, old in enumerate(order)}
+        self.changePersistentIndexList(old_persistent, [self.index(new_row[row]) for row in old_rows])
+        self.layoutChanged.emit()
+
+
+class SkinClusterFilterModel(QtCore.QSortFilterProxyModel):
+    """
+    Case insensitive name filter over a SkinClusterListModel.
+    """
+
+    def __init__(self, source_model, parent=None):
+        """
+        Initialize the SkinClusterFilterModel.
+        Args:
+            source_model (SkinClusterListModel): The filtered model.
+            parent (QObject): The parent object.
+        """
+
+        super(SkinClusterFilterModel, self).__init__(parent)
+        self.setSourceModel(source_model)
+        self.setFilterRole(NameRole)
+        self.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+
+    def source_rows(self, proxy_indexes):
+        """
+        Map filtered indexes to rows of the source model.
+        Args:
+            proxy_indexes (list): QModelIndex of this model.
+        Returns:
+            list: The source row numbers, sorted.
+        """
+
+        return sorted({self.mapToSource(index).row() for index in proxy_indexes})
@@ -0,0 +1,132 @@
+import collections
+
+
+"""
+Edit plans of the scene changing operations.
+An operation first reads the scene and computes everything into an immutable EditPlan, which can be
+inspected or printed as a dry run. Executing it then applies the weight writes, one batched graph
+edit for every connection and deletion, and the duplicates, in that order.
+"""
+
+
+class WeightEdit(collections.namedtuple("WeightEdit", ["skin_cluster", "add_influences", "weights", "description", "bind_pre_matrices"], defaults=(None,))):
+    """
+    Weights written to a skinCluster.
+    skin_cluster (str): The skinCluster name.
+    add_influences (tuple): Influences added to it first, with zero weight.
+    weights (weights.SparseWeights): The new weights, columns in the skinCluster influence order
+        followed by add_influences.
+    description (str): What the write does, shown in dry runs and messages.
+    bind_pre_matrices (dict): Added influence name to the bind pre matrix it gets, the influences
+        missing from it are bound at their current pose.
+    """
+
+    __slots__ = ()
+
+
+class EditPlan(collections.namedtuple("EditPlan", ["operation", "weight_edits", "connections", "deletions", "duplicates", "results"])):
+    """
+    Every scene edit of an operation.
+    operation (str): The operation that made the plan.
+    weight_edits (tuple): WeightEdit per written skinCluster.
+    connections (tuple): (source plug, destination plug) force connections.
+    deletions (tuple): Nodes deleted, after the connections.
+    duplicates (tuple): (node, name) duplicates made last.
+    results (tuple): The nodes the operation reports as its result.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def build(cls, operation, weight_edits=(), connections=(), deletions=(), duplicates=(), results=()):
+        """
+        Build an EditPlan, freezing every list into a tuple.
+        Returns:
+            EditPlan: The plan.
+        """
+
+        return cls(
+            operation,
+            tuple(weight_edits),
+            tuple((str(source), str(destination)) for source, destination in connections),
+            tuple(deletions),
+            tuple(duplicates),
+            tuple(results),
+        )
+
+    @property
+    def is_empty(self):
+        return not (self.weight_edits or self.connections or self.deletions or self.duplicates)
+
+    def describe(self):
+        """
+        Describe the plan, one line per edit.
+        Returns:
+            list: The lines, in execution order.
+        """
+
+        lines = []
+        for edit in self.weight_edits:
+            added = f", adding {list(edit.add_influences)}" if edit.add_influences else ""
+            lines.append(f"{edit.description}: write {edit.weights.vertex_count} vertices x {edit.weights.influence_count} influences{added}")
+        lines.extend(f"connect {source} -> {destination}" for source, destination in self.connections)
+        lines.extend(f"delete {node}" for node in self.deletions)
+        lines.extend(f"duplicate {node} as {name}" for node, name in self.duplicates)
+        return lines
+
+    def __str__(self):
+        return "\n".join([f"{self.operation} plan:"] + [f"    {line}" for line in self.describe() or ["nothing to do"]])
+
+
+class PlanCache(object):
+    """
+    Small least recently used cache of plans, keyed by the operation arguments and checked against
+    a fingerprint of the scene inputs they were computed from.
+    """
+
+    def __init__(self, size=16):
+        """
+        Initialize the PlanCache.
+        Args:
+            size (int): Number of plans kept.
+        """
+
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, fingerprint):
+        """
+        Get a cached plan.
+        Args:
+            key (hashable): The operation and its arguments.
+            fingerprint (hashable): The state of the inputs the plan must have been computed from.
+        Returns:
+            EditPlan: The plan, None if it is not cached or its inputs changed.
+        """
+
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != fingerprint:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, fingerprint, edit_plan):
+        """
+        Cache a plan.
+        Args:
+            key (hashable): The operation and its arguments.
+            fingerprint (hashable): The state of the inputs the plan was computed from.
+            edit_plan (EditPlan): The plan.
+        """
+
+        self.entries[key] = (fingerprint, edit_plan)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
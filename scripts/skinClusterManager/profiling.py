@@ -0,0 +1,326 @@
+import collections
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+"""
+Opt-in instrumentation of the skinCluster logics.
+Operations open nested timing spans and bump counters (cmds calls, vertices read and written,
+bytes); a recorder keeps them and exports a Chrome trace_event file (chrome://tracing, Perfetto)
+and a summary table. While nothing records, a span is a single global check.
+"""
+
+
+_recorder = None
+
+
+class _NullSpan(object):
+    """
+    Span used while nothing records, entering and leaving it does nothing.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span(object):
+    """
+    A timed section, with the counters bumped while it was open.
+    """
+
+    __slots__ = ("recorder", "name", "args", "counters", "start", "duration", "child_duration", "thread", "depth", "memory_base", "memory_peak")
+
+    def __init__(self, recorder, name, args):
+        """
+        Initialize the Span.
+        Args:
+            recorder (Recorder): The recorder it reports to.
+            name (str): The span name.
+            args (dict): Extra values shown with the span in the trace.
+        """
+
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+        self.counters = {}
+        self.start = 0.0
+        self.duration = 0.0
+        self.child_duration = 0.0
+        self.thread = threading.get_ident()
+        self.depth = 0
+        self.memory_base = 0
+        self.memory_peak = 0
+
+    def __enter__(self):
+        self.recorder._open(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration = time.perf_counter() - self.start
+        self.recorder._close(self)
+        return False
+
+
+class Recorder(object):
+    """
+    Collects the spans and counters of the instrumented operations.
+    """
+
+    def __init__(self, track_memory=False):
+        """
+        Initialize the Recorder.
+        Args:
+            track_memory (bool): Measure the bytes allocated in every span with tracemalloc, slower.
+        """
+
+        self.track_memory = track_memory
+        self.started_tracing = False
+        self.adapter = None
+        self.spans = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _open(self, span):
+        stack = self._stack()
+        span.depth = len(stack)
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].memory_peak = max(stack[-1].memory_peak, peak)
+            # The peak is shared, so it is reset per span and handed back to the parent on close.
+            tracemalloc.reset_peak()
+            span.memory_base = span.memory_peak = current
+        stack.append(span)
+
+    def _close(self, span):
+        stack = self._stack()
+        stack.pop()
+        if self.track_memory:
+            span.memory_peak = max(span.memory_peak, tracemalloc.get_traced_memory()[1])
+            span.counters["bytes_allocated"] = span.counters.get("bytes_allocated", 0) + span.memory_peak - span.memory_base
+            if stack:
+                stack[-1].memory_peak = max(stack[-1].memory_peak, span.memory_peak)
+        if stack:
+            stack[-1].child_duration += span.duration
+        self.spans.append(span)
+
+    def count(self, counter, amount=1):
+        """
+        Bump a counter of every open span.
+        Args:
+            counter (str): The counter name.
+            amount (int): The increment.
+        """
+
+        for span in self._stack():
+            span.counters[counter] = span.counters.get(counter, 0) + amount
+
+    def trace_events(self):
+        """
+        Get the spans as Chrome trace events.
+        Returns:
+            list: Complete ("X") events, times in microseconds.
+        """
+
+        pid = os.getpid()
+        return [
+            {
+                "name": span.name,
+                "cat": "skinClusterManager",
+                "ph": "X",
+                "ts": (span.start - self.origin) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread,
+                "args": dict(span.args, **span.counters),
+            }
+            for span in sorted(self.spans, key=lambda span: span.start)
+        ]
+
+    def write_trace(self, path):
+        """
+        Write the spans to a Chrome trace_event JSON file.
+        Args:
+            path (str): The file path.
+        Returns:
+            str: The file path.
+        """
+
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, file)
+        return path
+
+    def totals(self):
+        """
+        Aggregate the spans by name.
+        Returns:
+            dict: Span name to its calls, total and self seconds and summed counters.
+        """
+
+        totals = collections.OrderedDict()
+        for span in sorted(self.spans, key=lambda span: span.start):
+            entry = totals.setdefault(span.name, {"calls": 0, "total": 0.0, "self": 0.0, "counters": collections.Counter()})
+            entry["calls"] += 1
+            entry["total"] += span.duration
+            entry["self"] += span.duration - span.child_duration
+            entry["counters"].update(span.counters)
+        return totals
+
+    def summary(self):
+        """
+        Format the aggregated spans as a text table.
+        Returns:
+            str: The table.
+        """
+
+        totals = self.totals()
+        counters = sorted({name for entry in totals.values() for name in entry["counters"]})
+        width = max([len(name) for name in totals] + [4]) + 2
+        lines = [f"{'span':<{width}}{'calls':>7}{'total ms':>11}{'self ms':>11}" + "".join(f"{name:>18}" for name in counters)]
+        for name, entry in totals.items():
+            lines.append(
+                f"{name:<{width}}{entry['calls']:>7}{entry['total'] * 1000.0:>11.2f}{entry['self'] * 1000.0:>11.2f}"
+                + "".join(f"{entry['counters'].get(counter, 0):>18}" for counter in counters)
+            )
+        return "\n".join(lines)
+
+
+class CountingCommands(object):
+    """
+    Proxy of maya.cmds that counts every command call on the active recorder.
+    """
+
+    def __init__(self, cmds):
+        """
+        Initialize the CountingCommands.
+        Args:
+            cmds (module): The wrapped maya.cmds module.
+        """
+
+        self.wrapped = cmds
+
+    def __getattr__(self, name):
+        command = getattr(self.wrapped, name)
+        if not callable(command):
+            return command
+
+        @functools.wraps(command)
+        def counted(*args, **kwargs):
+            count("cmds_calls")
+            return command(*args, **kwargs)
+        return counted
+
+
+def span(name, **args):
+    """
+    Open a timing span, e.g. with profiling.span("read_weights", skin_cluster=name): ...
+    Args:
+        name (str): The span name.
+        args: Extra values shown with the span in the trace.
+    Returns:
+        Span: The span context manager, a shared no-op one while nothing records.
+    """
+
+    if _recorder is None:
+        return _NULL_SPAN
+    return Span(_recorder, name, args)
+
+
+def count(counter, amount=1):
+    """
+    Bump a counter of the open spans, nothing happens while nothing records.
+    Args:
+        counter (str): The counter name.
+        amount (int): The increment.
+    """
+
+    if _recorder is not None:
+        _recorder.count(counter, amount)
+
+
+def operation(function):
+    """
+    Decorator running a function in a span named after it.
+    Args:
+        function (callable): The function to instrument.
+    Returns:
+        callable: The instrumented function.
+    """
+
+    @functools.wraps(function)
+    def instrumented(*args, **kwargs):
+        if _recorder is None:
+            return function(*args, **kwargs)
+        with Span(_recorder, function.__name__, {}):
+            return function(*args, **kwargs)
+    return instrumented
+
+
+def enable(adapter=None, track_memory=False):
+    """
+    Start recording.
+    Args:
+        adapter (dcc.MayaAdapter): Count the cmds calls made through this adapter.
+        track_memory (bool): Measure the bytes allocated in every span with tracemalloc, slower.
+    Returns:
+        Recorder: The recorder collecting the spans.
+    """
+
+    global _recorder
+    disable()
+    recorder = Recorder(track_memory)
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        recorder.started_tracing = True
+    if adapter is not None and not isinstance(adapter.cmds, CountingCommands):
+        adapter.cmds = CountingCommands(adapter.cmds)
+        recorder.adapter = adapter
+    _recorder = recorder
+    return recorder
+
+
+def disable():
+    """
+    Stop recording.
+    Returns:
+        Recorder: The recorder that was active, None if nothing was recording.
+    """
+
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is None:
+        return None
+    if recorder.adapter is not None and isinstance(recorder.adapter.cmds, CountingCommands):
+        recorder.adapter.cmds = recorder.adapter.cmds.wrapped
+    if recorder.started_tracing:
+        tracemalloc.stop()
+    return recorder
+
+
+def recording():
+    """
+    Get the active recorder.
+    Returns:
+        Recorder: The recorder, None while nothing records.
+    """
+
+    return _recorder
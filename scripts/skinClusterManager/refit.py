@@ -0,0 +1,268 @@
+import numpy as np
+
+from skinClusterManager import weights
+
+
+"""
+Least-squares refit of stacked skinCluster chains into a single weight set.
+Every vertex is deformed through the whole chain for a set of sampled joint poses, then one set of
+non-negative weights summing to one is fitted so a single linear blend skinning pass over the
+original points reproduces those positions as closely as possible. The constrained least-squares
+problems of all the vertices of a batch are solved together with accelerated projected gradient,
+projecting onto the probability simplex at every step.
+"""
+
+
+# Sampled poses, the current pose included.
+POSE_COUNT = 16
+# Largest random rotation of an influence around its own pivot, in degrees.
+MAX_ANGLE = 60.0
+# Vertices fitted per batch, bounds the temporary arrays to poses x batch x influences x 4 x 4.
+BATCH_SIZE = 4096
+# Projected gradient iterations per batch, the loop stops earlier once every vertex has converged.
+ITERATIONS = 500
+TOLERANCE = 1e-10
+# Largest vertex error of a fit applied by default, in scene units.
+MAX_ERROR = 0.1
+
+
+class ChainFit(object):
+    """
+    Result of a chain refit.
+    """
+
+    def __init__(self, sparse_weights, bind_pre_matrices, residuals):
+        """
+        Initialize the ChainFit.
+        Args:
+            sparse_weights (weights.SparseWeights): The fitted weights over the union of the chain influences.
+            bind_pre_matrices (dict): Influence name to the 4x4 bind pre matrix the weights were fitted with.
+            residuals (np.ndarray): Root mean square distance between the refit and the chain of every
+                vertex over the sampled poses, in scene units.
+        """
+
+        self.weights = sparse_weights
+        self.bind_pre_matrices = bind_pre_matrices
+        self.residuals = residuals
+        self.skin_cluster = None
+
+    @property
+    def max_error(self):
+        return float(self.residuals.max(initial=0.0))
+
+    @property
+    def mean_error(self):
+        return float(self.residuals.mean()) if len(self.residuals) else 0.0
+
+    def __repr__(self):
+        return f"ChainFit({self.weights.shape}, max_error={self.max_error:.6g}, mean_error={self.mean_error:.6g})"
+
+
+def _translation(offsets):
+    matrices = np.zeros(offsets.shape[:-1] + (4, 4))
+    matrices[..., [0, 1, 2, 3], [0, 1, 2, 3]] = 1.0
+    matrices[..., 3, :3] = offsets
+    return matrices
+
+
+def _rotations(axes, angles):
+    """
+    Build row vector rotation matrices, Maya's convention, from axes and angles.
+    Args:
+        axes (np.ndarray): Unit axes of shape (..., 3).
+        angles (np.ndarray): Angles in radians of shape (...).
+    Returns:
+        np.ndarray: 4x4 matrices of shape (..., 4, 4).
+    """
+
+    x, y, z = axes[..., 0], axes[..., 1], axes[..., 2]
+    cos, sin = np.cos(angles), np.sin(angles)
+    one = 1.0 - cos
+    matrices = _translation(np.zeros(axes.shape))
+    matrices[..., 0, :3] = np.stack([cos + x * x * one, x * y * one + z * sin, x * z * one - y * sin], axis=-1)
+    matrices[..., 1, :3] = np.stack([x * y * one - z * sin, cos + y * y * one, y * z * one + x * sin], axis=-1)
+    matrices[..., 2, :3] = np.stack([x * z * one + y * sin, y * z * one - x * sin, cos + z * z * one], axis=-1)
+    return matrices
+
+
+def sample_poses(world_matrices, pose_count=POSE_COUNT, max_angle=MAX_ANGLE, seed=0):
+    """
+    Sample poses by rotating every influence around its own pivot, on top of its current world matrix.
+    Args:
+        world_matrices (np.ndarray): Current world matrices of shape (influences, 4, 4).
+        pose_count (int): Number of poses, the first one is the current pose.
+        max_angle (float): Largest rotation in degrees.
+        seed (int): Random seed, the same seed samples the same poses.
+    Returns:
+        np.ndarray: World matrices of shape (poses, influences, 4, 4).
+    """
+
+    world_matrices = np.asarray(world_matrices, dtype=np.float64)
+    random = np.random.default_rng(seed)
+    shape = (pose_count, len(world_matrices))
+    axes = random.normal(size=shape + (3,))
+    axes /= np.maximum(np.linalg.norm(axes, axis=-1, keepdims=True), 1e-12)
+    angles = random.uniform(0.0, np.radians(max_angle), size=shape)
+    angles[0] = 0.0
+    pivots = np.broadcast_to(world_matrices[:, 3, :3], shape + (3,))
+    offsets = _translation(-pivots) @ _rotations(axes, angles) @ _translation(pivots)
+    return world_matrices[None] @ offsets
+
+
+def skin_points(points, sparse_weights, skinning):
+    """
+    Linear blend skinning of points for several poses at once.
+    Args:
+        points (np.ndarray): Homogeneous input positions of shape (poses, vertices, 4).
+        sparse_weights (weights.SparseWeights): The weights of the vertices.
+        skinning (np.ndarray): bindPreMatrix x worldMatrix per pose and influence, (poses, influences, 4, 4).
+    Returns:
+        np.ndarray: Homogeneous deformed positions of shape (poses, vertices, 4).
+    """
+
+    rows = sparse_weights.row_ids()
+    contributions = np.einsum("pni,pnij->pnj", points[:, rows], skinning[:, sparse_weights.indices]) * sparse_weights.values[None, :, None]
+    # Sum the contributions of every vertex, rows are contiguous so a cumulative sum does it
+    # without a scatter, empty rows included.
+    totals = np.zeros((contributions.shape[0], len(rows) + 1, 4))
+    np.cumsum(contributions, axis=1, out=totals[:, 1:])
+    return totals[:, sparse_weights.indptr[1:]] - totals[:, sparse_weights.indptr[:-1]]
+
+
+def project_simplex(values, mask):
+    """
+    Euclidean projection of vectors onto the probability simplex, restricted to masked entries.
+    Args:
+        values (np.ndarray): Vectors of shape (n, k).
+        mask (np.ndarray): Boolean mask of shape (n, k), unmasked entries are forced to zero.
+    Returns:
+        np.ndarray: Non-negative vectors summing to one over their masked entries.
+    """
+
+    masked = np.where(mask, values, -1e30)
+    ordered = -np.sort(-masked, axis=1)
+    sums = np.cumsum(ordered, axis=1) - 1.0
+    ranks = np.arange(1, values.shape[1] + 1)
+    count = np.maximum(np.sum(ordered - sums / ranks > 0.0, axis=1), 1)
+    threshold = sums[np.arange(len(values)), count - 1] / count
+    return np.where(mask, np.maximum(values - threshold[:, None], 0.0), 0.0)
+
+
+def solve_simplex_least_squares(gram, targets, mask, iterations=ITERATIONS, tolerance=TOLERANCE):
+    """
+    Minimize |A w - b|^2 subject to w >= 0 and sum(w) = 1 for many small problems at once.
+    Args:
+        gram (np.ndarray): A^T A of every problem, shape (n, k, k).
+        targets (np.ndarray): A^T b of every problem, shape (n, k).
+        mask (np.ndarray): Boolean mask of the usable unknowns, shape (n, k).
+        iterations (int): Maximum number of iterations.
+        tolerance (float): Largest projected gradient step, |P(x - step * gradient) - x|, under
+            which a problem is converged.
+    Returns:
+        np.ndarray: The solutions of shape (n, k).
+    """
+
+    counts = np.maximum(mask.sum(axis=1, keepdims=True), 1)
+    solution = mask / counts
+    step = 1.0 / np.maximum(np.linalg.eigvalsh(gram)[:, -1], 1e-300)
+    # Only the problems that have not converged yet keep iterating.
+    active = np.arange(len(gram))
+    current = solution.copy()
+    momentum = current
+    factors = np.ones(len(gram))
+    for _ in range(iterations):
+        gradient = (gram[active] @ momentum[:, :, None])[:, :, 0] - targets[active]
+        projected = project_simplex(momentum - gradient * step[active, None], mask[active])
+        solution[active] = projected
+        # Converged once the projected gradient step leaves the point where it was taken in place,
+        # a small step alone can also come from the momentum pulling back onto the same point.
+        changed = np.abs(projected - momentum).max(axis=1) >= tolerance
+        # Restart the momentum when the projection changes which weights are zero, or when it
+        # points against the last step, the extrapolation would otherwise overshoot the constraint.
+        restart = np.any((projected > 0.0) != (current > 0.0), axis=1) | (np.sum((momentum - projected) * (projected - current), axis=1) > 0.0)
+        next_factors = np.where(restart, 1.0, (1.0 + np.sqrt(1.0 + 4.0 * factors * factors)) / 2.0)
+        momentum = projected + (projected - current) * ((factors - 1.0) / next_factors * ~restart)[:, None]
+        active, current, momentum, factors = active[changed], projected[changed], momentum[changed], next_factors[changed]
+        if not len(active):
+            break
+    return solution
+
+
+def fit_chain(points, layers, bind_pre_matrices, pose_world_matrices, influences, iterations=ITERATIONS, batch_size=BATCH_SIZE, tolerance=TOLERANCE):
+    """
+    Fit the weights of a single skinCluster reproducing a chain of skinClusters.
+    Args:
+        points (np.ndarray): Original positions of shape (vertices, 3).
+        layers (list): SparseWeights of every skinCluster of the chain, first evaluated first.
+        bind_pre_matrices (list): Per layer, a dict of influence name to its 4x4 bind pre matrix.
+        pose_world_matrices (np.ndarray): Sampled world matrices of shape (poses, influences, 4, 4).
+        influences (list): Influence names of the sampled world matrices.
+        iterations (int): Maximum solver iterations per batch.
+        batch_size (int): Vertices fitted per batch.
+        tolerance (float): Solver convergence tolerance, see solve_simplex_least_squares.
+    Returns:
+        ChainFit: The fitted weights, bind pre matrices and residuals.
+    """
+
+    index = weights.InfluenceIndex([layer.influences for layer in layers])
+    world_columns = {name: column for column, name in enumerate(influences)}
+    pose_count = len(pose_world_matrices)
+
+    def skinning(layer_influences, matrices):
+        bind = np.array([matrices[name] for name in layer_influences]).reshape(-1, 4, 4)
+        world = pose_world_matrices[:, [world_columns[name] for name in layer_influences]]
+        return bind[None] @ world
+
+    layer_skinning = [skinning(layer.influences, matrices) for layer, matrices in zip(layers, bind_pre_matrices)]
+    # Influences shared by several layers keep the bind pre matrix of the first layer using them.
+    fitted_matrices = {}
+    for layer, matrices in zip(layers, bind_pre_matrices):
+        for name in layer.influences:
+            fitted_matrices.setdefault(name, np.asarray(matrices[name], dtype=np.float64).reshape(4, 4))
+    fitted_skinning = skinning(index.influences, fitted_matrices)
+
+    # A vertex can only be fitted on the influences weighting it somewhere in the chain.
+    pattern = [weights.SparseWeights(layer.indptr, layer.indices, np.ones(layer.nnz), layer.influences) for layer in layers]
+    support = index.scatter(pattern).prune(0.0)
+
+    points = np.asarray(points, dtype=np.float64)
+    vertex_count = len(points)
+    blocks = []
+    residuals = np.zeros(vertex_count)
+    for start in range(0, max(vertex_count, 1), batch_size):
+        stop = min(start + batch_size, vertex_count)
+        original = np.concatenate([points[start:stop], np.ones((stop - start, 1))], axis=1)
+        deformed = np.broadcast_to(original, (pose_count,) + original.shape)
+        for layer, layer_matrices in zip(layers, layer_skinning):
+            deformed = skin_points(deformed, layer.slice_rows(start, stop), layer_matrices)
+
+        block_support = support.slice_rows(start, stop)
+        counts = np.diff(block_support.indptr)
+        width = max(int(counts.max(initial=0)), 1)
+        rows = block_support.row_ids()
+        slots = np.arange(block_support.nnz) - block_support.indptr[rows]
+        columns = np.zeros((stop - start, width), dtype=np.int64)
+        columns[rows, slots] = block_support.indices
+        mask = np.zeros((stop - start, width), dtype=bool)
+        mask[rows, slots] = True
+
+        # Position of every vertex moved by every candidate influence alone, per pose.
+        candidates = np.einsum("vi,pvkij->pvkj", original, fitted_skinning[:, columns])[..., :3] * mask[None, :, :, None]
+        target = deformed[..., :3]
+        gram = np.einsum("pvid,pvjd->vij", candidates, candidates)
+        gram[:, np.arange(width), np.arange(width)] += ~mask
+        solution = solve_simplex_least_squares(gram, np.einsum("pvid,pvd->vi", candidates, target), mask, iterations, tolerance)
+
+        fitted = np.einsum("pvkd,vk->pvd", candidates, solution)
+        residuals[start:stop] = np.sqrt(np.mean(np.sum((fitted - target) ** 2, axis=2), axis=0))
+        keep = mask & (solution > 0.0)
+        blocks.append(weights.SparseWeights.from_coo(
+            np.nonzero(keep)[0],
+            columns[keep],
+            solution[keep],
+            stop - start,
+            index.influences,
+        ))
+
+    fitted_weights = weights.SparseWeights.vstack(blocks).normalize()
+    return ChainFit(fitted_weights, fitted_matrices, residuals)
@@ -0,0 +1,224 @@
+import numpy as np
+
+from skinClusterManager import weights
+
+
+"""
+Masked Laplacian smoothing of skin weights, e.g. along the seams left by a merge or a transfer.
+The mesh edges are built once as a sparse vertex adjacency. Every iteration moves the masked
+vertices towards the average of their neighbours as one sparse product, only the masked vertices
+and their first ring are ever gathered, so the cost scales with the smoothed region and not the mesh.
+"""
+
+
+# Smoothing iterations applied by default.
+ITERATIONS = 3
+# Fraction of the way to the neighbour average moved per iteration.
+STRENGTH = 0.5
+# Vertex rings a seam is grown by on each side.
+SEAM_RINGS = 2
+# Weights at or below this value are dropped after smoothing.
+PRUNE_THRESHOLD = 1e-5
+
+
+class Adjacency(object):
+    """
+    Compressed sparse row vertex adjacency of a mesh: indices[indptr[v]:indptr[v + 1]] are the
+    vertices sharing an edge with vertex v, sorted ascending.
+    """
+
+    __slots__ = ("indptr", "indices")
+
+    def __init__(self, indptr, indices):
+        """
+        Initialize the Adjacency.
+        Args:
+            indptr (np.ndarray): Row pointers of length vertices + 1.
+            indices (np.ndarray): Neighbour of every edge end.
+        """
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+
+    def __repr__(self):
+        return f"Adjacency(vertices={self.vertex_count}, edges={len(self.indices) // 2})"
+
+    @property
+    def vertex_count(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def from_faces(cls, vertex_count, face_counts, face_vertices):
+        """
+        Build the adjacency from polygon faces, every pair of consecutive face vertices is an edge.
+        Args:
+            vertex_count (int): Number of vertices.
+            face_counts (np.ndarray): Vertex count of every face.
+            face_vertices (np.ndarray): The concatenated face vertices.
+        Returns:
+            Adjacency: The adjacency.
+        """
+
+        face_counts = np.asarray(face_counts, dtype=np.int64)
+        face_vertices = np.asarray(face_vertices, dtype=np.int64)
+        starts = np.repeat(np.cumsum(face_counts) - face_counts, face_counts)
+        following = np.arange(1, len(face_vertices) + 1)
+        wrapped = following == starts + np.repeat(face_counts, face_counts)
+        following[wrapped] = starts[wrapped]
+
+        first, second = face_vertices, face_vertices[following]
+        keys = np.concatenate([first * vertex_count + second, second * vertex_count + first])
+        keys.sort()
+        rows, columns = keys // max(vertex_count, 1), keys % max(vertex_count, 1)
+        # Edges shared by two faces appear twice.
+        keep = (rows != columns) & np.concatenate([[True], keys[1:] != keys[:-1]])
+        indptr = np.zeros(vertex_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[keep], minlength=vertex_count), out=indptr[1:])
+        return cls(indptr, columns[keep])
+
+    @classmethod
+    def stack(cls, adjacencies):
+        """
+        Join the adjacencies of several meshes into one, the vertices of each following the
+        previous ones, like the geometries of a skinCluster in its weights.
+        Args:
+            adjacencies (list): The Adjacency of every mesh.
+        Returns:
+            Adjacency: The joined adjacency.
+        """
+
+        if len(adjacencies) == 1:
+            return adjacencies[0]
+        vertex_offsets = np.cumsum([0] + [adjacency.vertex_count for adjacency in adjacencies[:-1]])
+        edge_offsets = np.cumsum([0] + [len(adjacency.indices) for adjacency in adjacencies[:-1]])
+        return cls(
+            np.concatenate([[0]] + [adjacency.indptr[1:] + offset for adjacency, offset in zip(adjacencies, edge_offsets)]),
+            np.concatenate([adjacency.indices + offset for adjacency, offset in zip(adjacencies, vertex_offsets)]),
+        )
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def row_ids(self):
+        return np.repeat(np.arange(self.vertex_count, dtype=np.int64), self.degrees())
+
+    def neighbours(self, rows):
+        """
+        Get the neighbours of some vertices.
+        Args:
+            rows (np.ndarray): The vertex indices.
+        Returns:
+            tuple: For every edge end, the position of its vertex in rows and the neighbour index.
+        """
+
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        counts = self.indptr[rows + 1] - starts
+        offsets = np.cumsum(counts) - counts
+        entries = np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+        return np.repeat(np.arange(len(rows), dtype=np.int64), counts), self.indices[entries]
+
+    def grow(self, mask, rings=1):
+        """
+        Grow a vertex mask by rings of neighbours.
+        Args:
+            mask (np.ndarray): Boolean mask of length vertices.
+            rings (int): Number of rings added.
+        Returns:
+            np.ndarray: The grown mask.
+        """
+
+        mask = np.asarray(mask, dtype=bool).copy()
+        row_ids = self.row_ids()
+        for _ in range(rings):
+            mask |= np.bincount(row_ids[mask[self.indices]], minlength=self.vertex_count) > 0
+        return mask
+
+    def boundary(self, labels):
+        """
+        Find the vertices with a neighbour of another label, e.g. the two sides of a seam.
+        Args:
+            labels (np.ndarray): A label per vertex.
+        Returns:
+            np.ndarray: Boolean mask of length vertices.
+        """
+
+        labels = np.asarray(labels)
+        row_ids = self.row_ids()
+        differs = labels[row_ids] != labels[self.indices]
+        return np.bincount(row_ids[differs], minlength=self.vertex_count) > 0
+
+
+def dominant_influences(sparse_weights):
+    """
+    Get the column of the biggest weight of every vertex.
+    Args:
+        sparse_weights (weights.SparseWeights): The weights.
+    Returns:
+        np.ndarray: The columns, -1 for vertices without weights.
+    """
+
+    rows = sparse_weights.row_ids()
+    order = np.lexsort((-sparse_weights.values, rows))
+    dominant = np.full(sparse_weights.vertex_count, -1, dtype=np.int64)
+    counts = np.diff(sparse_weights.indptr)
+    filled = counts > 0
+    dominant[filled] = sparse_weights.indices[order[sparse_weights.indptr[:-1][filled]]]
+    return dominant
+
+
+def seam_mask(adjacency, labels, rings=SEAM_RINGS):
+    """
+    Get the band of vertices around the seams between differently labelled regions.
+    Args:
+        adjacency (Adjacency): The mesh adjacency.
+        labels (np.ndarray): A label per vertex, e.g. the merged layer or dominant influence.
+        rings (int): Rings of vertices the seam is grown by on each side.
+    Returns:
+        np.ndarray: Boolean mask of length vertices.
+    """
+
+    return adjacency.grow(adjacency.boundary(labels), max(rings - 1, 0))
+
+
+def smooth_weights(sparse_weights, adjacency, mask, iterations=ITERATIONS, strength=STRENGTH, max_influences=None, threshold=PRUNE_THRESHOLD):
+    """
+    Smooth the masked vertices towards the average of their neighbours, the other vertices are
+    left untouched and only act as fixed boundary values. The smoothed vertices are then pruned,
+    capped to max_influences and normalized.
+    Args:
+        sparse_weights (weights.SparseWeights): The weights.
+        adjacency (Adjacency): The adjacency of the mesh the weights belong to.
+        mask (np.ndarray): Boolean mask of the vertices to smooth.
+        iterations (int): Number of smoothing iterations.
+        strength (float): Fraction of the way to the neighbour average moved per iteration.
+        max_influences (int): Cap on the influences per smoothed vertex.
+        threshold (float): Weights at or below this value are dropped.
+    Returns:
+        weights.SparseWeights: The smoothed weights.
+    """
+
+    rows = np.flatnonzero(mask)
+    if not len(rows) or iterations < 1:
+        return sparse_weights
+    if adjacency.vertex_count != sparse_weights.vertex_count:
+        raise ValueError(f"The adjacency has {adjacency.vertex_count} vertices, the weights {sparse_weights.vertex_count}.")
+
+    # Work on the masked vertices and their first ring only, in local numbering.
+    owners, neighbours = adjacency.neighbours(rows)
+    region = np.union1d(rows, neighbours)
+    moving = np.searchsorted(region, rows)
+    sources = np.searchsorted(region, neighbours)
+    degrees = np.bincount(owners, minlength=len(rows))
+    own = np.where(degrees > 0, 1.0 - strength, 1.0)
+    shares = strength / degrees[owners]
+
+    block = sparse_weights.take_rows(region).astype(np.float64)
+    targets = np.concatenate([np.arange(len(rows), dtype=np.int64), owners])
+    terms = np.concatenate([moving, sources])
+    factors = np.concatenate([own, shares])
+    for _ in range(iterations):
+        block = block.put_rows(moving, weights.accumulate_rows(block, targets, terms, factors, len(rows)))
+
+    smoothed = block.take_rows(moving).prune(threshold).top_k(max_influences).normalize()
+    return sparse_weights.put_rows(rows, smoothed.astype(sparse_weights.values.dtype))
@@ -0,0 +1,259 @@
+import collections
+import hashlib
+import itertools
+import time
+
+import numpy as np
+
+from skinClusterManager import weights
+
+
+"""
+In-memory history of skinCluster weights, stored as quantized 16 bit sparse blocks.
+
+Weights are stored as integers q in [0, 65535] meaning q / 65535. Every vertex is rounded with the
+largest remainder method, so the quantized weights of a normalized vertex still sum to exactly one:
+    |restored - original| <= 1 / 65535 (about 1.5e-5) for every weight,
+and a vertex that summed to one sums to one again, with no renormalization on restore. Vertices that
+did not sum to one keep their float32 total, their error bound is the same relative to that total.
+
+Vertices are split into fixed size blocks stored by content hash. A snapshot only references its
+blocks, so snapshots of the same skinCluster share every block that did not change in between and
+only the edited blocks cost memory. The store has a byte budget, the least recently used snapshots
+are dropped first when it is exceeded.
+"""
+
+
+SCALE = 65535
+# Vertices per shared block.
+BLOCK_SIZE = 4096
+# Bytes of quantized blocks kept by default.
+BUDGET = 256 * 1024 * 1024
+# Vertex totals further than this from one are stored as they are.
+SUM_TOLERANCE = 1e-6
+
+
+def quantize(sparse_weights):
+    """
+    Quantize weights to 16 bit integers, rounding every vertex so it keeps its total.
+    Args:
+        sparse_weights (weights.SparseWeights): The weights.
+    Returns:
+        tuple: The uint16 values, one per stored weight, and the float32 vertex totals, None when
+            every vertex sums to one.
+    """
+
+    totals = sparse_weights.row_sums()
+    row_sums = None if np.all((np.abs(totals - 1.0) <= SUM_TOLERANCE) | (totals == 0.0)) else totals.astype(np.float32)
+    rows = sparse_weights.row_ids()
+    scaled_totals = np.where(totals > 0.0, totals, 1.0)[rows]
+    scaled = sparse_weights.values.astype(np.float64) / scaled_totals * SCALE
+    floors = np.floor(scaled)
+    # Hand the units lost to flooring to the weights with the largest remainders of each vertex.
+    missing = np.rint(np.bincount(rows, weights=scaled - floors, minlength=sparse_weights.vertex_count)).astype(np.int64)
+    order = np.lexsort((-(scaled - floors), rows))
+    rank = np.empty(sparse_weights.nnz, dtype=np.int64)
+    rank[order] = np.arange(sparse_weights.nnz) - sparse_weights.indptr[rows[order]]
+    values = floors + (rank < missing[rows])
+    return np.clip(values, 0, SCALE).astype(np.uint16), row_sums
+
+
+def dequantize(indptr, indices, values, influences, row_sums=None, dtype=np.float64):
+    """
+    Build weights back from quantized values.
+    Args:
+        indptr (np.ndarray): Row pointers.
+        indices (np.ndarray): Influence columns.
+        values (np.ndarray): The uint16 values.
+        influences (list): Influence names.
+        row_sums (np.ndarray): The float32 vertex totals from quantize, None when they are all one.
+        dtype (np.dtype): Value type of the result.
+    Returns:
+        weights.SparseWeights: The weights.
+    """
+
+    result = weights.SparseWeights(indptr, indices, values.astype(dtype) / SCALE, influences)
+    if row_sums is not None:
+        result.values *= row_sums.astype(dtype)[result.row_ids()]
+    return result
+
+
+class Snapshot(object):
+    """
+    One stored state of a skinCluster.
+    """
+
+    __slots__ = ("id", "skin_cluster", "label", "created", "influences", "vertex_count", "blocks", "row_sums", "bind_pre_matrices")
+
+    def __init__(self, snapshot_id, skin_cluster, label, influences, vertex_count, blocks, row_sums, bind_pre_matrices=None):
+        """
+        Initialize the Snapshot.
+        Args:
+            snapshot_id (int): The id in its store.
+            skin_cluster (str): The skinCluster name.
+            label (str): A description, e.g. the operation it was taken before.
+            influences (list): Influence names, one per column.
+            vertex_count (int): Number of vertices.
+            blocks (list): Content hashes of the vertex blocks.
+            row_sums (np.ndarray): The float32 vertex totals, None when they are all one.
+            bind_pre_matrices (dict): Influence name to its bind pre matrix when it was taken.
+        """
+
+        self.id = snapshot_id
+        self.skin_cluster = skin_cluster
+        self.label = label
+        self.created = time.time()
+        self.influences = list(influences)
+        self.vertex_count = vertex_count
+        self.blocks = blocks
+        self.row_sums = row_sums
+        self.bind_pre_matrices = dict(bind_pre_matrices or {})
+
+    def __repr__(self):
+        return f"Snapshot({self.id}, {self.skin_cluster}, label={self.label}, vertices={self.vertex_count})"
+
+
+class SnapshotStore(object):
+    """
+    Byte budgeted, least recently used store of skinCluster snapshots sharing their vertex blocks.
+    """
+
+    def __init__(self, budget=BUDGET, block_size=BLOCK_SIZE):
+        """
+        Initialize the SnapshotStore.
+        Args:
+            budget (int): Bytes of blocks kept, older snapshots are dropped beyond it.
+            block_size (int): Vertices per block.
+        """
+
+        self.budget = budget
+        self.block_size = block_size
+        self.snapshots = collections.OrderedDict()
+        self.blocks = {}
+        self.references = collections.Counter()
+        self.nbytes = 0
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def _store_block(self, indptr, indices, values):
+        digest = hashlib.blake2b(digest_size=16)
+        for array in (indptr, indices, values):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        key = digest.hexdigest()
+        if key not in self.blocks:
+            block = (indptr.astype(np.int32), indices.copy(), values.copy())
+            self.blocks[key] = block
+            self.nbytes += sum(array.nbytes for array in block)
+        self.references[key] += 1
+        return key
+
+    def _release(self, snapshot):
+        for key in snapshot.blocks:
+            self.references[key] -= 1
+            if self.references[key] <= 0:
+                del self.references[key]
+                self.nbytes -= sum(array.nbytes for array in self.blocks.pop(key))
+        if snapshot.row_sums is not None:
+            self.nbytes -= snapshot.row_sums.nbytes
+
+    def take(self, skin_cluster, sparse_weights, label=None, bind_pre_matrices=None):
+        """
+        Store the weights of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+            sparse_weights (weights.SparseWeights): Its current weights.
+            label (str): A description, e.g. the operation it is taken before.
+            bind_pre_matrices (dict): Influence name to its current bind pre matrix, so an influence
+                removed since can be added back at its bind pose.
+        Returns:
+            Snapshot: The stored snapshot.
+        """
+
+        values, row_sums = quantize(sparse_weights)
+        blocks = []
+        for start in range(0, sparse_weights.vertex_count, self.block_size):
+            stop = min(start + self.block_size, sparse_weights.vertex_count)
+            first, last = sparse_weights.indptr[start], sparse_weights.indptr[stop]
+            blocks.append(self._store_block(sparse_weights.indptr[start:stop + 1] - first, sparse_weights.indices[first:last], values[first:last]))
+        if row_sums is not None:
+            self.nbytes += row_sums.nbytes
+
+        snapshot = Snapshot(next(self._ids), skin_cluster, label, sparse_weights.influences, sparse_weights.vertex_count, blocks, row_sums, bind_pre_matrices)
+        self.snapshots[snapshot.id] = snapshot
+        self._evict(keep=snapshot.id)
+        return snapshot
+
+    def _evict(self, keep=None):
+        """
+        Drop the least recently used snapshots until the store fits its budget.
+        Args:
+            keep (int): A snapshot id never dropped, even if it alone exceeds the budget.
+        """
+
+        for snapshot_id in list(self.snapshots):
+            if self.nbytes <= self.budget:
+                break
+            if snapshot_id != keep:
+                self.drop(snapshot_id)
+
+    def drop(self, snapshot_id):
+        """
+        Remove a snapshot, the blocks no other snapshot uses are freed.
+        Args:
+            snapshot_id (int): The snapshot id.
+        """
+
+        snapshot = self.snapshots.pop(snapshot_id, None)
+        if snapshot is not None:
+            self._release(snapshot)
+
+    def clear(self):
+        for snapshot_id in list(self.snapshots):
+            self.drop(snapshot_id)
+
+    def history(self, skin_cluster=None):
+        """
+        List the stored snapshots, oldest first.
+        Args:
+            skin_cluster (str): Only list the snapshots of this skinCluster.
+        Returns:
+            list: The snapshots.
+        """
+
+        found = [snapshot for snapshot in self.snapshots.values() if skin_cluster is None or snapshot.skin_cluster == skin_cluster]
+        return sorted(found, key=lambda snapshot: snapshot.id)
+
+    def latest(self, skin_cluster):
+        """
+        Get the last snapshot taken of a skinCluster.
+        Args:
+            skin_cluster (str): The skinCluster name.
+        Returns:
+            Snapshot: The snapshot, None if there is none.
+        """
+
+        found = self.history(skin_cluster)
+        return found[-1] if found else None
+
+    def restore(self, snapshot_id, dtype=np.float64):
+        """
+        Get the weights of a snapshot, which becomes the most recently used one.
+        Args:
+            snapshot_id (int): The snapshot id.
+            dtype (np.dtype): Value type of the weights.
+        Returns:
+            weights.SparseWeights: The weights, None if the snapshot was dropped.
+        """
+
+        snapshot = self.snapshots.get(snapshot_id)
+        if snapshot is None:
+            return None
+        self.snapshots.move_to_end(snapshot_id)
+        blocks = [self.blocks[key] for key in snapshot.blocks]
+        offsets = np.cumsum([0] + [len(block[1]) for block in blocks[:-1]])
+        indptr = np.concatenate([[0]] + [block[0][1:].astype(np.int64) + offset for block, offset in zip(blocks, offsets)])
+        indices = np.concatenate([block[1] for block in blocks]) if blocks else np.zeros(0, dtype=np.int32)
+        values = np.concatenate([block[2] for block in blocks]) if blocks else np.zeros(0, dtype=np.uint16)
+        return dequantize(indptr, indices, values, snapshot.influences, snapshot.row_sums, dtype)
@@ -0,0 +1,324 @@
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+from skinClusterManager import weights
+
+
+"""
+Weight transfer between meshes with different topology.
+The source triangles are indexed once, then every target point is resolved in vectorized batches:
+triangle candidates from the spatial index, exact closest point on each candidate and
+barycentric blending of the source vertex weights.
+"""
+
+
+# Nearest triangles tested per target point, the closest of them bounds the search for the others.
+CANDIDATES = 8
+# Target points resolved per batch, bounds the temporary arrays to batch x candidates.
+BATCH_SIZE = 65536
+# Query x point distances computed at once when the grid has to fall back to a full search.
+BRUTE_FORCE_PAIRS = 4000000
+
+
+class GridIndex(object):
+    """
+    NumPy k-nearest-neighbour index on a uniform grid, used when scipy is not available.
+    """
+
+    def __init__(self, points):
+        """
+        Initialize the GridIndex.
+        Args:
+            points (np.ndarray): Indexed positions of shape (points, 3).
+        """
+
+        self.points = np.asarray(points, dtype=np.float64)
+        self.origin = self.points.min(axis=0)
+        extent = np.maximum(self.points.max(axis=0) - self.origin, 1e-9)
+        # Mesh points lie on a surface, so size cells for a handful of points per cell on that surface.
+        self.cell = max(2.0 * float(extent.max()) / np.sqrt(max(len(self.points), 1)), float(extent.max()) / 4096.0)
+        self.dims = np.floor(extent / self.cell).astype(np.int64) + 1
+
+        keys = self._keys(self._cells(self.points))
+        self.order = np.argsort(keys, kind="stable")
+        self.cell_keys, self.cell_starts, self.cell_counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+
+    def _cells(self, points):
+        return np.floor((points - self.origin) / self.cell).astype(np.int64)
+
+    def _keys(self, cells):
+        return (cells[:, 0] * self.dims[1] + cells[:, 1]) * self.dims[2] + cells[:, 2]
+
+    def _gather(self, queries, radius):
+        """
+        List the points of the cells within a radius of every query cell.
+        Args:
+            queries (np.ndarray): Query positions of shape (queries, 3).
+            radius (int): Search radius in cells.
+        Returns:
+            tuple: Query indices and point indices of the gathered pairs.
+        """
+
+        cells = self._cells(queries)
+        steps = np.arange(-radius, radius + 1)
+        query_ids, candidates = [], []
+        for offset in np.array(np.meshgrid(steps, steps, steps)).reshape(3, -1).T:
+            neighbour = cells + offset
+            valid = np.all((neighbour >= 0) & (neighbour < self.dims), axis=1)
+            keys = self._keys(neighbour[valid])
+            slots = np.clip(np.searchsorted(self.cell_keys, keys), 0, len(self.cell_keys) - 1)
+            found = self.cell_keys[slots] == keys
+            owners = np.flatnonzero(valid)[found]
+            starts, counts = self.cell_starts[slots[found]], self.cell_counts[slots[found]]
+            positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            query_ids.append(np.repeat(owners, counts))
+            candidates.append(self.order[positions])
+        return np.concatenate(query_ids), np.concatenate(candidates)
+
+    def _search(self, queries, k, radius):
+        """
+        Find the k nearest points among the cells within a radius of every query cell.
+        Args:
+            queries (np.ndarray): Query positions of shape (queries, 3).
+            k (int): Number of neighbours.
+            radius (int): Search radius in cells.
+        Returns:
+            tuple: Indices of shape (queries, k), -1 where missing, and the squared distance of the
+                k-th neighbour, inf where fewer than k were found.
+        """
+
+        query_ids, candidates = self._gather(queries, radius)
+        offsets = self.points[candidates] - queries[query_ids]
+        distances = np.einsum("ij,ij->i", offsets, offsets)
+        # One float sort key groups candidates by query and orders each group by distance.
+        order = np.argsort(query_ids + distances / (distances.max(initial=0.0) * 2.0 + 1e-300))
+        query_ids, candidates, distances = query_ids[order], candidates[order], distances[order]
+        starts = np.searchsorted(query_ids, np.arange(len(queries)))
+        rank = np.arange(len(query_ids)) - starts[query_ids]
+        keep = rank < k
+
+        result = np.full((len(queries), k), -1, dtype=np.int64)
+        result[query_ids[keep], rank[keep]] = candidates[keep]
+        kth = np.full(len(queries), np.inf)
+        last = rank == k - 1
+        kth[query_ids[last]] = distances[last]
+        return result, kth
+
+    def query(self, queries, k):
+        """
+        Find the k nearest indexed points of every query point.
+        Args:
+            queries (np.ndarray): Query positions of shape (queries, 3).
+            k (int): Number of neighbours.
+        Returns:
+            np.ndarray: Indices of shape (queries, k), nearest first.
+        """
+
+        queries = np.asarray(queries, dtype=np.float64)
+        result = np.empty((len(queries), k), dtype=np.int64)
+        pending = np.arange(len(queries))
+        radius = 1
+        # Points outside the searched block are at least radius cells away, so a k-th neighbour
+        # closer than that is exact. Unresolved queries retry with a bigger block.
+        while len(pending) and radius <= 8:
+            found, kth = self._search(queries[pending], k, radius)
+            exact = kth <= (radius * self.cell) ** 2
+            result[pending[exact]] = found[exact]
+            pending = pending[~exact]
+            radius *= 2
+
+        chunk_size = max(1, BRUTE_FORCE_PAIRS // max(len(self.points), 1))
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            full = ((queries[chunk, None, :] - self.points[None, :, :]) ** 2).sum(axis=2)
+            nearest = np.argpartition(full, k - 1, axis=1)[:, :k] if k < len(self.points) else np.tile(np.arange(len(self.points)), (len(chunk), 1))
+            nearest = np.take_along_axis(nearest, np.argsort(np.take_along_axis(full, nearest, axis=1), axis=1), axis=1)
+            result[chunk] = nearest
+        return result
+
+    def query_radius(self, queries, radii):
+        """
+        Find the indexed points within a distance of every query point.
+        Args:
+            queries (np.ndarray): Query positions of shape (queries, 3).
+            radii (np.ndarray): Search distance of every query.
+        Returns:
+            tuple: Query indices and point indices of the pairs within distance.
+        """
+
+        queries = np.asarray(queries, dtype=np.float64)
+        radii = np.asarray(radii, dtype=np.float64)
+        blocks = np.maximum(np.ceil(radii / self.cell), 1).astype(np.int64)
+        query_ids, candidates = [], []
+        chunk_size = max(1, BRUTE_FORCE_PAIRS // max(len(self.points), 1))
+        for radius in np.unique(blocks):
+            members = np.flatnonzero(blocks == radius)
+            if radius <= 8:
+                owners, found = self._gather(queries[members], radius)
+                chunks = [(members[owners], found)]
+            else:
+                # Past a few cells, comparing against every point is cheaper than visiting the cells.
+                chunks = []
+                for start in range(0, len(members), chunk_size):
+                    chunk = members[start:start + chunk_size]
+                    chunks.append((np.repeat(chunk, len(self.points)), np.tile(np.arange(len(self.points)), len(chunk))))
+            for owners, found in chunks:
+                offsets = self.points[found] - queries[owners]
+                within = np.einsum("ij,ij->i", offsets, offsets) <= radii[owners] ** 2
+                query_ids.append(owners[within])
+                candidates.append(found[within])
+        if not query_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(query_ids), np.concatenate(candidates)
+
+
+def closest_points_on_triangles(points, a, b, c):
+    """
+    Closest point on triangles, vectorized over pairs of points and triangles.
+    Args:
+        points (np.ndarray): Query positions of shape (n, 3).
+        a (np.ndarray): First triangle corners of shape (n, 3).
+        b (np.ndarray): Second triangle corners of shape (n, 3).
+        c (np.ndarray): Third triangle corners of shape (n, 3).
+    Returns:
+        tuple: The squared distances (n,) and barycentric coordinates (n, 3) of the closest points.
+    """
+
+    def dot(x, y):
+        return np.einsum("ij,ij->i", x, y)
+
+    ab, ac = b - a, c - a
+    ap, bp, cp = points - a, points - b, points - c
+    d1, d2 = dot(ab, ap), dot(ac, ap)
+    d3, d4 = dot(ab, bp), dot(ac, bp)
+    d5, d6 = dot(ab, cp), dot(ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominator = va + vb + vc
+        v = np.where(denominator != 0.0, vb / denominator, 0.0)
+        w = np.where(denominator != 0.0, vc / denominator, 0.0)
+        barycentric = np.stack([1.0 - v - w, v, w], axis=1)
+
+        # Voronoi regions of the triangle, later ones take precedence like the early returns of
+        # the scalar algorithm (Ericson, Real-Time Collision Detection, 5.1.5).
+        edge_bc = (va <= 0.0) & (d4 - d3 >= 0.0) & (d5 - d6 >= 0.0)
+        t = np.nan_to_num((d4 - d3) / ((d4 - d3) + (d5 - d6)))
+        barycentric[edge_bc] = np.stack([np.zeros_like(t), 1.0 - t, t], axis=1)[edge_bc]
+        edge_ac = (vb <= 0.0) & (d2 >= 0.0) & (d6 <= 0.0)
+        t = np.nan_to_num(d2 / (d2 - d6))
+        barycentric[edge_ac] = np.stack([1.0 - t, np.zeros_like(t), t], axis=1)[edge_ac]
+        barycentric[(d6 >= 0.0) & (d5 <= d6)] = (0.0, 0.0, 1.0)
+        edge_ab = (vc <= 0.0) & (d1 >= 0.0) & (d3 <= 0.0)
+        t = np.nan_to_num(d1 / (d1 - d3))
+        barycentric[edge_ab] = np.stack([1.0 - t, t, np.zeros_like(t)], axis=1)[edge_ab]
+        barycentric[(d3 >= 0.0) & (d4 <= d3)] = (0.0, 1.0, 0.0)
+        barycentric[(d1 <= 0.0) & (d2 <= 0.0)] = (1.0, 0.0, 0.0)
+
+    closest = barycentric[:, :1] * a + barycentric[:, 1:2] * b + barycentric[:, 2:] * c
+    return dot(points - closest, points - closest), barycentric
+
+
+class MeshIndex(object):
+    """
+    Spatial index over the triangles of a source mesh, built once and queried many times.
+    """
+
+    def __init__(self, points, triangles):
+        """
+        Initialize the MeshIndex.
+        Args:
+            points (np.ndarray): Source vertex positions of shape (vertices, 3).
+            triangles (np.ndarray): Source triangle vertex indices of shape (triangles, 3).
+        """
+
+        self.points = np.asarray(points, dtype=np.float64)
+        self.triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+        corners = self.points[self.triangles]
+        self.centroids = corners.mean(axis=1)
+        # Every triangle lies within its radius of its centroid.
+        self.radii = np.sqrt(((corners - self.centroids[:, None, :]) ** 2).sum(axis=2).max(axis=1))
+        self.max_radius = float(self.radii.max(initial=0.0))
+        self.tree = cKDTree(self.centroids) if cKDTree is not None else GridIndex(self.centroids)
+
+    def _nearest_triangles(self, queries, k):
+        if cKDTree is not None:
+            _, candidates = self.tree.query(queries, k=k)
+            return candidates.reshape(len(queries), k)
+        return self.tree.query(queries, k)
+
+    def _triangles_within(self, queries, radii):
+        if cKDTree is not None:
+            found = self.tree.query_ball_point(queries, radii)
+            counts = np.fromiter((len(triangles) for triangles in found), dtype=np.int64, count=len(found))
+            triangles = np.fromiter((triangle for triangles in found for triangle in triangles), dtype=np.int64, count=int(counts.sum()))
+            return np.repeat(np.arange(len(queries)), counts), triangles
+        return self.tree.query_radius(queries, radii)
+
+    def _test(self, queries, triangles):
+        corners = self.triangles[triangles]
+        return closest_points_on_triangles(queries, self.points[corners[:, 0]], self.points[corners[:, 1]], self.points[corners[:, 2]])
+
+    def closest(self, queries, candidates=CANDIDATES, batch_size=BATCH_SIZE):
+        """
+        Find the closest point on the source mesh of every query point.
+        The nearest centroids only give a first guess: a big triangle can be closer than the small
+        triangles around it while its centroid is further away, so every triangle whose bounding
+        sphere reaches closer than the guess is tested as well.
+        Args:
+            queries (np.ndarray): Query positions of shape (queries, 3).
+            candidates (int): Nearest triangles tested per query before the bounded search.
+            batch_size (int): Query points resolved per batch.
+        Returns:
+            tuple: Triangle vertex indices (queries, 3) and barycentric coordinates (queries, 3).
+        """
+
+        queries = np.asarray(queries, dtype=np.float64)
+        k = min(candidates, len(self.triangles))
+        triangles = np.empty(len(queries), dtype=np.int64)
+        barycentric = np.empty((len(queries), 3), dtype=np.float64)
+        for start in range(0, len(queries), batch_size):
+            batch = queries[start:start + batch_size]
+            nearest = self._nearest_triangles(batch, k).ravel()
+            distances, coordinates = self._test(np.repeat(batch, k, axis=0), nearest)
+            best = np.argmin(distances.reshape(-1, k), axis=1) + np.arange(len(batch)) * k
+            best_distances, best_triangles, best_coordinates = distances[best], nearest[best], coordinates[best]
+
+            # A triangle closer than the guess has its centroid within the guess plus its radius.
+            reach = np.sqrt(best_distances)
+            query_ids, found = self._triangles_within(batch, reach + self.max_radius)
+            offsets = self.centroids[found] - batch[query_ids]
+            reaches = np.einsum("ij,ij->i", offsets, offsets) <= (reach[query_ids] + self.radii[found]) ** 2
+            query_ids, found = query_ids[reaches], found[reaches]
+            distances, coordinates = self._test(batch[query_ids], found)
+            order = np.lexsort((distances, query_ids))
+            first = order[np.r_[True, query_ids[order][1:] != query_ids[order][:-1]]] if len(order) else order
+            closer = first[distances[first] < best_distances[query_ids[first]]]
+            best_triangles[query_ids[closer]] = found[closer]
+            best_coordinates[query_ids[closer]] = coordinates[closer]
+
+            triangles[start:start + len(batch)] = best_triangles
+            barycentric[start:start + len(batch)] = best_coordinates
+        return self.triangles[triangles], barycentric
+
+
+def transfer_weights(source_weights, mesh_index, target_points, max_influences=None):
+    """
+    Transfer weights onto another mesh by blending the weights of the closest source triangle.
+    Args:
+        source_weights (weights.SparseWeights): Weights of the source mesh vertices.
+        mesh_index (MeshIndex): Index of the source mesh.
+        target_points (np.ndarray): Target vertex positions of shape (vertices, 3).
+        max_influences (int): Cap on the influences per vertex of the result.
+    Returns:
+        weights.SparseWeights: The target weights, normalized.
+    """
+
+    vertices, barycentric = mesh_index.closest(target_points)
+    return weights.blend_rows(source_weights, vertices, barycentric).prune(0.0).top_k(max_influences).normalize()
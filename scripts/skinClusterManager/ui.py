@@ -1,9 +1,23 @@
-import json
 import os
+import time
 from PySide2 import QtWidgets, QtCore, QtGui
 from shiboken2 import wrapInstance
 import maya.OpenMayaUI as omui
 
+from skinClusterManager import assets
+from skinClusterManager import logics
+from skinClusterManager import models
+
+
+def maya_main_window():
+    """
+    Get the Maya main window as a Qt widget.
+    Returns:
+        QMainWindow: The main window.
+    """
+    return wrapInstance(int(omui.MQtUtil.mainWindow()), QtWidgets.QMainWindow)
+
+
 class CompoundList(QtWidgets.QFrame):
     """
     Compound widget with a button and a list widget.
@@ -31,7 +45,14 @@ class CompoundList(QtWidgets.QFrame):
 
         self.load_source_btn = QtWidgets.QPushButton(name)
         self.load_source_btn.setToolTip(tooltip)
-        self.source_list = MiddleDragListWidget()
+        self.filter_edit = QtWidgets.QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter...")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.model = models.SkinClusterListModel(self)
+        self.proxy = models.SkinClusterFilterModel(self.model, self)
+        self.source_list = MiddleDragListView()
+        self.source_list.setModel(self.proxy)
+        self.filter_edit.textChanged.connect(self.proxy.setFilterFixedString)
     
     def create_layout(self):
         """
@@ -40,23 +61,45 @@ class CompoundList(QtWidgets.QFrame):
 
         left_top_v_layout = QtWidgets.QVBoxLayout(self) 
         left_top_v_layout.addWidget(self.load_source_btn)   
+        left_top_v_layout.addWidget(self.filter_edit)
         left_top_v_layout.addWidget(self.source_list)   
 
-class MiddleDragListWidget(QtWidgets.QListWidget):
+    def selected_rows(self):
+        """
+        Get the model rows selected in the list view.
+        Returns:
+            list: The row numbers of the model, sorted.
+        """
+
+        return self.proxy.source_rows(self.source_list.selectionModel().selectedRows())
+
+    def names(self):
+        """
+        Get every skinCluster name in the list, filtered out or not.
+        Returns:
+            list: The names, in list order.
+        """
+
+        return self.model.names()
+
+class MiddleDragListView(QtWidgets.QListView):
     """
-    Custom QListWidget that allows dragging items with the middle mouse button.
+    Custom QListView that allows dragging items with the middle mouse button.
     """
 
     def __init__(self, parent=None):
         """
-        Initialize the MiddleDragListWidget.
+        Initialize the MiddleDragListView.
         Args:
             parent (QWidget): The parent widget.
         """
-        super(MiddleDragListWidget, self).__init__(parent)
+        super(MiddleDragListView, self).__init__(parent)
         self.setDragDropMode(QtWidgets.QAbstractItemView.InternalMove)
         self.setDefaultDropAction(QtCore.Qt.MoveAction)
-        self.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        # Every row has the same height, so the view never measures rows it does not paint.
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QtWidgets.QListView.Batched)
 
     def mousePressEvent(self, event):
         """
@@ -71,10 +114,10 @@ class MiddleDragListWidget(QtWidgets.QListWidget):
                 QtCore.Qt.LeftButton,
                 event.modifiers()
             )
-            super(MiddleDragListWidget, self).mousePressEvent(fake_event)
+            super(MiddleDragListView, self).mousePressEvent(fake_event)
 
         elif event.button() == QtCore.Qt.LeftButton:
-            super(MiddleDragListWidget, self).mousePressEvent(event)
+            super(MiddleDragListView, self).mousePressEvent(event)
             return
             
 
@@ -82,7 +125,7 @@ class MiddleDragListWidget(QtWidgets.QListWidget):
         """
         Handle mouse move events.   
         """
-        super(MiddleDragListWidget, self).mouseMoveEvent(event)
+        super(MiddleDragListView, self).mouseMoveEvent(event)
 
 
     def mouseReleaseEvent(self, event):
@@ -98,9 +141,82 @@ class MiddleDragListWidget(QtWidgets.QListWidget):
                 QtCore.Qt.LeftButton,
                 event.modifiers()
             )
-            super(MiddleDragListWidget, self).mouseReleaseEvent(fake_event)
+            super(MiddleDragListView, self).mouseReleaseEvent(fake_event)
         else:
-            super(MiddleDragListWidget, self).mouseReleaseEvent(event)
+            super(MiddleDragListView, self).mouseReleaseEvent(event)
+
+class SceneScan(QtCore.QObject):
+    """
+    Drives logics.scan_skin_clusters from a Qt timer, a few milliseconds per tick, so the UI keeps
+    responding while a big scene is scanned.
+    """
+
+    found = QtCore.Signal(list)
+    progress = QtCore.Signal(int, int)
+    finished = QtCore.Signal()
+
+    # Seconds of scanning per timer tick.
+    TIME_SLICE = 0.015
+
+    def __init__(self, nodes=None, exclude=(), parent=None):
+        """
+        Initialize the SceneScan.
+        Args:
+            nodes (list): Only scan the skinClusters deforming these nodes, None for the whole scene.
+            exclude (iterable): skinClusters to skip.
+            parent (QObject): The parent object.
+        """
+
+        super(SceneScan, self).__init__(parent)
+        self.nodes = nodes
+        self.exclude = exclude
+        self.steps = None
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.step)
+
+    def start(self):
+        """
+        Start scanning on the next event loop iterations.
+        """
+
+        self.steps = logics.scan_skin_clusters(self.nodes, exclude=self.exclude)
+        self.timer.start()
+
+    def cancel(self):
+        """
+        Stop scanning, the rows already found are kept.
+        """
+
+        if self.steps is not None:
+            self.timer.stop()
+            self.steps.close()
+            self.steps = None
+            self.finished.emit()
+
+    def is_running(self):
+        return self.steps is not None
+
+    def step(self):
+        """
+        Scan for one time slice and hand over what was found.
+        """
+
+        rows = []
+        deadline = time.perf_counter() + self.TIME_SLICE
+        try:
+            while time.perf_counter() < deadline:
+                done, total, chunk = next(self.steps)
+                rows.extend(chunk)
+        except StopIteration:
+            self.steps = None
+            self.timer.stop()
+        if rows:
+            self.found.emit([models.SkinClusterEntry(*row) for row in rows])
+        if self.steps is not None:
+            self.progress.emit(done, total)
+        else:
+            self.finished.emit()
 
 class SkinClusterManager(QtWidgets.QDialog):
     """
@@ -113,7 +229,7 @@ class SkinClusterManager(QtWidgets.QDialog):
         """
         Initialize the SkinClusterManager UI.
         """ 
-        super(SkinClusterManager, self).__init__(wrapInstance(int(omui.MQtUtil.mainWindow()), QtWidgets.QMainWindow))
+        super(SkinClusterManager, self).__init__(maya_main_window())
         self.setWindowTitle("SkinCluster Manager")
         self.setMinimumSize(700, 400)
 
@@ -126,6 +242,8 @@ class SkinClusterManager(QtWidgets.QDialog):
         self.create_layout()
         self.create_connections()
         self.apply_stylesheet()
+        # Save the icons rasterized while building the widgets in one write.
+        assets.flush()
 
     def create_widgets(self):
         """ 
@@ -180,6 +298,14 @@ class SkinClusterManager(QtWidgets.QDialog):
 
         self.copyRight_text = QtWidgets.QLabel("Copyright© 2025 Guido Gonzalez. All rights reserved.")
         self.version_text = QtWidgets.QLabel("Version 1.0.0")
+
+        self.scan_progress = QtWidgets.QProgressBar()
+        self.scan_progress.setFormat("Scanning %v/%m")
+        self.scan_progress.setVisible(False)
+        self.cancel_scan_btn = QtWidgets.QPushButton("Cancel")
+        self.cancel_scan_btn.setToolTip("Stop loading skin clusters")
+        self.cancel_scan_btn.setVisible(False)
+        self.scan = None
         
         
 
@@ -213,6 +339,10 @@ class SkinClusterManager(QtWidgets.QDialog):
         bottom_horizontal_layout.addWidget(self.combine_skc)
         bottom_horizontal_layout.addWidget(self.rebuild_skc) 
 
+        scan_horizontal_layout = QtWidgets.QHBoxLayout()
+        scan_horizontal_layout.addWidget(self.scan_progress)
+        scan_horizontal_layout.addWidget(self.cancel_scan_btn)
+
         bottom_text_horizontal_layout = QtWidgets.QHBoxLayout()   
         bottom_text_horizontal_layout.addWidget(self.copyRight_text)
         bottom_text_horizontal_layout.addStretch()
@@ -223,6 +353,7 @@ class SkinClusterManager(QtWidgets.QDialog):
         main_layout.addWidget(self.div1)
         main_layout.addLayout(top_horizontal_layout)
         main_layout.addLayout(bottom_horizontal_layout)
+        main_layout.addLayout(scan_horizontal_layout)
         main_layout.addWidget(self.div2)
         main_layout.addLayout(bottom_text_horizontal_layout)    
 
@@ -234,39 +365,35 @@ class SkinClusterManager(QtWidgets.QDialog):
         self.load_source.load_source_btn.clicked.connect(self.load_source_skin_clusters) 
         self.target_source.load_source_btn.clicked.connect(self.load_target_skin_clusters)
         self.remove_skc.clicked.connect(self.remove_selected_skin_cluster)
+        self.cancel_scan_btn.clicked.connect(self.cancel_scan)
         self.right_btn.clicked.connect(self.move_source_to_target)  
         self.left_btn.clicked.connect(self.move_target_to_source)
         self.combine_skc.clicked.connect(self.combine_skin_cluster)
         self.rebuild_skc.clicked.connect(self.rebuild_skin_cluster)
 
+    def refresh(self):
+        """
+        Bring a window shown again up to date: drop the listed skin clusters that were deleted
+        while it was hidden and pick up stylesheet edits.
+        """
+        adapter = logics.get_adapter()
+        for compound_list in (self.load_source, self.target_source):
+            entries = compound_list.model.entries
+            existing = [entry for entry in entries if adapter.exists(entry.name)]
+            if len(existing) != len(entries):
+                compound_list.model.replace(existing)
+        self.apply_stylesheet()
+
     def get_svg(self, name=None):
         """
-        Load SVG icon from the specified path.
+        Get an SVG icon from the cached asset bundle.
         Args:
             name (str): The name of the SVG icon to load.
         Returns:    
             QIcon: The loaded SVG icon.
         """
 
-        if not os.path.exists(self.svg_path):
-            print(f"SVG path not found: {self.svg_path}")
-            return QtGui.QIcon()
-
-        try:
-            with open(self.svg_path, "r") as file:
-                svg_dict = json.load(file)
-
-            if name and name in svg_dict:
-                svg_data = svg_dict[name]
-                pixmap = QtGui.QPixmap()
-                pixmap.loadFromData(QtCore.QByteArray(svg_data.encode()), "SVG")
-                return QtGui.QIcon(pixmap)
-            else:
-                print(f"SVG with name '{name}' not found in the SVG dictionary.")
-                return QtGui.QIcon()
-        except Exception as e:
-            print(f"Failed to load SVG: {e}")
-            return QtGui.QIcon()
+        return assets.icon(name, self.json_path, self.svg_path)
 
     def open_help(self):
         """
@@ -279,43 +406,78 @@ class SkinClusterManager(QtWidgets.QDialog):
         """
         Load source skin clusters into the list widget.
         """
-        count = self.load_source.source_list.count()
-        self.load_source.source_list.addItem(f"New Source SkinCluster {count + 1}")
+        self.start_scan(self.load_source)
 
     def load_target_skin_clusters(self):
         """
         Load target skin clusters into the list widget.
         """
-        count = self.target_source.source_list.count()
-        self.target_source.source_list.addItem(f"New Target SkinCluster {count + 1}")
+        self.start_scan(self.target_source)
+
+    def start_scan(self, compound_list):
+        """
+        Scan the skin clusters under the selection, or the whole scene when nothing is selected,
+        and stream them into a list. Skin clusters already listed on either side are skipped.
+        Args:
+            compound_list (CompoundList): The list to fill.
+        """
+        self.cancel_scan()
+        selection = logics.get_adapter().selection()
+        self.scan = SceneScan(selection or None, set(self.load_source.names() + self.target_source.names()), self)
+        self.scan.found.connect(compound_list.model.append)
+        self.scan.progress.connect(self.update_scan_progress)
+        self.scan.finished.connect(self.end_scan)
+        self.scan_progress.setRange(0, 0)
+        self.scan_progress.setVisible(True)
+        self.cancel_scan_btn.setVisible(True)
+        self.scan.start()
+
+    def update_scan_progress(self, done, total):
+        """
+        Show the scan progress.
+        Args:
+            done (int): Skin clusters scanned so far.
+            total (int): Skin clusters to scan.
+        """
+        self.scan_progress.setRange(0, total)
+        self.scan_progress.setValue(done)
+
+    def cancel_scan(self):
+        """
+        Stop the running scan, if any.
+        """
+        if self.scan is not None and self.scan.is_running():
+            self.scan.cancel()
+
+    def end_scan(self):
+        """
+        Hide the scan progress once the scan is over.
+        """
+        self.scan_progress.setVisible(False)
+        self.cancel_scan_btn.setVisible(False)
+        self.scan.deleteLater()
+        self.scan = None
 
     def remove_selected_skin_cluster(self):
         """
         Remove selected skin clusters from the list widget.
         """
-        source_selected_items = self.load_source.source_list.selectedItems()
-        target_selected_items = self.target_source.source_list.selectedItems()
-        if source_selected_items:
-            for item in source_selected_items:
-                row = self.load_source.source_list.row(item)
-                self.load_source.source_list.takeItem(row)
-        if target_selected_items:
-            for item in target_selected_items:
-                row = self.target_source.source_list.row(item)
-                self.target_source.source_list.takeItem(row)
-        if not source_selected_items and not target_selected_items: 
+        source_selected_rows = self.load_source.selected_rows()
+        target_selected_rows = self.target_source.selected_rows()
+        if source_selected_rows:
+            self.load_source.model.take_rows(source_selected_rows)
+        if target_selected_rows:
+            self.target_source.model.take_rows(target_selected_rows)
+        if not source_selected_rows and not target_selected_rows: 
             print("No skin clusters selected.")
 
     def move_source_to_target(self):    
         """
         Move selected source skin clusters to the target list widget.       
         """ 
-        source_selected_items = self.load_source.source_list.selectedItems()
-        if source_selected_items:
-            for item in source_selected_items:
-                row = self.load_source.source_list.row(item)
-                target_item = self.load_source.source_list.takeItem(row)
-                self.target_source.source_list.addItem(target_item)
+        source_selected_rows = self.load_source.selected_rows()
+        if source_selected_rows:
+            self.target_source.model.append(self.load_source.model.take_rows(source_selected_rows))
         else:
             print("No source skin clusters selected.")
 
@@ -323,25 +485,21 @@ class SkinClusterManager(QtWidgets.QDialog):
         """
         Move selected target skin clusters to the source list widget.
         """ 
-        target_selected_items = self.target_source.source_list.selectedItems()
-        if target_selected_items:
-            for item in target_selected_items:
-                row = self.target_source.source_list.row(item)
-                source_item = self.target_source.source_list.takeItem(row)
-                self.load_source.source_list.addItem(source_item)
+        target_selected_rows = self.target_source.selected_rows()
+        if target_selected_rows:
+            self.load_source.model.append(self.target_source.model.take_rows(target_selected_rows))
         else:
             print("No target skin clusters selected.")
 
     def combine_skin_cluster(self):
         """
-        Combine selected skin clusters from the target list widget.
+        Combine the skin clusters of the target list widget into the first one.
         """ 
-        target_items = [self.target_source.source_list.item(i).text() for i in range(self.target_source.source_list.count())]
-        selected_radio = "New Mesh" if self.new_mesh_radio.isChecked() else "Target Mesh"
-        if target_items:
-            print(f"Combined on {selected_radio}:", target_items)
+        target_items = self.target_source.names()
+        if len(target_items) >= 2:
+            logics.combine_skin_clusters([(target_items[0], target_items[1:])])
         else:
-            print("No target skin clusters.")
+            print("At least two target skin clusters are needed to combine.")
 
 
     def rebuild_skin_cluster(self): 
@@ -349,11 +507,11 @@ class SkinClusterManager(QtWidgets.QDialog):
         Rebuild selected skin clusters from the source and target list widgets.
         """
 
-        source_selected_items = [self.load_source.source_list.item(i).text() for i in range(self.load_source.source_list.count())]
-        target_selected_items = [self.target_source.source_list.item(i).text() for i in range(self.target_source.source_list.count())]
-        selected_radio = "New Mesh" if self.new_mesh_radio.isChecked() else "Target Mesh"
+        source_selected_items = self.load_source.names()
+        target_selected_items = self.target_source.names()
+        selected_mesh = "new" if self.new_mesh_radio.isChecked() else "target"
         if source_selected_items or target_selected_items:
-            print(f"Rebuilt on {selected_radio}:", source_selected_items + target_selected_items)
+            logics.rebuild_skin_clusters(source_selected_items + target_selected_items, mesh=selected_mesh)
         else:
             print("No skin clusters to rebuild.")
 
@@ -362,36 +520,16 @@ class SkinClusterManager(QtWidgets.QDialog):
         Apply the stylesheet to the UI.
         """
         stylesheet = self.load_stylesheet_from_json(self.json_path)
-        if stylesheet:
+        # Setting the same stylesheet again would still restyle every widget.
+        if stylesheet and stylesheet != self.styleSheet():
             self.setStyleSheet(stylesheet)
 
     def load_stylesheet_from_json(self, json_path):
         """
-        Load the stylesheet from a JSON file.   
+        Get the stylesheet compiled from a JSON file, cached until the file changes.
         Args:
             json_path (str): The path to the JSON file containing the stylesheet.
         Returns:
             str: The loaded stylesheet as a string.
         """
-        if not os.path.exists(json_path):
-            print(f"Stylesheet not found: {json_path}")
-            return None
-
-        try:
-            with open(json_path, "r") as file:
-                style_dict = json.load(file)
-
-            style_sheet = ""
-            for selector, props in style_dict.items():
-                style_sheet += f"{selector} {{\n"
-                for prop, val in props.items():
-                    style_sheet += f"    {prop}: {val};\n"
-                style_sheet += "}\n"
-            return style_sheet
-        except Exception as e:
-            print(f"Failed to load stylesheet: {e}")
-            return None
-
-
-
-
+        return assets.load(json_path, self.svg_path).stylesheet
@@ -0,0 +1,51 @@
+import maya.api.OpenMaya as om2
+
+from skinClusterManager import dcc
+
+
+"""
+Maya plug-in of the undoable command the adapter runs its API edits through, loaded by
+dcc.MayaAdapter.run_undoable. MDGModifier edits and MFnSkinCluster.setWeights do not enter the undo
+queue on their own, the command picks the pending edit up in doIt and keeps it for undo and redo.
+"""
+
+
+def maya_useNewAPI():
+    """
+    Tell Maya the plug-in uses the Python API 2.0.
+    """
+
+
+class EditCommand(om2.MPxCommand):
+    """
+    Runs one pending (do, undo) edit of the adapter.
+    """
+
+    def __init__(self):
+        super(EditCommand, self).__init__()
+        self.edit = None
+
+    @classmethod
+    def creator(cls):
+        return cls()
+
+    def doIt(self, args):
+        self.edit = dcc.take_pending_edit()
+        self.edit[0]()
+
+    def redoIt(self):
+        self.edit[0]()
+
+    def undoIt(self):
+        self.edit[1]()
+
+    def isUndoable(self):
+        return True
+
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin, "skinClusterManager", "1.0").registerCommand(dcc.UNDO_COMMAND, EditCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand(dcc.UNDO_COMMAND)
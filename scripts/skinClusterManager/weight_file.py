@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from skinClusterManager import weights
+
+
+"""
+Binary skin weight files (.skw).
+
+Layout, little endian:
+    magic       4 bytes   b"SKCW"
+    version     uint16
+    reserved    uint16
+    header size uint64
+    header      JSON: influences, vertex count, nnz, value dtype, topology hash, bind pre matrices
+                and section offsets
+    sections    indptr (int64, vertices + 1), indices (int32, nnz), values (float32/64, nnz),
+                each one starting on a 64 byte boundary so it can be memory mapped as is.
+"""
+
+
+MAGIC = b"SKCW"
+VERSION = 1
+ALIGNMENT = 64
+PREAMBLE = struct.Struct("<4sHHQ")
+VALUE_DTYPES = {"float32": np.dtype("<f4"), "float64": np.dtype("<f8")}
+
+
+def topology_hash(vertex_count, face_counts, face_vertices):
+    """
+    Hash the topology of a mesh, independently of its point positions.
+    Args:
+        vertex_count (int): Number of vertices.
+        face_counts (np.ndarray): Vertex count of every face.
+        face_vertices (np.ndarray): Vertex indices of every face, concatenated.
+    Returns:
+        str: The hexadecimal hash.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(struct.pack("<Q", vertex_count))
+    digest.update(np.ascontiguousarray(face_counts, dtype="<i4").tobytes())
+    digest.update(np.ascontiguousarray(face_vertices, dtype="<i4").tobytes())
+    return digest.hexdigest()
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write(path, sparse_weights, topology=None, skin_cluster=None, bind_pre_matrices=None):
+    """
+    Write sparse weights to a binary weight file. The file is replaced atomically.
+    Args:
+        path (str): The file path.
+        sparse_weights (weights.SparseWeights): The weights to write.
+        topology (str): The topology hash of the deformed mesh.
+        skin_cluster (str): The skinCluster the weights come from, kept for reference.
+        bind_pre_matrices (dict): Influence name to its 4x4 bind pre matrix in that skinCluster,
+            given to the influences an import adds.
+    Returns:
+        str: The file path.
+    """
+
+    value_dtype = "float32" if sparse_weights.values.dtype == np.float32 else "float64"
+    arrays = [
+        ("indptr", np.ascontiguousarray(sparse_weights.indptr, dtype="<i8")),
+        ("indices", np.ascontiguousarray(sparse_weights.indices, dtype="<i4")),
+        ("values", np.ascontiguousarray(sparse_weights.values, dtype=VALUE_DTYPES[value_dtype])),
+    ]
+    header = {
+        "skin_cluster": skin_cluster,
+        "influences": sparse_weights.influences,
+        "vertex_count": sparse_weights.vertex_count,
+        "nnz": sparse_weights.nnz,
+        "dtype": value_dtype,
+        "topology": topology,
+        "bind_pre_matrices": {name: np.asarray(matrix, dtype=np.float64).ravel().tolist() for name, matrix in (bind_pre_matrices or {}).items()},
+        "sections": {},
+    }
+
+    # Offsets depend on the header size and the header holds the offsets, so size it with
+    # placeholders first; the digits of the real offsets can only make it grow by a few bytes.
+    for name, array in arrays:
+        header["sections"][name] = [0, len(array)]
+    header_size = len(json.dumps(header).encode("utf-8")) + 64
+    offset = _aligned(PREAMBLE.size + header_size)
+    for name, array in arrays:
+        header["sections"][name] = [offset, len(array)]
+        offset = _aligned(offset + array.nbytes)
+    header_bytes = json.dumps(header).encode("utf-8").ljust(header_size)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(PREAMBLE.pack(MAGIC, VERSION, 0, header_size))
+        file.write(header_bytes)
+        for name, array in arrays:
+            file.seek(header["sections"][name][0])
+            file.write(memoryview(array).cast("B"))
+    os.replace(temp_path, path)
+    return path
+
+
+def read_header(path):
+    """
+    Read the header of a binary weight file.
+    Args:
+        path (str): The file path.
+    Returns:
+        dict: The header.
+    """
+
+    with open(path, "rb") as file:
+        magic, version, _, header_size = PREAMBLE.unpack(file.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not a skin weight file: {path}")
+        if version > VERSION:
+            raise ValueError(f"Unsupported skin weight file version {version}: {path}")
+        return json.loads(file.read(header_size).decode("utf-8"))
+
+
+def read(path, vertex_range=None, influences=None):
+    """
+    Open a binary weight file without loading it, arrays are memory mapped.
+    Only the pages of the requested vertex range are touched on disk.
+    Args:
+        path (str): The file path.
+        vertex_range (tuple): (start, stop) vertices to read, all of them when not given.
+        influences (list): Only keep the weights of these influences, in this column order.
+    Returns:
+        tuple: The SparseWeights and the header.
+    """
+
+    header = read_header(path)
+    sections = header["sections"]
+
+    def section(name, dtype):
+        offset, count = sections[name]
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+    result = weights.SparseWeights(
+        section("indptr", np.dtype("<i8")),
+        section("indices", np.dtype("<i4")),
+        section("values", VALUE_DTYPES[header["dtype"]]),
+        header["influences"],
+    )
+    if vertex_range is not None:
+        result = result.slice_rows(*vertex_range)
+    if influences is not None:
+        result = result.remap(influences)
+    return result, header
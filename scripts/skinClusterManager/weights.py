@@ -0,0 +1,607 @@
+import hashlib
+import re
+
+import numpy as np
+
+
+"""
+Pure NumPy maths for skin weights.
+Nothing in here talks to Maya, every function works on plain arrays and influence name lists.
+"""
+
+
+class SparseWeights(object):
+    """
+    Compressed sparse row container for skin weights.
+    Row v holds the non-zero weights of vertex v: indices[indptr[v]:indptr[v + 1]] are influence
+    columns, sorted ascending, and values[indptr[v]:indptr[v + 1]] their weights. Memory scales
+    with the number of non-zero weights instead of vertices x influences.
+    """
+
+    __slots__ = ("indptr", "indices", "values", "influences")
+
+    def __init__(self, indptr, indices, values, influences):
+        """
+        Initialize the SparseWeights.
+        Args:
+            indptr (np.ndarray): Row pointers of length vertices + 1.
+            indices (np.ndarray): Influence column of every stored weight.
+            values (np.ndarray): Every stored weight, float32 or float64.
+            influences (list): Influence names, one per column.
+        """
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.values = np.asarray(values)
+        if self.values.dtype not in (np.float32, np.float64):
+            self.values = self.values.astype(np.float64)
+        self.influences = list(influences)
+
+    def __repr__(self):
+        return f"SparseWeights(vertices={self.vertex_count}, influences={self.influence_count}, nnz={self.nnz}, dtype={self.values.dtype})"
+
+    @property
+    def vertex_count(self):
+        return len(self.indptr) - 1
+
+    @property
+    def influence_count(self):
+        return len(self.influences)
+
+    @property
+    def nnz(self):
+        return len(self.values)
+
+    @property
+    def shape(self):
+        return (self.vertex_count, self.influence_count)
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + self.values.nbytes
+
+    @classmethod
+    def from_dense(cls, dense, influences, threshold=0.0, dtype=np.float64):
+        """
+        Build a SparseWeights from a dense weight matrix.
+        Args:
+            dense (np.ndarray): Weight matrix of shape (vertices, influences).
+            influences (list): Influence names, one per column.
+            threshold (float): Weights at or below this value are dropped.
+            dtype (np.dtype): Value type, float64 or float32.
+        Returns:
+            SparseWeights: The sparse weights.
+        """
+
+        dense = np.asarray(dense)
+        rows, columns = np.nonzero(dense > threshold)
+        indptr = np.zeros(dense.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=dense.shape[0]), out=indptr[1:])
+        return cls(indptr, columns, dense[rows, columns].astype(dtype), influences)
+
+    @classmethod
+    def from_coo(cls, rows, columns, values, vertex_count, influences, dtype=np.float64):
+        """
+        Build a SparseWeights from coordinate triplets, summing duplicated entries.
+        Args:
+            rows (np.ndarray): Vertex index of every entry.
+            columns (np.ndarray): Influence column of every entry.
+            values (np.ndarray): Weight of every entry.
+            vertex_count (int): Number of vertices.
+            influences (list): Influence names, one per column.
+            dtype (np.dtype): Value type, float64 or float32.
+        Returns:
+            SparseWeights: The sparse weights.
+        """
+
+        keys = np.asarray(rows, dtype=np.int64) * len(influences) + np.asarray(columns, dtype=np.int64)
+        keys, inverse = np.unique(keys, return_inverse=True)
+        summed = np.bincount(inverse.ravel(), weights=values, minlength=len(keys))
+        rows = keys // max(len(influences), 1)
+        indptr = np.zeros(vertex_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=vertex_count), out=indptr[1:])
+        return cls(indptr, keys - rows * len(influences), summed.astype(dtype), influences)
+
+    @classmethod
+    def vstack(cls, blocks):
+        """
+        Stack several SparseWeights sharing the same influences into one.
+        Args:
+            blocks (list): SparseWeights in vertex order.
+        Returns:
+            SparseWeights: The stacked weights.
+        """
+
+        offsets = np.cumsum([0] + [block.nnz for block in blocks[:-1]])
+        indptr = np.concatenate([[0]] + [block.indptr[1:] + offset for block, offset in zip(blocks, offsets)])
+        return cls(
+            indptr,
+            np.concatenate([block.indices for block in blocks]),
+            np.concatenate([block.values for block in blocks]),
+            blocks[0].influences,
+        )
+
+    def copy(self):
+        return SparseWeights(self.indptr.copy(), self.indices.copy(), self.values.copy(), self.influences)
+
+    def digest(self):
+        """
+        Hash the weights and influence names, e.g. to tell if cached results are still valid.
+        Returns:
+            str: The hexadecimal hash.
+        """
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update("\0".join(self.influences).encode("utf-8"))
+        for array in (self.indptr, self.indices, self.values):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    def astype(self, dtype):
+        """
+        Get a copy of the weights stored with another value type.
+        Args:
+            dtype (np.dtype): float32 or float64.
+        Returns:
+            SparseWeights: The converted weights.
+        """
+
+        return SparseWeights(self.indptr, self.indices, self.values.astype(dtype), self.influences)
+
+    def slice_rows(self, start, stop):
+        """
+        Get the weights of a contiguous range of vertices, sharing memory with this container.
+        Args:
+            start (int): First vertex index.
+            stop (int): Vertex index after the last one.
+        Returns:
+            SparseWeights: The weights of the vertex range.
+        """
+
+        first, last = self.indptr[start], self.indptr[stop]
+        return SparseWeights(self.indptr[start:stop + 1] - first, self.indices[first:last], self.values[first:last], self.influences)
+
+    def replace_rows(self, start, block):
+        """
+        Get a copy of the weights with a contiguous range of vertices replaced.
+        Args:
+            start (int): First vertex index to replace.
+            block (SparseWeights): The new weights of the range, with the same influences.
+        Returns:
+            SparseWeights: The updated weights.
+        """
+
+        stop = start + block.vertex_count
+        return SparseWeights.vstack([self.slice_rows(0, start), block, self.slice_rows(stop, self.vertex_count)])
+
+    def take_rows(self, rows):
+        """
+        Get the weights of arbitrary vertices, in the given order.
+        Args:
+            rows (np.ndarray): The vertex indices.
+        Returns:
+            SparseWeights: The weights of the vertices, one row per index.
+        """
+
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        counts = self.indptr[rows + 1] - starts
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        entries = np.repeat(starts - indptr[:-1], counts) + np.arange(indptr[-1])
+        return SparseWeights(indptr, self.indices[entries], self.values[entries], self.influences)
+
+    def put_rows(self, rows, block):
+        """
+        Get a copy of the weights with arbitrary vertices replaced.
+        Args:
+            rows (np.ndarray): The vertex indices to replace, without duplicates.
+            block (SparseWeights): The new weights, one row per index, with the same influences.
+        Returns:
+            SparseWeights: The updated weights.
+        """
+
+        order = np.arange(self.vertex_count, dtype=np.int64)
+        order[np.asarray(rows, dtype=np.int64)] = self.vertex_count + np.arange(block.vertex_count)
+        return SparseWeights.vstack([self, block]).take_rows(order)
+
+    def row_ids(self):
+        """
+        Get the vertex index of every stored weight.
+        Returns:
+            np.ndarray: Array of length nnz.
+        """
+
+        return np.repeat(np.arange(self.vertex_count, dtype=np.int64), np.diff(self.indptr))
+
+    def to_dense(self, dtype=np.float64):
+        """
+        Expand the weights to a dense matrix.
+        Args:
+            dtype (np.dtype): Value type of the matrix.
+        Returns:
+            np.ndarray: Weight matrix of shape (vertices, influences).
+        """
+
+        dense = np.zeros(self.shape, dtype=dtype)
+        dense[self.row_ids(), self.indices] = self.values
+        return dense
+
+    def row_sums(self):
+        """
+        Get the total weight of every vertex.
+        Returns:
+            np.ndarray: Array of length vertices.
+        """
+
+        return np.bincount(self.row_ids(), weights=self.values, minlength=self.vertex_count)
+
+    def _select(self, keep):
+        """
+        Build a new SparseWeights keeping only the masked entries.
+        Args:
+            keep (np.ndarray): Boolean mask of length nnz.
+        Returns:
+            SparseWeights: The filtered weights.
+        """
+
+        counts = np.bincount(self.row_ids()[keep], minlength=self.vertex_count)
+        indptr = np.zeros(self.vertex_count + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return SparseWeights(indptr, self.indices[keep], self.values[keep], self.influences)
+
+    def prune(self, threshold=1e-5):
+        """
+        Drop every weight at or below a threshold.
+        Args:
+            threshold (float): The pruning threshold.
+        Returns:
+            SparseWeights: The pruned weights, not normalized.
+        """
+
+        return self._select(self.values > threshold)
+
+    def normalize(self):
+        """
+        Normalize every vertex so its weights sum to one. Vertices without weights stay empty.
+        Returns:
+            SparseWeights: The normalized weights.
+        """
+
+        totals = self.row_sums()[self.row_ids()]
+        values = np.divide(self.values, totals, out=np.zeros_like(self.values), where=totals > 0.0)
+        return SparseWeights(self.indptr, self.indices, values.astype(self.values.dtype), self.influences)
+
+    def top_k(self, k):
+        """
+        Keep the k biggest weights of every vertex.
+        Args:
+            k (int): The maximum number of influences per vertex.
+        Returns:
+            SparseWeights: The capped weights, not normalized.
+        """
+
+        if k is None or np.diff(self.indptr).max(initial=0) <= k:
+            return self
+        rows = self.row_ids()
+        order = np.lexsort((-self.values, rows))
+        rank = np.empty(self.nnz, dtype=np.int64)
+        rank[order] = np.arange(self.nnz) - self.indptr[rows[order]]
+        return self._select(rank < k)
+
+    def remap(self, influences, renames=None):
+        """
+        Move the weights to another influence list, matching columns by name.
+        Weights on influences missing from the new list are dropped, influences renamed onto the
+        same new name are summed.
+        Args:
+            influences (list): The new influence names.
+            renames (dict): Maps current influence names to the names used in the new list.
+        Returns:
+            SparseWeights: The remapped weights.
+        """
+
+        if not renames and list(influences) == self.influences:
+            return self.copy()
+        index = InfluenceIndex([influences])
+        return index.scatter([self], [index.lookup(self.influences, renames)], dtype=self.values.dtype)
+
+
+def value_tolerance(*dtypes):
+    """
+    Get the largest difference between weights that is only rounding, e.g. of a float32 round trip.
+    Args:
+        dtypes (np.dtype): The value types the weights went through.
+    Returns:
+        float: Four machine epsilons of the least precise type, at least 1e-9.
+    """
+
+    return max([1e-9] + [4.0 * float(np.finfo(dtype).eps) for dtype in dtypes])
+
+
+def changed_rows(old, new, tolerance=None):
+    """
+    Find the vertices whose weights differ between two versions of the same weights.
+    Args:
+        old (SparseWeights): The previous weights.
+        new (SparseWeights): The new weights, same shape and influences.
+        tolerance (float): Differences at or below this value are ignored, the rounding error of
+            the least precise of both value types when not given, see value_tolerance.
+    Returns:
+        np.ndarray: Boolean mask of length vertices.
+    """
+
+    if tolerance is None:
+        tolerance = value_tolerance(old.values.dtype, new.values.dtype)
+    if np.array_equal(old.indptr, new.indptr) and np.array_equal(old.indices, new.indices):
+        differences = np.abs(old.values.astype(np.float64) - new.values) > tolerance
+        return np.bincount(old.row_ids()[differences], minlength=old.vertex_count) > 0
+    # Different sparsity patterns, subtract them as coordinates so duplicates cancel out.
+    difference = SparseWeights.from_coo(
+        np.concatenate([old.row_ids(), new.row_ids()]),
+        np.concatenate([old.indices, new.indices]),
+        np.concatenate([old.values.astype(np.float64), -new.values.astype(np.float64)]),
+        old.vertex_count,
+        old.influences,
+    )
+    return np.bincount(difference.row_ids()[np.abs(difference.values) > tolerance], minlength=old.vertex_count) > 0
+
+
+def rename_table(names, namespace=None, swap=None):
+    """
+    Build a rename table for influence names, e.g. to match joints across namespaces or sides.
+    Args:
+        names (list): The influence names to rename.
+        namespace (tuple): (old prefix, new prefix), e.g. ("charA:", "charB:") or ("charA:", "").
+        swap (tuple): Two tokens swapped both ways, e.g. ("L", "R") or ("_L", "_R") mirrors sides.
+            Only whole tokens between underscores, namespace separators or the name ends are
+            swapped, "arm_L" becomes "arm_R" but "spine_Lower" is left alone.
+    Returns:
+        dict: Maps every name that changes to its new name.
+    """
+
+    table = {}
+    if swap:
+        tokens = {swap[0].strip("_"): swap[1].strip("_"), swap[1].strip("_"): swap[0].strip("_")}
+        pattern = re.compile(r"(?<![^_:|])({})(?![^_:|])".format("|".join(re.escape(token) for token in tokens)))
+    for name in names:
+        renamed = name
+        if namespace and renamed.startswith(namespace[0]):
+            renamed = namespace[1] + renamed[len(namespace[0]):]
+        if swap:
+            renamed = pattern.sub(lambda match: tokens[match.group(1)], renamed)
+        if renamed != name:
+            table[name] = renamed
+    return table
+
+
+class InfluenceIndex(object):
+    """
+    Merged influence list of several skinClusters.
+    Influence names are resolved once per list into integer column remap arrays; weights are then
+    moved to the merged columns with fancy indexing and summed with a single bincount pass, so the
+    cost does not depend on how the influence lists are ordered.
+    """
+
+    def __init__(self, influence_lists, renames=None):
+        """
+        Initialize the InfluenceIndex.
+        Args:
+            influence_lists (list): Influence name lists, the merged order follows their order.
+            renames (dict or list): A rename table applied to every list, or one table per list.
+        """
+
+        self.influences = []
+        self.columns = {}
+        self.remaps = []
+        for position, names in enumerate(influence_lists):
+            table = self._table(renames, position)
+            for name in names:
+                name = table.get(name, name)
+                if name not in self.columns:
+                    self.columns[name] = len(self.influences)
+                    self.influences.append(name)
+            self.remaps.append(self.lookup(names, table))
+
+    @staticmethod
+    def _table(renames, position):
+        if renames is None:
+            return {}
+        if isinstance(renames, dict):
+            return renames
+        return renames[position] or {}
+
+    def lookup(self, names, renames=None):
+        """
+        Get the merged column of every name.
+        Args:
+            names (list): Influence names.
+            renames (dict): Rename table applied to the names first.
+        Returns:
+            np.ndarray: Merged column per name, -1 for names that are not in the index.
+        """
+
+        renames = renames or {}
+        return np.array([self.columns.get(renames.get(name, name), -1) for name in names], dtype=np.int64)
+
+    def scatter(self, sources, remaps=None, scales=None, dtype=np.float64):
+        """
+        Move the weights of several sources to the merged columns and sum them.
+        Args:
+            sources (list): SparseWeights with the same vertex count.
+            remaps (list): Column remap array per source, the index remaps when not given. Columns
+                mapped to -1 are dropped.
+            scales (list): Optional per vertex multiplier array per source, None to keep a source as is.
+            dtype (np.dtype): Value type of the result.
+        Returns:
+            SparseWeights: The summed weights over the merged influences.
+        """
+
+        remaps = self.remaps if remaps is None else remaps
+        rows, columns, values = [], [], []
+        for position, source in enumerate(sources):
+            source_rows = source.row_ids()
+            source_columns = remaps[position][source.indices]
+            source_values = source.values
+            if scales is not None and scales[position] is not None:
+                source_values = source_values * scales[position][source_rows]
+            keep = source_columns >= 0
+            rows.append(source_rows[keep])
+            columns.append(source_columns[keep])
+            values.append(source_values[keep])
+        return SparseWeights.from_coo(
+            np.concatenate(rows),
+            np.concatenate(columns),
+            np.concatenate(values),
+            sources[0].vertex_count,
+            self.influences,
+            dtype,
+        )
+
+
+def union_influences(base_influences, layer_influences):
+    """
+    Build the ordered union of two influence lists.
+    Args:
+        base_influences (list): Influence names of the base skinCluster.
+        layer_influences (list): Influence names of the layer skinCluster.
+    Returns:
+        list: Base influences followed by the layer influences the base does not have.
+    """
+
+    return InfluenceIndex([base_influences, layer_influences]).influences
+
+
+def merge_weights(base, layer, passthrough=None, max_influences=None, renames=None):
+    """
+    Merge two stacked skinClusters into a single set of weights.
+    The layer skinCluster is the one evaluated last in the stack. Whatever weight it puts on a
+    passthrough influence is handed over to the base skinCluster and redistributed following the
+    base weights of that vertex, the rest of the layer weights are kept as they are.
+    Args:
+        base (SparseWeights): Weights of the base skinCluster.
+        layer (SparseWeights): Weights of the layer skinCluster.
+        passthrough (list): Layer influences that hand their weight to the base, named as in the
+            base after renaming. Defaults to the influences both skinClusters share.
+        max_influences (int): Cap on the influences per vertex of the result.
+        renames (dict): Maps layer influence names to base names, see rename_table.
+    Returns:
+        SparseWeights: The merged and normalized weights, base influences first. Passthrough
+            influences the base does not have are left out.
+    """
+
+    if base.vertex_count != layer.vertex_count:
+        raise ValueError(f"Vertex count mismatch: {base.vertex_count} != {layer.vertex_count}")
+
+    renames = renames or {}
+    layer_names = [renames.get(name, name) for name in layer.influences]
+    if passthrough is None:
+        passthrough = set(base.influences).intersection(layer_names)
+    else:
+        passthrough = set(passthrough)
+
+    index = InfluenceIndex([base.influences, [name for name in layer_names if name not in passthrough]])
+    is_handover = np.array([name in passthrough for name in layer_names], dtype=bool)
+    layer_remap = np.where(is_handover, -1, index.lookup(layer_names))
+
+    entry_handover = is_handover[layer.indices]
+    handover = np.bincount(layer.row_ids()[entry_handover], weights=layer.values[entry_handover], minlength=layer.vertex_count)
+
+    merged = index.scatter(
+        [layer, base],
+        [layer_remap, index.remaps[0]],
+        [None, handover],
+        np.result_type(base.values.dtype, layer.values.dtype),
+    )
+    return merged.prune(0.0).top_k(max_influences).normalize()
+
+
+def blend_rows(source, rows, factors):
+    """
+    Build new vertices as weighted blends of source vertices, e.g. barycentric interpolation.
+    Args:
+        source (SparseWeights): The source weights.
+        rows (np.ndarray): Source vertex indices of shape (vertices, n).
+        factors (np.ndarray): Blend factor of every source vertex, shape (vertices, n).
+    Returns:
+        SparseWeights: The blended weights, one row per new vertex, not normalized.
+    """
+
+    rows = np.asarray(rows, dtype=np.int64)
+    vertex_count = rows.shape[0]
+    targets = np.repeat(np.arange(vertex_count, dtype=np.int64), rows.shape[1])
+    return accumulate_rows(source, targets, rows.ravel(), factors, vertex_count)
+
+
+def accumulate_rows(source, targets, rows, factors, vertex_count):
+    """
+    Sum scaled source vertices into new vertices, any number of source vertices per new vertex.
+    Args:
+        source (SparseWeights): The source weights.
+        targets (np.ndarray): New vertex index of every term.
+        rows (np.ndarray): Source vertex index of every term.
+        factors (np.ndarray): Scale of every term.
+        vertex_count (int): Number of new vertices.
+    Returns:
+        SparseWeights: The summed weights, not normalized.
+    """
+
+    targets = np.asarray(targets, dtype=np.int64)
+    rows = np.asarray(rows, dtype=np.int64)
+    factors = np.broadcast_to(np.asarray(factors, dtype=np.float64).ravel(), rows.shape)
+
+    starts = source.indptr[rows]
+    counts = source.indptr[rows + 1] - starts
+    offsets = np.cumsum(counts) - counts
+    entries = np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+    return SparseWeights.from_coo(
+        np.repeat(targets, counts),
+        source.indices[entries],
+        source.values[entries] * np.repeat(factors, counts),
+        vertex_count,
+        source.influences,
+        source.values.dtype,
+    )
+
+
+def replace_influences(current, imported, influences):
+    """
+    Replace the weights of some influences and renormalize, the other influences keep their weights.
+    Args:
+        current (SparseWeights): The weights to update.
+        imported (SparseWeights): The new weights, same vertices and influences as current.
+        influences (list): The influences taken from imported.
+    Returns:
+        SparseWeights: The updated and normalized weights.
+    """
+
+    influences = set(influences)
+    replaced = np.array([name in influences for name in current.influences], dtype=bool)
+    kept = current._select(~replaced[current.indices])
+    taken = imported._select(replaced[imported.indices])
+    return SparseWeights.from_coo(
+        np.concatenate([kept.row_ids(), taken.row_ids()]),
+        np.concatenate([kept.indices, taken.indices]),
+        np.concatenate([kept.values, taken.values]),
+        current.vertex_count,
+        current.influences,
+    ).normalize()
+
+
+def merge_stack(layers, passthrough=None, max_influences=None, renames=None):
+    """
+    Merge a whole stack of skinClusters, folding every layer onto the merged result below it.
+    Kept at module level so process pools can pickle it.
+    Args:
+        layers (list): SparseWeights in evaluation order, the first one is the base.
+        passthrough (list): See merge_weights.
+        max_influences (int): Cap on the influences per vertex of the result.
+        renames (dict): Maps layer influence names to the names used below them, see rename_table.
+    Returns:
+        SparseWeights: The merged and normalized weights.
+    """
+
+    merged = layers[0]
+    for layer in layers[1:]:
+        merged = merge_weights(merged, layer, passthrough, renames=renames)
+    return merged.prune(0.0).top_k(max_influences).normalize()
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from skinClusterManager import fakes
+
+fakes.install()
+
+from skinClusterManager import logics
+from skinClusterManager.benchmarks import rigs
+
+
+"""
+Shared fixtures. The fake maya modules are installed before anything imports the logics, every
+test then runs on its own fakes.FakeScene.
+"""
+
+
+def activate(adapter):
+    """
+    Point the logics and the fake MGlobal at the scene of an adapter.
+    Args:
+        adapter (fakes.FakeAdapter): The adapter.
+    Returns:
+        fakes.FakeAdapter: The adapter.
+    """
+    fakes.FakeGlobal.scene = adapter.scene
+    logics.set_adapter(adapter)
+    return adapter
+
+
+@pytest.fixture
+def adapter():
+    yield activate(fakes.FakeAdapter(fakes.FakeScene()))
+    logics.set_adapter(None)
+
+
+@pytest.fixture
+def rig():
+    built = rigs.build_rig(rigs.RigSpec(vertex_count=400, influence_count=8, chain_depth=2))
+    activate(built.adapter)
+    yield built
+    logics.set_adapter(None)
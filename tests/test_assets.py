@@ -0,0 +1,73 @@
+import atexit
+import importlib
+import json
+import os
+
+import pytest
+
+from skinClusterManager import assets
+
+
+"""
+UI assets: compiled once, persisted to the local disk and flushed once per session.
+"""
+
+
+@pytest.fixture
+def asset_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("SKIN_CLUSTER_MANAGER_CACHE", str(tmp_path / "cache"))
+    stylesheet_path, images_path = str(tmp_path / "styleSheet.json"), str(tmp_path / "images.json")
+    with open(stylesheet_path, "w") as file:
+        json.dump({"QPushButton": {"color": "red"}}, file)
+    with open(images_path, "w") as file:
+        json.dump({"add": "<svg/>"}, file)
+    assets.invalidate()
+    yield stylesheet_path, images_path
+    assets.invalidate()
+
+
+def test_compile_stylesheet():
+    assert assets.compile_stylesheet({"QLabel": {"color": "red", "margin": "2px"}}) == "QLabel {\n    color: red;\n    margin: 2px;\n}\n"
+
+
+def test_load_reuses_the_bundle_until_a_file_changes(asset_files):
+    bundle = assets.load(*asset_files)
+    assert bundle.stylesheet == "QPushButton {\n    color: red;\n}\n"
+    assert bundle.svgs == {"add": "<svg/>"}
+    assert assets.load(*asset_files) is bundle
+
+    with open(asset_files[1], "w") as file:
+        json.dump({"add": "<svg/>", "remove": "<svg/>"}, file)
+    os.utime(asset_files[1], ns=(0, 0))
+    assert set(assets.load(*asset_files).svgs) == {"add", "remove"}
+
+
+def test_new_session_reads_the_persisted_bundle(asset_files, monkeypatch):
+    assets.load(*asset_files)
+    assert os.path.exists(assets.bundle_path(*asset_files))
+    assets.invalidate()
+    monkeypatch.setattr(assets, "_compile", lambda *args: pytest.fail("the persisted bundle was not reused"))
+    assert assets.load(*asset_files).svgs == {"add": "<svg/>"}
+
+
+def test_flush_saves_the_rasters_once(asset_files, monkeypatch):
+    bundle = assets.load(*asset_files)
+    bundle.rasters["add"] = b"png"
+    bundle.unsaved = True
+    saves = []
+    save = assets.save
+    monkeypatch.setattr(assets, "save", lambda *args: saves.append(args) or save(*args))
+    assets.flush()
+    assets.flush()
+    assert len(saves) == 1
+
+    assets.invalidate()
+    assert assets.load(*asset_files).rasters == {"add": b"png"}
+
+
+def test_reload_keeps_one_exit_handler(monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+    importlib.reload(assets)
+    importlib.reload(assets)
+    assert registered == []
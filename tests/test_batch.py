@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+
+from skinClusterManager.batch import backends
+from skinClusterManager.batch import jobs
+from skinClusterManager.batch import scheduler
+
+
+"""
+Batch scheduler on the fake backend: timeouts, retries and the journal it resumes from.
+Every attempt runs in a spawned worker process.
+"""
+
+
+def _job(tmp_path, name, retries=0, timeout=None, **scene):
+    path = tmp_path / f"{name}.json"
+    path.write_text(json.dumps(dict(vertex_count=100, influence_count=4, chain_depth=2, **scene)))
+    return jobs.Job(str(path), [("combine", {})], str(tmp_path / "output" / name), save=True, timeout=timeout, retries=retries)
+
+
+def _events(journal, job):
+    return [event["event"] for event in journal.events() if event["job"] == job.id]
+
+
+def test_done_and_resumed(tmp_path):
+    job = _job(tmp_path, "scene")
+    journal = jobs.Journal(str(tmp_path / "journal.jsonl"))
+    assert scheduler.Scheduler([job], "fake", journal, workers=1).run() == {"done": 1, "failed": 0, "timeout": 0, "skipped": 0}
+    assert _events(journal, job) == ["start", "done"]
+    assert journal.events()[-1]["result"]["operations"]["combine"] == ["mesh0_skinCluster0"]
+    with open(job.saved_path) as file:
+        assert json.load(file)["skin_clusters"] == ["mesh0_skinCluster0"]
+
+    assert scheduler.Scheduler([job], "fake", journal, workers=1).run() == {"done": 0, "failed": 0, "timeout": 0, "skipped": 1}
+    assert _events(journal, job) == ["start", "done"]
+
+
+def test_failed_jobs_are_retried(tmp_path):
+    job = _job(tmp_path, "broken", retries=1, fail="corrupt scene")
+    journal = jobs.Journal(str(tmp_path / "journal.jsonl"))
+    summary = scheduler.Scheduler([job], "fake", journal, workers=1).run()
+    assert summary["failed"] == 1
+    assert _events(journal, job) == ["start", "failed", "retry", "start", "failed"]
+    assert "corrupt scene" in journal.events()[-1]["error"]
+    assert job.id not in journal.completed()
+
+
+def test_timeout_stops_the_worker(tmp_path):
+    slow = _job(tmp_path, "slow", timeout=0.5, delay=60.0)
+    fast = _job(tmp_path, "fast")
+    journal = jobs.Journal(str(tmp_path / "journal.jsonl"))
+    summary = scheduler.Scheduler([slow, fast], "fake", journal, workers=2).run()
+    assert summary == {"done": 1, "failed": 0, "timeout": 1, "skipped": 0}
+    assert _events(journal, slow) == ["start", "timeout"]
+    assert journal.completed() == {fast.id}
+    assert not os.path.exists(slow.saved_path)
+
+
+def test_journal_ignores_a_cut_line(tmp_path):
+    job = _job(tmp_path, "scene")
+    journal = jobs.Journal(str(tmp_path / "journal.jsonl"))
+    journal.record(job, "done", attempt=1)
+    with open(journal.path, "a") as file:
+        file.write('{"job": "cut')
+    assert journal.completed() == {job.id}
+
+
+def test_incomplete_backend_cannot_be_created():
+    class OpenOnly(backends.Backend):
+        def open(self, path):
+            return None
+
+    with pytest.raises(TypeError):
+        OpenOnly()
@@ -0,0 +1,60 @@
+import numpy as np
+
+from skinClusterManager import cache
+from skinClusterManager import weights
+
+
+"""
+Derived data cache: fingerprinted mesh data shared by duplicates, invalidated by node callbacks.
+"""
+
+
+def test_adjacency_shared_by_duplicates(rig):
+    derived = cache.DerivedCache(rig.adapter)
+    adjacency = derived.adjacency("mesh0Shape")
+    rig.scene.duplicate("mesh0Shape", "copyShape")
+    assert derived.adjacency("copyShape") is adjacency
+    assert (derived.hits, derived.misses) == (1, 1)
+
+
+def test_mesh_index_rebuilt_when_points_move(rig):
+    derived = cache.DerivedCache(rig.adapter)
+    mesh_index = derived.mesh_index("mesh0Shape")
+    assert derived.mesh_index("mesh0Shape") is mesh_index
+    rig.scene.set_points("mesh0Shape", rig.scene.meshes["mesh0Shape"]["points"] + 1.0)
+    moved = derived.mesh_index("mesh0Shape")
+    assert moved is not mesh_index
+    np.testing.assert_array_equal(moved.points, mesh_index.points + 1.0)
+
+
+def test_weights_reread_only_after_outside_edits(rig):
+    bottom, _ = rig.chains[0]
+    derived = cache.DerivedCache(rig.adapter)
+    current = derived.weights(bottom)
+    dense = current.to_dense()[:, ::-1]
+    rig.adapter.write_weights(bottom, weights.SparseWeights.from_dense(dense, current.influences))
+    assert derived.weights(bottom).to_dense().tolist() == dense.tolist()
+    assert derived.misses == 1
+
+    rig.scene.write_rows(bottom, np.array([0]), current.take_rows(np.array([0])))
+    np.testing.assert_array_equal(derived.weights(bottom).to_dense()[0], current.to_dense()[0])
+    assert derived.misses == 2
+
+
+def test_budget_evicts_the_least_recently_used(rig):
+    derived = cache.DerivedCache(rig.adapter)
+    first = derived.adjacency("mesh0Shape")
+    derived.budget = derived.nbytes
+    mesh_index = derived.mesh_index("mesh0Shape")
+    assert [key[0] for key in derived.entries] == ["mesh_index"]
+    assert derived.nbytes == derived.entries[next(iter(derived.entries))][1]
+    assert derived.adjacency("mesh0Shape") is not first
+    assert derived.mesh_index("mesh0Shape") is not mesh_index
+
+
+def test_unwatch_removes_the_callbacks(rig):
+    derived = cache.DerivedCache(rig.adapter)
+    derived.adjacency("mesh0Shape")
+    assert rig.scene.node_listeners
+    derived.unwatch()
+    assert not rig.scene.node_listeners
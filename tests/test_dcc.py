@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from skinClusterManager import dcc
+from skinClusterManager import fakes
+from skinClusterManager import weights
+from skinClusterManager.benchmarks import rigs
+
+
+"""
+MayaAdapter weight and mesh I/O, run through its OpenMaya code on the fakes.api_modules stand-ins.
+"""
+
+
+@pytest.fixture
+def api_rig():
+    return rigs.build_rig(rigs.RigSpec(vertex_count=900, influence_count=8, chain_depth=1), fakes.FakeApiAdapter(fakes.FakeScene()))
+
+
+@pytest.mark.parametrize("chunk_size", [None, 100, dcc.CHUNK_SIZE])
+def test_read_write_round_trip(api_rig, chunk_size):
+    skin_cluster = api_rig.chains[0][0]
+    expected = api_rig.scene.skin_clusters[skin_cluster]["weights"].to_dense()
+    read = api_rig.adapter.read_weights(skin_cluster, chunk_size=chunk_size)
+    np.testing.assert_array_equal(read.to_dense(), expected)
+
+    api_rig.adapter.forget_weights(skin_cluster)
+    calls = api_rig.scene.write_calls
+    assert api_rig.adapter.write_weights(skin_cluster, read, chunk_size=chunk_size) == read.vertex_count
+    assert api_rig.scene.write_calls - calls == (-(-read.vertex_count // chunk_size) if chunk_size and chunk_size < read.vertex_count else 1)
+    np.testing.assert_array_equal(api_rig.scene.skin_clusters[skin_cluster]["weights"].to_dense(), expected)
+
+
+def test_write_only_changed_vertices(api_rig):
+    skin_cluster = api_rig.chains[0][0]
+    current = api_rig.adapter.read_weights(skin_cluster)
+    dense = current.to_dense()
+    dense[[5, 17, 899]] = dense[[5, 17, 899]][:, ::-1]
+    edited = weights.SparseWeights.from_dense(dense, current.influences)
+    assert api_rig.adapter.write_weights(skin_cluster, edited) == 3
+    assert api_rig.adapter.write_weights(skin_cluster, edited.astype(np.float32)) == 0
+    api_rig.adapter.forget_weights(skin_cluster)
+    np.testing.assert_array_equal(api_rig.adapter.read_weights(skin_cluster).to_dense(), dense)
+
+
+def test_write_is_undoable(api_rig):
+    skin_cluster = api_rig.chains[0][0]
+    current = api_rig.adapter.read_weights(skin_cluster)
+    dense = current.to_dense()
+    dense[:10] = dense[:10, ::-1]
+    api_rig.adapter.write_weights(skin_cluster, weights.SparseWeights.from_dense(dense, current.influences))
+    api_rig.scene.undo()
+    np.testing.assert_array_equal(api_rig.adapter.read_weights(skin_cluster).to_dense(), current.to_dense())
+
+
+def test_mesh_io(api_rig):
+    shape = api_rig.meshes[0]
+    mesh = api_rig.scene.meshes[shape]
+    np.testing.assert_array_equal(api_rig.adapter.mesh_points(shape), mesh["points"])
+    np.testing.assert_array_equal(api_rig.adapter.mesh_triangles(shape), mesh["faces"])
+    assert api_rig.adapter.vertex_count(api_rig.chains[0][0]) == len(mesh["points"])
+
+
+def test_array_conversions():
+    values = np.arange(12, dtype=np.float64)
+    array = dcc.to_maya(fakes.FakeArray, values)
+    np.testing.assert_array_equal(dcc.to_numpy(array), values)
+    points = fakes.FakeArray(map(tuple, values.reshape(3, 4).tolist()))
+    np.testing.assert_array_equal(dcc.to_numpy(points, width=4), values.reshape(3, 4))
@@ -0,0 +1,74 @@
+import types
+
+from skinClusterManager import dcc
+from skinClusterManager import logics
+
+
+"""
+Deformer graph index: one build for every lookup, rebuilt only after a scene change.
+"""
+
+
+def test_graph_index_build(rig):
+    deformer_graph = logics.get_graph()
+    bottom, top = rig.chains[0]
+    assert sorted(deformer_graph.skin_clusters()) == sorted(rig.skin_clusters)
+    assert deformer_graph.original_nodes(bottom) == ["mesh0ShapeOrig"]
+    assert deformer_graph.input_node(top) == bottom
+    assert deformer_graph.output_nodes(top) == ["mesh0Shape"]
+    assert deformer_graph.upstream(top) == [bottom]
+    assert deformer_graph.build_count == 1
+
+
+def test_graph_index_reused_until_the_scene_changes(rig):
+    deformer_graph = logics.get_graph()
+    version = deformer_graph.version()
+    for skin_cluster in rig.skin_clusters:
+        deformer_graph.record(skin_cluster)
+        deformer_graph.original_nodes(skin_cluster)
+    assert deformer_graph.version() == version
+
+    bottom, top = rig.chains[0]
+    rig.adapter.apply_graph_edits([(f"{bottom}.outputGeometry[0]", "mesh0Shape.inMesh")], [top])
+    assert deformer_graph.dirty
+    assert deformer_graph.version() == version + 1
+    assert deformer_graph.skin_clusters() == [bottom]
+    assert deformer_graph.output_nodes(bottom) == ["mesh0Shape"]
+
+
+def test_set_adapter_drops_the_index(rig):
+    deformer_graph = logics.get_graph()
+    logics.set_adapter(rig.adapter)
+    assert logics.get_graph() is not deformer_graph
+
+
+def test_graph_index_follows_renames(rig):
+    deformer_graph = logics.get_graph()
+    bottom, top = rig.chains[0]
+    assert deformer_graph.record(top) is not None
+
+    rig.adapter.cmds.rename(top, "renamedSkinCluster")
+    assert deformer_graph.dirty
+    assert deformer_graph.record(top) is None
+    assert deformer_graph.input_node("renamedSkinCluster") == bottom
+    assert deformer_graph.output_nodes("renamedSkinCluster") == ["mesh0Shape"]
+
+    rig.scene.undo()
+    assert deformer_graph.input_node(top) == bottom
+
+
+def test_maya_graph_callbacks_include_renames():
+    registered = []
+
+    def register(message):
+        return lambda *args: registered.append(message) or len(registered)
+
+    om = types.SimpleNamespace(
+        MObject=types.SimpleNamespace(kNullObj=None),
+        MDGMessage=types.SimpleNamespace(**{name: register(name) for name in ("addNodeAddedCallback", "addNodeRemovedCallback", "addConnectionCallback")}),
+        MNodeMessage=types.SimpleNamespace(addNameChangedCallback=register("addNameChangedCallback")),
+        MSceneMessage=types.SimpleNamespace(kAfterOpen=0, kAfterNew=1, addCallback=register("addCallback")),
+    )
+    callback_ids = dcc.MayaAdapter(cmds=object(), om=om, oma=object()).add_graph_callbacks(print)
+    assert "addNameChangedCallback" in registered
+    assert len(callback_ids) == len(registered)
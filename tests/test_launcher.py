@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import types
+
+import pytest
+
+import skinClusterManager
+from skinClusterManager import launcher
+
+
+"""
+Launcher: cheap to import, keeps one window and rebuilds it only in dev mode. The window and
+shiboken2 are stand-ins, so these run without Qt.
+"""
+
+
+class Window(object):
+    built = 0
+
+    def __init__(self):
+        Window.built += 1
+        self.calls = []
+        self.alive = True
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args: self.calls.append(name)
+
+    def isMinimized(self):
+        return False
+
+
+@pytest.fixture
+def window_module(adapter, monkeypatch):
+    ui = types.SimpleNamespace(SkinClusterManager=Window)
+    monkeypatch.setitem(sys.modules, "skinClusterManager.ui", ui)
+    monkeypatch.setattr(skinClusterManager, "ui", ui, raising=False)
+    monkeypatch.setitem(sys.modules, "shiboken2", types.SimpleNamespace(isValid=lambda window: window.alive))
+    monkeypatch.setattr(launcher, "_window", None)
+    monkeypatch.setattr(launcher, "_timings", [])
+    monkeypatch.setattr(launcher, "_dev_mode", False)
+    Window.built = 0
+    return ui
+
+
+def test_import_is_light():
+    script = "import sys; import skinClusterManager.launcher; print(sorted({'numpy', 'PySide2', 'skinClusterManager.logics'} & set(sys.modules)))"
+    scripts = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+    output = subprocess.check_output([sys.executable, "-c", script], env=dict(os.environ, PYTHONPATH=scripts))
+    assert output.decode().strip() == "[]"
+
+
+def test_window_built_once(window_module):
+    window = launcher.show()
+    assert launcher.show() is window
+    assert Window.built == 1
+    assert "refresh" in window.calls
+    assert [kind for kind, _ in launcher.timings()] == ["cold", "warm"]
+
+
+def test_deleted_window_is_rebuilt(window_module):
+    launcher.show().alive = False
+    launcher.show()
+    assert Window.built == 2
+    assert [kind for kind, _ in launcher.timings()] == ["cold", "cold"]
+
+
+def test_dev_mode_reloads_and_rebuilds(window_module, monkeypatch):
+    reloads = []
+    monkeypatch.setattr(launcher, "reload_package", lambda: reloads.append(True))
+    first = launcher.show()
+    launcher.set_dev_mode(True)
+    assert launcher.dev_mode()
+    second = launcher.show()
+    assert second is not first
+    assert {"cancel_scan", "close", "deleteLater"} <= set(first.calls)
+    assert reloads == [True]
+    assert [kind for kind, _ in launcher.timings()] == ["cold", "reload"]
+
+
+def test_reload_package_skips_the_kept_modules(monkeypatch):
+    reloaded = []
+    monkeypatch.setattr(launcher.importlib, "reload", lambda module: reloaded.append(module.__name__))
+    launcher.reload_package()
+    assert "skinClusterManager.weights" in reloaded
+    assert not [name for name in reloaded if name.startswith(launcher.NO_RELOAD)]
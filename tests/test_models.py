@@ -0,0 +1,60 @@
+import pytest
+
+QtCore = pytest.importorskip("PySide2.QtCore")
+
+from skinClusterManager import models
+
+
+"""
+skinCluster list models: batched insertions, removals and moves, and the name filter.
+"""
+
+
+def _model(names):
+    model = models.SkinClusterListModel()
+    model.append(models.SkinClusterEntry(name) for name in names)
+    return model
+
+
+def test_ranges():
+    assert models._ranges([1, 2, 3, 5, 7, 8]) == [(1, 3), (5, 5), (7, 8)]
+
+
+def test_entry_tooltip():
+    assert models.SkinClusterEntry("skin1", 10, 2, "stacked").tooltip() == "skin1\nVertices: 10\nInfluences: 2\nStatus: stacked"
+
+
+def test_take_rows_removes_one_range_at_a_time():
+    model = _model("abcdef")
+    removals = []
+    model.rowsRemoved.connect(lambda parent, first, last: removals.append((first, last)))
+    taken = model.take_rows([4, 1, 2])
+    assert [entry.name for entry in taken] == ["b", "c", "e"]
+    assert model.names() == ["a", "d", "f"]
+    assert removals == [(4, 4), (1, 2)]
+
+
+def test_take_scattered_rows_resets(monkeypatch):
+    monkeypatch.setattr(models, "MAX_REMOVE_RANGES", 1)
+    model = _model("abcdef")
+    resets = []
+    model.modelReset.connect(lambda: resets.append(True))
+    model.take_rows([0, 2, 4])
+    assert model.names() == ["b", "d", "f"]
+    assert resets == [True]
+
+
+def test_move_rows_keeps_persistent_indexes():
+    model = _model("abcdef")
+    persistent = QtCore.QPersistentModelIndex(model.index(4))
+    model.move_rows([4, 1], 0)
+    assert model.names() == ["b", "e", "a", "c", "d", "f"]
+    assert persistent.row() == 1
+
+
+def test_filter_model():
+    model = _model(["skinClusterA", "skinClusterB", "bodySkin"])
+    proxy = models.SkinClusterFilterModel(model)
+    proxy.setFilterFixedString("SKINCLUSTER")
+    assert proxy.rowCount() == 2
+    assert proxy.source_rows([proxy.index(row, 0) for row in range(proxy.rowCount())]) == [0, 1]
@@ -0,0 +1,97 @@
+import numpy as np
+
+from skinClusterManager import logics
+from skinClusterManager import snapshots
+
+
+"""
+Edit plans: planned, executed as one undo step and rolled back from their snapshots.
+"""
+
+
+def _combine_groups(rig):
+    return [(chain[0], chain[1:]) for chain in rig.chains]
+
+
+def test_plan_combine(rig):
+    bottom, top = rig.chains[0]
+    edit_plan = logics.plan_combine(_combine_groups(rig), workers=1)
+    assert edit_plan.results == (bottom,)
+    assert edit_plan.deletions == (top,)
+    assert edit_plan.connections == ((f"{bottom}.outputGeometry[0]", "mesh0Shape.inMesh"),)
+    (edit,) = edit_plan.weight_edits
+    assert edit.skin_cluster == bottom
+    assert set(edit.add_influences) == set(rig.adapter.influences(top)) - set(rig.adapter.influences(bottom))
+    np.testing.assert_allclose(edit.weights.row_sums(), 1.0)
+    assert logics.plan_combine(_combine_groups(rig), workers=1) is edit_plan
+
+
+def test_dry_run_leaves_the_scene_untouched(rig):
+    before = dict(rig.scene.nodes)
+    edit_plan = logics.combine_skin_clusters(_combine_groups(rig), workers=1, dry_run=True)
+    assert not edit_plan.is_empty
+    assert rig.scene.nodes == before
+    assert len(logics.get_snapshot_store()) == 0
+
+
+def test_execute_and_rollback(rig):
+    bottom, top = rig.chains[0]
+    original = rig.adapter.read_weights(bottom)
+    assert logics.combine_skin_clusters(_combine_groups(rig), workers=1) == [bottom]
+    assert top not in rig.scene.nodes
+    assert rig.scene.connections["mesh0Shape.inMesh"] == f"{bottom}.outputGeometry[0]"
+    combined = rig.adapter.read_weights(bottom)
+    assert combined.influence_count > original.influence_count
+
+    assert logics.rollback_skin_cluster(bottom) > 0
+    restored = rig.adapter.read_weights(bottom).remap(original.influences)
+    assert np.abs(restored.to_dense() - original.to_dense()).max() <= 1.0 / snapshots.SCALE
+
+
+def test_execute_is_one_undo_step(rig):
+    bottom, top = rig.chains[0]
+    original = rig.adapter.read_weights(bottom)
+    logics.combine_skin_clusters(_combine_groups(rig), workers=1)
+    rig.scene.undo()
+    assert top in rig.scene.nodes
+    assert rig.scene.connections["mesh0Shape.inMesh"] == f"{top}.outputGeometry[0]"
+    assert rig.scene.skin_clusters[bottom]["influences"] == original.influences
+    rig.adapter.forget_weights()
+    np.testing.assert_array_equal(rig.adapter.read_weights(bottom).to_dense(), original.to_dense())
+
+
+def test_added_influences_keep_their_bind_pose(rig):
+    bottom, top = rig.chains[0]
+    bind_pre_matrices = rig.adapter.bind_pre_matrices(top)
+    added = set(bind_pre_matrices) - set(rig.adapter.influences(bottom))
+    assert added
+    moved = np.eye(4)
+    moved[3, :3] = 2.0
+    for influence in rig.adapter.influences(top):
+        rig.scene.attributes[f"{influence}.worldMatrix[0]"] = moved
+    logics.combine_skin_clusters(_combine_groups(rig), workers=1)
+    combined = rig.adapter.bind_pre_matrices(bottom)
+    for influence in added:
+        np.testing.assert_array_equal(combined[influence], bind_pre_matrices[influence])
+
+
+def test_rollback_rejects_snapshots_of_other_skin_clusters(rig):
+    bottom, top = rig.chains[0]
+    (snapshot,) = logics.snapshot_skin_clusters([top])
+    assert logics.rollback_skin_cluster(bottom, snapshot.id) is None
+    assert rig.scene.messages[-1][0] == "error"
+
+
+def test_rollback_is_one_undo_step(rig):
+    bottom, _ = rig.chains[0]
+    (snapshot,) = logics.snapshot_skin_clusters([bottom])
+    renamed = rig.adapter.influences(bottom)[0]
+    rig.adapter.cmds.rename(renamed, "renamedJoint")
+    before = rig.adapter.read_weights(bottom)
+
+    assert logics.rollback_skin_cluster(bottom, snapshot.id) > 0
+    assert renamed in rig.adapter.influences(bottom)
+    rig.scene.undo()
+    assert rig.scene.skin_clusters[bottom]["influences"] == before.influences
+    rig.adapter.forget_weights()
+    np.testing.assert_array_equal(rig.adapter.read_weights(bottom).to_dense(), before.to_dense())
@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+
+from skinClusterManager import logics
+from skinClusterManager import profiling
+
+
+"""
+Opt-in instrumentation: nested spans, counters, cmds call counting and the Chrome trace export.
+"""
+
+
+def test_nothing_records_by_default():
+    assert profiling.recording() is None
+    assert profiling.span("idle") is profiling.span("other")
+    profiling.count("ignored")
+
+
+def test_nested_spans_and_counters():
+    recorder = profiling.enable()
+    try:
+        with profiling.span("outer", skin_cluster="skinCluster1"):
+            profiling.count("vertices_read", 10)
+            with profiling.span("inner"):
+                profiling.count("vertices_read", 5)
+    finally:
+        assert profiling.disable() is recorder
+
+    inner, outer = recorder.spans
+    assert (inner.name, inner.depth, inner.counters) == ("inner", 1, {"vertices_read": 5})
+    assert (outer.name, outer.depth, outer.counters) == ("outer", 0, {"vertices_read": 15})
+    assert outer.child_duration == inner.duration
+    totals = recorder.totals()
+    assert list(totals) == ["outer", "inner"]
+    assert totals["outer"]["self"] == outer.duration - inner.duration
+    assert "vertices_read" in recorder.summary().splitlines()[0]
+
+
+def test_memory_tracking():
+    recorder = profiling.enable(track_memory=True)
+    try:
+        with profiling.span("allocate"):
+            data = np.ones(1 << 20)
+    finally:
+        profiling.disable()
+    assert recorder.spans[0].counters["bytes_allocated"] >= data.nbytes
+
+
+def test_operation_trace(rig, tmp_path):
+    bottom, top = rig.chains[0]
+    recorder = profiling.enable(rig.adapter)
+    try:
+        logics.merge_skin_clusters(bottom, top, mode="merge")
+    finally:
+        profiling.disable()
+    assert not isinstance(rig.adapter.cmds, profiling.CountingCommands)
+
+    path = recorder.write_trace(str(tmp_path / "trace.json"))
+    with open(path) as file:
+        events = json.load(file)["traceEvents"]
+    assert events[0]["name"] == "merge_skin_clusters"
+    assert all(event["ph"] == "X" and event["dur"] >= 0.0 for event in events)
+    assert events[0]["args"]["cmds_calls"] > 0
+    assert "write_weights" in {event["name"] for event in events}
@@ -0,0 +1,68 @@
+import numpy as np
+
+from skinClusterManager import refit
+from skinClusterManager import weights
+from skinClusterManager.benchmarks import rigs
+
+
+"""
+Chain refit: the simplex projection, the solver and a chain whose exact solution is known.
+"""
+
+
+def test_project_simplex():
+    values = np.array([[0.2, 0.3, 0.9], [-1.0, 2.0, 0.5], [0.1, 0.1, 0.1]])
+    mask = np.array([[True, True, True], [True, True, False], [True, False, True]])
+    projected = refit.project_simplex(values, mask)
+    np.testing.assert_allclose(projected.sum(axis=1), 1.0)
+    assert np.all(projected >= 0.0)
+    assert np.all(projected[~mask] == 0.0)
+    np.testing.assert_allclose(projected[1], [0.0, 1.0, 0.0])
+
+
+def test_fit_chain_single_layer():
+    points, _ = rigs.grid_mesh(100)
+    joints = np.stack([np.linspace(0.0, 1.0, 3), np.zeros(3), np.linspace(0.0, 1.0, 3)], axis=1)
+    dense = rigs.falloff_weights(points, joints, 3)
+    world = np.tile(np.eye(4), (3, 1, 1))
+    world[:, 3, :3] = joints
+    bind = {name: np.linalg.inv(matrix) for name, matrix in zip("abc", world)}
+    fit = refit.fit_chain(points, [weights.SparseWeights.from_dense(dense, list("abc"))], [bind], refit.sample_poses(world, 12, 45.0), list("abc"))
+    assert fit.max_error < 1e-6
+    np.testing.assert_allclose(fit.weights.remap(list("abc")).to_dense(), dense, atol=1e-5)
+
+
+def test_solver_finds_interior_solutions():
+    random = np.random.default_rng(3)
+    matrices = random.normal(size=(200, 12, 4))
+    expected = random.dirichlet(np.ones(4), size=200)
+    targets = np.einsum("nij,nj->ni", matrices, expected)
+    gram = np.einsum("nij,nik->njk", matrices, matrices)
+    solution = refit.solve_simplex_least_squares(gram, np.einsum("nij,ni->nj", matrices, targets), np.ones((200, 4), dtype=bool), iterations=5000)
+    np.testing.assert_allclose(solution, expected, atol=1e-6)
+
+
+def test_fit_chain_reproduces_an_exact_chain():
+    points, _ = rigs.grid_mesh(100)
+    joints = np.stack([np.linspace(0.0, 1.0, 3), np.zeros(3), np.linspace(0.0, 1.0, 3)], axis=1)
+    dense = rigs.falloff_weights(points, joints, 3)
+    influences = ["a", "b", "c", "identity"]
+    world = np.tile(np.eye(4), (4, 1, 1))
+    world[:3, 3, :3] = joints
+    bind = {name: np.linalg.inv(matrix) for name, matrix in zip(influences, world)}
+    # A second layer binding every vertex to a joint that never moves leaves the first one as is.
+    layers = [
+        weights.SparseWeights.from_dense(dense, influences[:3]),
+        weights.SparseWeights.from_dense(np.ones((len(points), 1)), influences[3:]),
+    ]
+    poses = refit.sample_poses(world, 12, 45.0)
+    poses[:, 3] = np.eye(4)
+
+    # Close to the pivot of a joint its candidate barely moves, like the identity one, so those
+    # vertices are ill-conditioned and need more than the default iterations.
+    fit = refit.fit_chain(points, layers, [bind, bind], poses, influences, iterations=5000)
+    assert fit.max_error < 1e-6
+    # The vertices on the pivots of a and c are also exact with the identity joint instead.
+    pivots = np.isin(np.arange(len(points)), [0, len(points) - 1])
+    np.testing.assert_allclose(fit.weights.remap(influences).to_dense()[~pivots, :3], dense[~pivots], atol=1e-5)
+    np.testing.assert_allclose(fit.weights.row_sums(), 1.0)
@@ -0,0 +1,33 @@
+from skinClusterManager import logics
+
+
+"""
+Time-sliced skinCluster scan: one graph query, stats read chunk by chunk.
+"""
+
+
+def test_scan_in_chunks(rig):
+    steps = list(logics.scan_skin_clusters(chunk_size=3))
+    total = len(rig.skin_clusters)
+    assert [done for done, _, _ in steps] == list(range(3, total, 3)) + [total]
+    assert {count for _, count, _ in steps} == {total}
+    rows = [row for _, _, chunk in steps for row in chunk]
+    assert sorted(row[0] for row in rows) == sorted(rig.skin_clusters)
+
+
+def test_scan_stats(rig):
+    bottom, top = rig.chains[0]
+    stats = {row[0]: row for _, _, chunk in logics.scan_skin_clusters() for row in chunk}
+    assert stats[bottom] == (bottom, 400, len(rig.adapter.influences(bottom)), None)
+    assert stats[top] == (top, 400, len(rig.adapter.influences(top)), "stacked")
+
+
+def test_scan_excludes_listed_skin_clusters(rig):
+    bottom, top = rig.chains[0]
+    rows = [row for _, _, chunk in logics.scan_skin_clusters(exclude=[bottom]) for row in chunk]
+    assert bottom not in [row[0] for row in rows]
+    assert top in [row[0] for row in rows]
+
+
+def test_scan_empty_scene(adapter):
+    assert list(logics.scan_skin_clusters()) == [(0, 0, [])]
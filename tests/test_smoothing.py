@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from skinClusterManager import logics
+from skinClusterManager import smoothing
+from skinClusterManager import weights
+
+
+"""
+Masked Laplacian smoothing: adjacency, seam masks and smoothing against a dense reference.
+"""
+
+
+def _strip(length):
+    # A row of quads: vertices 0..length-1 on the bottom edge, length..2*length-1 on the top one.
+    face_vertices = [[start, start + 1, length + start + 1, length + start] for start in range(length - 1)]
+    return smoothing.Adjacency.from_faces(2 * length, np.full(length - 1, 4), np.ravel(face_vertices))
+
+
+def test_adjacency_from_faces():
+    adjacency = _strip(3)
+    assert adjacency.vertex_count == 6
+    assert len(adjacency.indices) // 2 == 7
+    owners, neighbours = adjacency.neighbours([1])
+    assert neighbours.tolist() == [0, 2, 4]
+    assert owners.tolist() == [0, 0, 0]
+
+
+def test_stack_offsets_the_second_mesh():
+    stacked = smoothing.Adjacency.stack([_strip(2), _strip(2)])
+    assert stacked.vertex_count == 8
+    assert stacked.neighbours([4])[1].tolist() == [5, 6]
+
+
+def test_seam_mask():
+    adjacency = _strip(6)
+    labels = np.tile(np.arange(6) >= 3, 2)
+    assert np.flatnonzero(adjacency.boundary(labels)).tolist() == [2, 3, 8, 9]
+    assert np.flatnonzero(smoothing.seam_mask(adjacency, labels, rings=2)).tolist() == [1, 2, 3, 4, 7, 8, 9, 10]
+
+
+def test_dominant_influences():
+    sparse_weights = weights.SparseWeights.from_dense(np.array([[0.2, 0.8], [0.0, 0.0], [0.6, 0.4]]), ["a", "b"])
+    assert smoothing.dominant_influences(sparse_weights).tolist() == [1, -1, 0]
+
+
+def test_smooth_weights_matches_a_dense_reference():
+    adjacency = _strip(8)
+    generator = np.random.default_rng(5)
+    dense = generator.random((16, 3))
+    dense /= dense.sum(axis=1, keepdims=True)
+    mask = np.zeros(16, dtype=bool)
+    mask[[2, 3, 4, 11]] = True
+
+    expected = dense.copy()
+    neighbours = [adjacency.indices[adjacency.indptr[vertex]:adjacency.indptr[vertex + 1]] for vertex in range(16)]
+    for _ in range(2):
+        previous = expected.copy()
+        for vertex in np.flatnonzero(mask):
+            expected[vertex] = 0.5 * previous[vertex] + 0.5 * previous[neighbours[vertex]].mean(axis=0)
+
+    sparse_weights = weights.SparseWeights.from_dense(dense, ["a", "b", "c"])
+    smoothed = smoothing.smooth_weights(sparse_weights, adjacency, mask, iterations=2, strength=0.5, threshold=0.0)
+    np.testing.assert_allclose(smoothed.to_dense(), expected / expected.sum(axis=1, keepdims=True))
+    np.testing.assert_array_equal(smoothed.to_dense()[~mask], dense[~mask])
+
+
+def test_smooth_weights_checks_the_vertex_count():
+    sparse_weights = weights.SparseWeights.from_dense(np.eye(3), ["a", "b", "c"])
+    with pytest.raises(ValueError):
+        smoothing.smooth_weights(sparse_weights, _strip(3), np.ones(6, dtype=bool))
+
+
+def test_combine_smooths_the_seam(rig):
+    groups = [(chain[0], chain[1:]) for chain in rig.chains]
+    plain = logics.plan_combine(groups, workers=1).weight_edits[0].weights
+    smoothed = logics.plan_combine(groups, workers=1, smooth_iterations=3).weight_edits[0].weights
+    np.testing.assert_allclose(smoothed.row_sums(), 1.0)
+    assert weights.changed_rows(plain, smoothed).any()
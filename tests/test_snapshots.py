@@ -0,0 +1,63 @@
+import numpy as np
+
+from skinClusterManager import snapshots
+from skinClusterManager import weights
+
+
+"""
+Quantized snapshots: the documented error bound, exact vertex totals and shared blocks.
+"""
+
+
+def _weights(vertex_count=3000, influence_count=12, seed=1):
+    random = np.random.default_rng(seed)
+    dense = random.random((vertex_count, influence_count)) ** 4
+    dense[dense < 0.05] = 0.0
+    dense[np.arange(vertex_count), random.integers(0, influence_count, vertex_count)] += 0.1
+    return weights.SparseWeights.from_dense(dense / dense.sum(axis=1, keepdims=True), [f"joint{index}" for index in range(influence_count)])
+
+
+def test_quantization_error_bound():
+    sparse = _weights()
+    store = snapshots.SnapshotStore(block_size=512)
+    restored = store.restore(store.take("skinCluster1", sparse).id)
+    assert restored.influences == sparse.influences
+    np.testing.assert_array_equal(restored.indptr, sparse.indptr)
+    assert np.abs(restored.values - sparse.values).max() <= 1.0 / snapshots.SCALE
+    # Largest remainder rounding keeps every normalized vertex summing to exactly one.
+    values, row_sums = snapshots.quantize(sparse)
+    assert row_sums is None
+    np.testing.assert_array_equal(np.add.reduceat(values.astype(np.int64), sparse.indptr[:-1]), snapshots.SCALE)
+
+
+def test_unnormalized_totals_are_kept():
+    sparse = _weights()
+    sparse.values[sparse.indptr[5]:sparse.indptr[6]] *= 0.5
+    store = snapshots.SnapshotStore()
+    restored = store.restore(store.take("skinCluster1", sparse).id)
+    np.testing.assert_allclose(restored.row_sums(), sparse.row_sums(), rtol=1e-6)
+    assert np.abs(restored.values - sparse.values).max() <= 1.0 / snapshots.SCALE
+
+
+def test_snapshots_share_unchanged_blocks():
+    sparse = _weights()
+    store = snapshots.SnapshotStore(block_size=512)
+    first = store.take("skinCluster1", sparse)
+    size = store.nbytes
+    edited = sparse.copy()
+    edited.values[:edited.indptr[10]] = edited.values[:edited.indptr[10]][::-1]
+    second = store.take("skinCluster1", edited)
+    assert first.blocks[1:] == second.blocks[1:]
+    assert first.blocks[0] != second.blocks[0]
+    assert store.nbytes < 2 * size
+    assert store.latest("skinCluster1") is second
+
+
+def test_budget_evicts_the_least_recently_used():
+    sparse = _weights()
+    store = snapshots.SnapshotStore(budget=1)
+    first = store.take("skinCluster1", sparse)
+    second = store.take("skinCluster2", _weights(seed=2))
+    assert first.id not in store.snapshots
+    assert store.history() == [second]
+    assert store.restore(first.id) is None
@@ -0,0 +1,76 @@
+import numpy as np
+
+from skinClusterManager import transfer
+from skinClusterManager import weights
+
+
+"""
+Closest point queries of the transfer index and weight transfer between meshes.
+"""
+
+
+def brute_force(points, triangles, queries):
+    a, b, c = (points[triangles[:, corner]] for corner in range(3))
+    return np.array([transfer.closest_points_on_triangles(np.repeat(query[None], len(triangles), axis=0), a, b, c)[0].min() for query in queries])
+
+
+def test_closest_point_on_triangle_regions():
+    a, b, c = np.array([[0.0, 0.0, 0.0]]), np.array([[1.0, 0.0, 0.0]]), np.array([[0.0, 1.0, 0.0]])
+    queries = np.array([[0.25, 0.25, 1.0], [-1.0, -1.0, 0.0], [0.5, -1.0, 0.0], [1.0, 1.0, 0.0]])
+    distances, barycentric = transfer.closest_points_on_triangles(queries, *(np.repeat(corner, len(queries), axis=0) for corner in (a, b, c)))
+    np.testing.assert_allclose(distances, [1.0, 2.0, 1.0, 0.5])
+    np.testing.assert_allclose(barycentric, [[0.5, 0.25, 0.25], [1.0, 0.0, 0.0], [0.5, 0.5, 0.0], [0.0, 0.5, 0.5]])
+
+
+def test_closest_finds_big_triangle_behind_small_ones():
+    # One 100 unit triangle surrounded by tiny triangles whose centroids are all nearer the query
+    # than the centroid of the big one.
+    points = [(0.0, -50.0, 0.0), (100.0, -50.0, 0.0), (0.0, 50.0, 0.0)]
+    triangles = [(0, 1, 2)]
+    for step in range(10):
+        angle = step * np.pi / 5.0
+        x, y = 30.0 + 5.0 * np.cos(angle), 0.5 + 5.0 * np.sin(angle)
+        triangles.append((len(points), len(points) + 1, len(points) + 2))
+        points += [(x, y, 1.0), (x + 0.1, y, 1.0), (x, y + 0.1, 1.0)]
+    mesh_index = transfer.MeshIndex(np.array(points), np.array(triangles))
+
+    vertices, barycentric = mesh_index.closest(np.array([[30.0, 0.5, 0.0]]))
+    assert vertices.tolist() == [[0, 1, 2]]
+    position = barycentric[0] @ np.array(points)[vertices[0]]
+    np.testing.assert_allclose(position, [30.0, 0.5, 0.0], atol=1e-9)
+
+
+def test_closest_matches_brute_force():
+    generator = np.random.default_rng(7)
+    points = generator.normal(size=(200, 3))
+    # Mixed sizes: small triangles between nearby points and long slivers across the cloud.
+    triangles = np.concatenate([np.arange(198)[:, None] + np.arange(3), generator.integers(0, 200, size=(40, 3))])
+    queries = generator.normal(size=(500, 3)) * 1.5
+    mesh_index = transfer.MeshIndex(points, triangles)
+
+    vertices, barycentric = mesh_index.closest(queries, batch_size=128)
+    positions = np.einsum("ij,ijk->ik", barycentric, points[vertices])
+    np.testing.assert_allclose(((positions - queries) ** 2).sum(axis=1), brute_force(points, triangles, queries), atol=1e-9)
+
+
+def test_grid_index_radius_query():
+    generator = np.random.default_rng(3)
+    points = generator.random((300, 3))
+    queries = generator.random((50, 3))
+    radii = generator.random(50) * 0.5
+    radii[0] = 10.0
+    query_ids, found = transfer.GridIndex(points).query_radius(queries, radii)
+
+    distances = np.sqrt(((queries[:, None, :] - points[None, :, :]) ** 2).sum(axis=2))
+    expected = set(zip(*np.nonzero(distances <= radii[:, None])))
+    assert set(zip(query_ids.tolist(), found.tolist())) == expected
+
+
+def test_transfer_weights_onto_subdivided_mesh():
+    points = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 1.0, 0.0]])
+    triangles = np.array([[0, 1, 2], [1, 3, 2]])
+    source = weights.SparseWeights.from_dense(np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 0.0], [0.0, 1.0]]), ["a", "b"])
+    targets = np.array([[0.5, 0.5, 0.2], [0.25, 0.0, 0.0], [1.0, 1.0, 0.0]])
+
+    result = transfer.transfer_weights(source, transfer.MeshIndex(points, triangles), targets)
+    np.testing.assert_allclose(result.to_dense(), [[0.5, 0.5], [0.75, 0.25], [0.0, 1.0]])
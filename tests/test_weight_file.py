@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from skinClusterManager import logics
+from skinClusterManager import weight_file
+from skinClusterManager import weights
+
+
+"""
+Binary weight files: memory mapped reads of vertex ranges and influences, export and import.
+"""
+
+
+def _weights(dtype=np.float64):
+    generator = np.random.default_rng(1)
+    dense = generator.random((50, 4)) * (generator.random((50, 4)) > 0.5)
+    return weights.SparseWeights.from_dense(dense, ["a", "b", "c", "d"], dtype=dtype)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_round_trip(tmp_path, dtype):
+    path = str(tmp_path / "weights.skcw")
+    sparse_weights = _weights(dtype)
+    weight_file.write(path, sparse_weights, topology="abc", skin_cluster="skinCluster1", bind_pre_matrices={"a": np.eye(4)})
+
+    read, header = weight_file.read(path)
+    assert read.values.dtype == dtype
+    assert read.influences == sparse_weights.influences
+    np.testing.assert_array_equal(read.to_dense(), sparse_weights.to_dense())
+    assert header["topology"] == "abc"
+    assert header["skin_cluster"] == "skinCluster1"
+    assert header["bind_pre_matrices"] == {"a": np.eye(4).ravel().tolist()}
+    assert weight_file.read_header(path)["vertex_count"] == 50
+
+
+def test_read_vertex_range_and_influences(tmp_path):
+    path = str(tmp_path / "weights.skcw")
+    sparse_weights = _weights()
+    weight_file.write(path, sparse_weights)
+    read, _ = weight_file.read(path, vertex_range=(10, 20), influences=["d", "b"])
+    np.testing.assert_array_equal(read.to_dense(), sparse_weights.to_dense()[10:20][:, [3, 1]])
+
+
+def test_not_a_weight_file(tmp_path):
+    path = tmp_path / "weights.skcw"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        weight_file.read_header(str(path))
+
+
+def test_export_import_vertex_range(rig, tmp_path):
+    bottom, _ = rig.chains[0]
+    path = str(tmp_path / "bottom.skcw")
+    original = rig.adapter.read_weights(bottom)
+    assert logics.export_weights(bottom, path, dtype=np.float64) == path
+
+    edited = original.to_dense()
+    edited[:] = edited[:, ::-1]
+    rig.adapter.write_weights(bottom, weights.SparseWeights.from_dense(edited, original.influences))
+    assert logics.import_weights(bottom, path, vertex_range=(0, 100)) == bottom
+
+    rig.adapter.forget_weights(bottom)
+    result = rig.adapter.read_weights(bottom).to_dense()
+    np.testing.assert_array_equal(result[:100], original.to_dense()[:100])
+    np.testing.assert_array_equal(result[100:], edited[100:])
+
+
+def test_import_refuses_another_vertex_count(rig, tmp_path):
+    bottom, _ = rig.chains[0]
+    path = str(tmp_path / "short.skcw")
+    weight_file.write(path, rig.adapter.read_weights(bottom).slice_rows(0, 10))
+    assert logics.import_weights(bottom, path) is None
+    assert rig.scene.messages[-1][0] == "error"
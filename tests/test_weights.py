@@ -0,0 +1,103 @@
+import numpy as np
+
+from skinClusterManager import weights
+
+
+"""
+Sparse weight maths: the CSR container, influence merging and change detection.
+"""
+
+
+def _random_dense(vertex_count=50, influence_count=6, seed=0):
+    random = np.random.default_rng(seed)
+    dense = random.random((vertex_count, influence_count))
+    dense[dense < 0.6] = 0.0
+    dense[np.arange(vertex_count), random.integers(0, influence_count, vertex_count)] += 0.5
+    return dense / dense.sum(axis=1, keepdims=True)
+
+
+def test_dense_round_trip():
+    dense = _random_dense()
+    sparse = weights.SparseWeights.from_dense(dense, list("abcdef"))
+    assert sparse.shape == dense.shape
+    assert sparse.nnz == np.count_nonzero(dense)
+    assert np.all(np.diff(sparse.indptr) == np.count_nonzero(dense, axis=1))
+    np.testing.assert_array_equal(sparse.to_dense(), dense)
+    np.testing.assert_allclose(sparse.row_sums(), 1.0)
+
+
+def test_row_operations():
+    dense = _random_dense()
+    sparse = weights.SparseWeights.from_dense(dense, list("abcdef"))
+    rows = np.array([3, 7, 20])
+    np.testing.assert_array_equal(sparse.take_rows(rows).to_dense(), dense[rows])
+    np.testing.assert_array_equal(sparse.slice_rows(10, 15).to_dense(), dense[10:15])
+
+    block = weights.SparseWeights.from_dense(np.eye(6)[:3], list("abcdef"))
+    expected = dense.copy()
+    expected[rows] = np.eye(6)[:3]
+    np.testing.assert_array_equal(sparse.put_rows(rows, block).to_dense(), expected)
+    stacked = weights.SparseWeights.vstack([sparse.slice_rows(0, 25), sparse.slice_rows(25, 50)])
+    np.testing.assert_array_equal(stacked.to_dense(), dense)
+
+
+def test_top_k_normalize():
+    dense = _random_dense()
+    capped = weights.SparseWeights.from_dense(dense, list("abcdef")).top_k(2).normalize()
+    assert np.all(np.diff(capped.indptr) <= 2)
+    np.testing.assert_allclose(capped.row_sums(), 1.0)
+
+
+def test_remap_moves_columns_by_name():
+    dense = _random_dense()
+    sparse = weights.SparseWeights.from_dense(dense, list("abcdef"))
+    remapped = sparse.remap(list("fxedcba"))
+    assert remapped.influences == list("fxedcba")
+    expected = np.zeros((50, 7))
+    expected[:, [0, 2, 3, 4, 5, 6]] = dense[:, ::-1]
+    np.testing.assert_array_equal(remapped.to_dense(), expected)
+
+
+def test_influence_index_merges_and_scatters():
+    index = weights.InfluenceIndex([["a", "b"], ["b", "c"], ["L_x"]], renames={"L_x": "a"})
+    assert index.influences == ["a", "b", "c"]
+    np.testing.assert_array_equal(index.remaps[1], [1, 2])
+    np.testing.assert_array_equal(index.lookup(["c", "missing"]), [2, -1])
+
+    first = weights.SparseWeights.from_dense(np.array([[0.5, 0.5], [1.0, 0.0]]), ["a", "b"])
+    second = weights.SparseWeights.from_dense(np.array([[0.25, 0.75], [0.0, 1.0]]), ["b", "c"])
+    third = weights.SparseWeights.from_dense(np.array([[1.0], [0.5]]), ["L_x"])
+    summed = index.scatter([first, second, third])
+    np.testing.assert_allclose(summed.to_dense(), [[1.5, 0.75, 0.75], [1.5, 0.0, 1.0]])
+
+
+def test_changed_rows():
+    dense = _random_dense()
+    old = weights.SparseWeights.from_dense(dense, list("abcdef"))
+    edited = dense.copy()
+    edited[[4, 9]] = np.eye(6)[:2]
+    new = weights.SparseWeights.from_dense(edited, list("abcdef"))
+    np.testing.assert_array_equal(np.flatnonzero(weights.changed_rows(old, new)), [4, 9])
+    assert not weights.changed_rows(old, old.copy()).any()
+
+
+def test_changed_rows_ignores_float32_rounding():
+    old = weights.SparseWeights.from_dense(_random_dense(), list("abcdef"))
+    rounded = old.astype(np.float32)
+    assert not weights.changed_rows(old, rounded).any()
+    assert weights.changed_rows(old, rounded, tolerance=0.0).any()
+
+
+def test_rename_table_swaps_whole_tokens():
+    names = ["arm_L", "L_leg", "ns:L_hand", "spine_Lower", "head"]
+    assert weights.rename_table(names, swap=("_L", "_R")) == {"arm_L": "arm_R", "L_leg": "R_leg", "ns:L_hand": "ns:R_hand"}
+    assert weights.rename_table(["a:arm_R"], namespace=("a:", "b:"), swap=("L", "R")) == {"a:arm_R": "b:arm_L"}
+
+
+def test_merge_weights_passthrough():
+    base = weights.SparseWeights.from_dense(np.array([[1.0, 0.0], [0.5, 0.5]]), ["root", "a"])
+    layer = weights.SparseWeights.from_dense(np.array([[1.0, 0.0], [0.0, 1.0]]), ["root", "b"])
+    merged = weights.merge_weights(base, layer, passthrough=["root"])
+    assert merged.influences == ["root", "a", "b"]
+    np.testing.assert_allclose(merged.row_sums(), 1.0)
+    np.testing.assert_allclose(merged.to_dense()[0], [1.0, 0.0, 0.0])